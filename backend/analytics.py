@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from .extensions import db
+from .models import Appointment, AppointmentRollup, User
+
+STATUSES = ("scheduled", "completed", "cancelled")
+
+
+def adjust_rollups(changes):
+    """Add {(day, doctor_id, status): delta} to the rollup counts in the current transaction.
+
+    Callers hold the doctor's schedule lock (see availability.lock_schedule),
+    so the upserts for one doctor never race each other.
+    """
+    rows = [
+        {"day": day, "doctor_id": doctor_id, "status": status, "count": delta}
+        for (day, doctor_id, status), delta in changes.items()
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    table = AppointmentRollup.__table__
+    statement = dialect.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.doctor_id, table.c.status],
+        set_={"count": table.c["count"] + statement.excluded["count"]},
+    )
+    db.session.execute(statement, rows)
+
+
+def record_appointment_change(appointment, old_status=None):
+    """Move one appointment between status counts; old_status=None for a new booking"""
+    if old_status == appointment.status:
+        return
+    key = (appointment.start_time.date(), appointment.doctor_id)
+    changes = {(*key, appointment.status): 1}
+    if old_status is not None:
+        changes[(*key, old_status)] = -1
+    adjust_rollups(changes)
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from the appointments table in one transaction"""
+    if db.engine.dialect.name == "postgresql":
+        # Bookings committing meanwhile wait for us instead of being counted twice or lost
+        db.session.execute(text("LOCK TABLE appointment_rollups IN EXCLUSIVE MODE"))
+    db.session.execute(delete(AppointmentRollup))
+    db.session.execute(
+        AppointmentRollup.__table__.insert().from_select(
+            ["day", "doctor_id", "status", "count"],
+            live_counts(),
+        )
+    )
+    db.session.commit()
+    return db.session.query(func.count()).select_from(AppointmentRollup).scalar()
+
+
+def live_counts():
+    """(day, doctor_id, status, count) straight from the appointments table"""
+    day = func.date(Appointment.start_time)
+    return (
+        select(day, Appointment.doctor_id, Appointment.status, func.count())
+        .group_by(day, Appointment.doctor_id, Appointment.status)
+    )
+
+
+def rollup_drift():
+    """Keys whose rollup count differs from the appointments table, as {key: (rollup, live)}"""
+    def normalize(day):
+        return day if isinstance(day, str) else day.isoformat()
+
+    live = {
+        (normalize(day), doctor_id, status): count
+        for day, doctor_id, status, count in db.session.execute(live_counts())
+    }
+    rolled = {
+        (row.day.isoformat(), row.doctor_id, row.status): row.count
+        for row in AppointmentRollup.query.filter(AppointmentRollup.count != 0)
+    }
+    return {
+        key: (rolled.get(key, 0), live.get(key, 0))
+        for key in live.keys() | rolled.keys()
+        if rolled.get(key, 0) != live.get(key, 0)
+    }
+
+
+def parse_range(start_str, end_str, default_days=30):
+    """Inclusive (start, end) dates from YYYY-MM-DD strings; defaults to the last `default_days` days"""
+    end = datetime.strptime(end_str, "%Y-%m-%d").date() if end_str else datetime.utcnow().date()
+    start = datetime.strptime(start_str, "%Y-%m-%d").date() if start_str else end - timedelta(days=default_days - 1)
+    if end < start:
+        raise ValueError("end must not be before start")
+    return start, end
+
+
+def _status_sums():
+    return [
+        func.sum(case((AppointmentRollup.status == status, AppointmentRollup.count), else_=0)).label(status)
+        for status in STATUSES
+    ]
+
+
+def summary():
+    """Headline numbers for the admin dashboard"""
+    users = dict(db.session.execute(select(User.role, func.count()).group_by(User.role)).all())
+
+    now = datetime.utcnow()
+    tomorrow = now.date() + timedelta(days=1)
+    total = db.session.execute(select(func.coalesce(func.sum(AppointmentRollup.count), 0))).scalar()
+    scheduled_after_today = db.session.execute(
+        select(func.coalesce(func.sum(AppointmentRollup.count), 0))
+        .where(AppointmentRollup.day >= tomorrow, AppointmentRollup.status == "scheduled")
+    ).scalar()
+    # The rollups are per day; the rest of today comes from the (indexed) appointments table
+    scheduled_later_today = Appointment.query.filter(
+        Appointment.status == "scheduled",
+        Appointment.start_time >= now,
+        Appointment.start_time < datetime.combine(tomorrow, datetime.min.time()),
+    ).count()
+
+    return {
+        "total_doctors": users.get("doctor", 0),
+        "total_patients": users.get("patient", 0),
+        "total_appointments": int(total),
+        "upcoming_appointments": int(scheduled_after_today) + scheduled_later_today,
+    }
+
+
+def appointments_per_day(start, end, doctor_id=None):
+    """Per-day totals and status breakdown for start..end (inclusive); days without appointments are omitted"""
+    query = (
+        select(AppointmentRollup.day, *_status_sums())
+        .where(AppointmentRollup.day >= start, AppointmentRollup.day <= end)
+        .group_by(AppointmentRollup.day)
+        .order_by(AppointmentRollup.day)
+    )
+    if doctor_id is not None:
+        query = query.where(AppointmentRollup.doctor_id == doctor_id)
+
+    days = []
+    for row in db.session.execute(query):
+        counts = {status: int(getattr(row, status)) for status in STATUSES}
+        if any(counts.values()):
+            days.append({"date": row.day.isoformat(), "total": sum(counts.values()), **counts})
+    return days
+
+
+def doctor_stats(start, end):
+    """Per-doctor totals, status breakdown and cancellation rate for start..end (inclusive)"""
+    rows = db.session.execute(
+        select(AppointmentRollup.doctor_id, User.name, *_status_sums())
+        .outerjoin(User, User.id == AppointmentRollup.doctor_id)
+        .where(AppointmentRollup.day >= start, AppointmentRollup.day <= end)
+        .group_by(AppointmentRollup.doctor_id, User.name)
+        .order_by(AppointmentRollup.doctor_id)
+    )
+
+    doctors = []
+    for row in rows:
+        counts = {status: int(getattr(row, status)) for status in STATUSES}
+        total = sum(counts.values())
+        if not total:
+            continue
+        doctors.append({
+            "doctor_id": row.doctor_id,
+            "name": row.name,
+            "total": total,
+            **counts,
+            "cancellation_rate": round(counts["cancelled"] / total, 4),
+        })
+    return doctors
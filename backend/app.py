@@ -1,8 +1,24 @@
+import os
 from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
 from .config import Config
-from .extensions import db, bcrypt, jwt, cors, mail
+from .extensions import db, jwt, cors, mail
+from .database import engine_options, engine_binds, configure_engine
+from .replica import replica_router
+from .metrics import request_metrics
+from .profiling import request_profiler
+from .compression import response_compressor
+from .json_provider import json_provider
+from .passwords import password_hasher, PasswordHasherBusy
+from .outbox import start_outbox_workers
+from .availability import availability_index
+from .events import appointment_events
+from .changes import change_sequence
+from .doctor_directory import doctor_directory
+from .symptom_matcher import symptom_matcher
+from .llm_client import llm_recommender
+from .specialty_classifier import specialty_classifier
 from .routes.auth_routes import auth_bp
 from .routes.doctor_routes import doctor_bp
 from .routes.appointment_routes import appointment_bp
@@ -11,21 +27,39 @@ from .routes.admin_routes import admin_bp
 
 load_dotenv()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    app.json = json_provider(app)
 
     # extensions
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+    app.config["SQLALCHEMY_BINDS"] = engine_binds(app.config)
     db.init_app(app)
-    bcrypt.init_app(app)
+    configure_engine(app)
+    replica_router.init_app(app)
+    request_metrics.init_app(app)
+    request_profiler.init_app(app)
+    response_compressor.init_app(app)
+    password_hasher.init_app(app)
     jwt.init_app(app)
     mail.init_app(app)
+    availability_index.init_app(app)
+    change_sequence.init_app(app)
+    appointment_events.init_app(app)
+    doctor_directory.init_app(app)
+    symptom_matcher.init_app(app)
+    llm_recommender.init_app(app)
+    specialty_classifier.init_app(app)
 
     cors.init_app(
     app,
     resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}},
     supports_credentials=True,
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "X-Profile"],
+    expose_headers=["X-Profile-Id"],
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
 )
 
@@ -45,11 +79,29 @@ def create_app():
     def not_found(e):
         return jsonify({"message": "Not found"}), 404
 
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(e):
+        return jsonify({"message": "Server busy, please try again"}), 503, {"Retry-After": "1"}
+
     return app
 
+
+def start_workers(app):
+    """Start the background threads of a serving process: OUTBOX_WORKERS email outbox workers.
+
+    create_app() starts none, so scripts, tests and shells that build an
+    app don't deliver mail behind their back; whatever serves the app calls this.
+    """
+    if app.config["OUTBOX_WORKERS"]:
+        start_outbox_workers(app)
+
+
 if __name__ == "__main__":
     app = create_app()
     with app.app_context():
         from . import models  # ensures tables load
         db.create_all()
+    # With the reloader, only the child process serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_workers(app)
     app.run(debug=True)
@@ -0,0 +1,111 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from .extensions import db
+from .models import Appointment, User, DoctorProfile
+from .analytics import STATUSES
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+COLUMNS = (
+    "id", "start_time", "end_time", "status", "reason", "created_at",
+    "patient_id", "patient_name", "patient_email",
+    "doctor_id", "doctor_name", "doctor_specialty",
+)
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parse_filters(args):
+    """Export filters from query parameters: start/end (YYYY-MM-DD, inclusive), doctor_id, status.
+
+    Raises ValueError with a message for the client.
+    """
+    filters = {}
+    try:
+        if args.get("start"):
+            filters["start"] = datetime.strptime(args["start"], "%Y-%m-%d")
+        if args.get("end"):
+            filters["end"] = datetime.strptime(args["end"], "%Y-%m-%d") + timedelta(days=1)
+    except ValueError:
+        raise ValueError("start and end must be YYYY-MM-DD")
+    if "start" in filters and "end" in filters and filters["end"] <= filters["start"]:
+        raise ValueError("end must not be before start")
+    if args.get("doctor_id"):
+        if not args["doctor_id"].isdigit():
+            raise ValueError("doctor_id must be an integer")
+        filters["doctor_id"] = int(args["doctor_id"])
+    if args.get("status"):
+        if args["status"] not in STATUSES:
+            raise ValueError(f"status must be one of: {', '.join(STATUSES)}")
+        filters["status"] = args["status"]
+    return filters
+
+
+def export_query(filters):
+    """One flat row per appointment with patient and doctor details, in (start_time, id) order"""
+    patient = aliased(User)
+    doctor = aliased(User)
+    query = (
+        select(
+            Appointment.id, Appointment.start_time, Appointment.end_time, Appointment.status,
+            Appointment.reason, Appointment.created_at,
+            Appointment.patient_id, patient.name, patient.email,
+            Appointment.doctor_id, doctor.name, DoctorProfile.specialty,
+        )
+        .outerjoin(patient, patient.id == Appointment.patient_id)
+        .outerjoin(doctor, doctor.id == Appointment.doctor_id)
+        .outerjoin(DoctorProfile, DoctorProfile.user_id == Appointment.doctor_id)
+        .order_by(Appointment.start_time, Appointment.id)
+    )
+    if "start" in filters:
+        query = query.where(Appointment.start_time >= filters["start"])
+    if "end" in filters:
+        query = query.where(Appointment.start_time < filters["end"])
+    if "doctor_id" in filters:
+        query = query.where(Appointment.doctor_id == filters["doctor_id"])
+    if "status" in filters:
+        query = query.where(Appointment.status == filters["status"])
+    return query
+
+
+def _values(row):
+    return [value.isoformat() if isinstance(value, datetime) else value for value in row]
+
+
+def _csv_cell(value):
+    """Prefix text that a spreadsheet would take for a formula with a quote (CSV injection)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_cell(value) for value in _values(row)] for row in rows)
+    return buffer.getvalue()
+
+
+def _ndjson_lines(rows):
+    dumps = current_app.json.dumps
+    return "".join(dumps(dict(zip(COLUMNS, _values(row)))) + "\n" for row in rows)
+
+
+def export_rows(fmt, filters, batch_size=1000):
+    """Yield the export as text chunks, one chunk per batch_size rows.
+
+    The query runs on a server-side cursor (yield_per), so only one batch of
+    rows is held in memory however many appointments match; the CSV header
+    goes out before the query runs.
+    """
+    if fmt == "csv":
+        yield ",".join(COLUMNS) + "\r\n"
+    lines = _csv_lines if fmt == "csv" else _ndjson_lines
+    result = db.session.execute(export_query(filters).execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield lines(rows)
@@ -0,0 +1,22 @@
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+
+
+def role_denied(roles, message="Access denied"):
+    """A 403 response unless the current access token's role is one of roles, else None"""
+    if get_jwt().get("role") not in roles:
+        return jsonify({"message": message}), 403
+    return None
+
+
+def admin_required(f):
+    """Decorator to ensure only admin can access"""
+    @wraps(f)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        denied = role_denied(("admin",), "Admin access required")
+        if denied:
+            return denied
+        return f(*args, **kwargs)
+    return wrapper
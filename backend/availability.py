@@ -0,0 +1,216 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import select, update
+from .extensions import db
+from .models import Appointment, ScheduleVersion
+
+
+def lock_schedule(doctor_id):
+    """Increment the doctor's schedule version and return the new value, or None if it has no row yet.
+
+    Issued first in a transaction, the UPDATE holds the version row's lock
+    (Postgres) or the database write lock (SQLite) until commit, so
+    concurrent changes to the same doctor's schedule run one at a time.
+    """
+    return db.session.execute(
+        update(ScheduleVersion)
+        .where(ScheduleVersion.doctor_id == doctor_id)
+        .values(version=ScheduleVersion.version + 1)
+        .returning(ScheduleVersion.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def bump_schedule_version(doctor_id):
+    """Increment the doctor's schedule version in the current transaction and return the new value"""
+    version = lock_schedule(doctor_id)
+    if version is None:
+        db.session.add(ScheduleVersion(doctor_id=doctor_id, version=1))
+        db.session.flush()
+        return 1
+    return version
+
+
+def current_schedule_version(doctor_id):
+    return db.session.execute(
+        select(ScheduleVersion.version).where(ScheduleVersion.doctor_id == doctor_id)
+    ).scalar() or 0
+
+
+class _DoctorSchedule:
+    """Scheduled appointments of one doctor ending after `window_start`, sorted by start time"""
+
+    def __init__(self, version, window_start, intervals):
+        self.version = version
+        self.window_start = window_start
+        self.intervals = intervals  # [(start_time, end_time, appointment_id)]
+        self.max_duration = max((end - start for start, end, _ in intervals), default=timedelta(0))
+        self.checked_at = time.monotonic()
+
+    # Updates swap in a new list so lock-free readers always see a consistent one
+    def add(self, start_time, end_time, appointment_id):
+        intervals = list(self.intervals)
+        bisect.insort(intervals, (start_time, end_time, appointment_id))
+        self.max_duration = max(self.max_duration, end_time - start_time)
+        self.intervals = intervals
+
+    def remove(self, appointment_id):
+        self.intervals = [interval for interval in self.intervals if interval[2] != appointment_id]
+
+    def covers(self, start_time):
+        return start_time >= self.window_start
+
+    def overlapping(self, start_time, end_time):
+        """Intervals with start < end_time and end > start_time"""
+        intervals = self.intervals
+        position = bisect.bisect_left(intervals, (end_time,))
+        earliest_start = start_time - self.max_duration
+        for index in range(position - 1, -1, -1):
+            interval = intervals[index]
+            if interval[0] < earliest_start:
+                break
+            if interval[1] > start_time:
+                yield interval
+
+    def starts_between(self, range_start, range_end):
+        intervals = self.intervals
+        low = bisect.bisect_left(intervals, (range_start,))
+        high = bisect.bisect_left(intervals, (range_end,))
+        return [interval[0] for interval in intervals[low:high]]
+
+
+class AvailabilityIndex:
+    """In-process LRU cache of doctors' upcoming scheduled appointments.
+
+    Entries are loaded lazily, kept current by the booking routes through
+    `apply()` and re-validated against the doctor's ScheduleVersion row (at
+    most every AVAILABILITY_CACHE_VERIFY_SECONDS, or on every call with
+    verify=True) so changes made by other worker processes are picked up.
+    Lookups return None when the cache cannot answer and the caller should
+    query the database.
+    """
+
+    def __init__(self):
+        self.max_doctors = 0
+        self.verify_seconds = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_doctors = app.config["AVAILABILITY_CACHE_SIZE"]
+        self.verify_seconds = app.config["AVAILABILITY_CACHE_VERIFY_SECONDS"]
+        self.clear()
+
+    @property
+    def enabled(self):
+        return self.max_doctors > 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, doctor_id):
+        with self._lock:
+            self._entries.pop(doctor_id, None)
+
+    def _load(self, doctor_id, version):
+        window_start = datetime.combine(datetime.utcnow().date() - timedelta(days=1), datetime.min.time())
+        rows = db.session.query(Appointment.start_time, Appointment.end_time, Appointment.id).filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.status == "scheduled",
+            Appointment.end_time > window_start,
+        ).order_by(Appointment.start_time, Appointment.id)
+        return _DoctorSchedule(version, window_start, [tuple(row) for row in rows])
+
+    def _entry(self, doctor_id, verify=False):
+        with self._lock:
+            entry = self._entries.get(doctor_id)
+            if entry is not None:
+                self._entries.move_to_end(doctor_id)
+
+        if entry is not None and (verify or time.monotonic() - entry.checked_at >= self.verify_seconds):
+            if current_schedule_version(doctor_id) == entry.version:
+                entry.checked_at = time.monotonic()
+            else:
+                entry = None
+        if entry is not None:
+            return entry
+
+        # Read the version first so a concurrent change makes the entry look stale, never fresh
+        version = current_schedule_version(doctor_id)
+        entry = self._load(doctor_id, version)
+        with self._lock:
+            self._entries[doctor_id] = entry
+            self._entries.move_to_end(doctor_id)
+            while len(self._entries) > self.max_doctors:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _cached_entry(self, doctor_id):
+        """The doctor's entry if it is in memory and was checked within verify_seconds; never queries"""
+        with self._lock:
+            entry = self._entries.get(doctor_id)
+        if entry is not None and time.monotonic() - entry.checked_at < self.verify_seconds:
+            return entry
+        return None
+
+    def has_conflict(self, doctor_id, start_time, end_time, exclude_id=None, verify=False, cached_only=False):
+        """Whether a scheduled appointment overlaps the range, or None if the cache cannot tell.
+
+        Only a pre-check: with verify=True a True answer was correct as of the
+        version read, but a False one must still be confirmed under the
+        doctor's schedule lock. With cached_only=True nothing is queried or
+        loaded, and the answer may be up to AVAILABILITY_CACHE_VERIFY_SECONDS old.
+        """
+        if not self.enabled:
+            return None
+        entry = self._cached_entry(doctor_id) if cached_only else self._entry(doctor_id, verify)
+        if entry is None or not entry.covers(start_time):
+            return None
+        return any(interval[2] != exclude_id for interval in entry.overlapping(start_time, end_time))
+
+    def booked_starts(self, doctor_id, range_start, range_end, verify=False):
+        """Start times of scheduled appointments with range_start <= start_time < range_end"""
+        if not self.enabled:
+            return None
+        entry = self._entry(doctor_id, verify)
+        if not entry.covers(range_start):
+            return None
+        return entry.starts_between(range_start, range_end)
+
+    def apply(self, doctor_id, version, appointment):
+        """Write-through after a committed change to one of the doctor's appointments.
+
+        `version` is the value returned by bump_schedule_version() for that
+        change; if the cached entry missed an intermediate version it is dropped.
+        `appointment` only needs id, status, start_time and end_time; pass a
+        snapshot taken before commit to avoid reloading the expired instance.
+        """
+        with self._lock:
+            entry = self._entries.get(doctor_id)
+            if entry is None:
+                return
+            if entry.version != version - 1:
+                del self._entries[doctor_id]
+                return
+            entry.remove(appointment.id)
+            if appointment.status == "scheduled" and appointment.end_time > entry.window_start:
+                entry.add(appointment.start_time, appointment.end_time, appointment.id)
+            entry.version = version
+
+
+def schedule_snapshot(appointment):
+    """The fields AvailabilityIndex.apply() needs, copied while the instance is still loaded"""
+    return SimpleNamespace(
+        id=appointment.id,
+        status=appointment.status,
+        start_time=appointment.start_time,
+        end_time=appointment.end_time,
+    )
+
+
+availability_index = AvailabilityIndex()
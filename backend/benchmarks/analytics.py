@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the analytics rollups.
+Times the dashboard numbers computed the old way (COUNT(*) over users and
+appointments) against the rollup table, times per-day and per-doctor
+series over a range, then books, cancels and completes appointments through
+the API and checks that the rollups still match the appointments table.
+
+Usage:
+    python -m backend.benchmarks.analytics
+    or
+    python -m backend.benchmarks.analytics --appointments 1000000 --range-days 365
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import func
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import User, Appointment, AppointmentRollup
+from backend import analytics
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+
+def count_summary():
+    """The admin analytics before rollups: four COUNT(*) queries"""
+    return {
+        "total_doctors": User.query.filter_by(role="doctor").count(),
+        "total_patients": User.query.filter_by(role="patient").count(),
+        "total_appointments": Appointment.query.count(),
+        "upcoming_appointments": Appointment.query.filter(
+            Appointment.start_time >= datetime.utcnow(),
+            Appointment.status == "scheduled",
+        ).count(),
+    }
+
+
+def count_per_day(start, end):
+    """Per-day totals with GROUP BY over appointments, for comparison"""
+    day = func.date(Appointment.start_time)
+    return db.session.query(day, func.count()).filter(
+        Appointment.start_time >= datetime.combine(start, datetime.min.time()),
+        Appointment.start_time < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    ).group_by(day).all()
+
+
+def per_call_ms(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        result = fn()
+    return round((time.perf_counter() - started) / calls * 1000, 3), result
+
+
+def churn(app, doctor_ids, patient_ids, operations, rng):
+    """Book, cancel and complete appointments through the API"""
+    client = app.test_client()
+    with app.app_context():
+        patient_headers = {patient_id: auth_headers(patient_id, "patient") for patient_id in patient_ids[:50]}
+        doctor_headers = {doctor_id: auth_headers(doctor_id, "doctor") for doctor_id in doctor_ids}
+    first_day = datetime.combine(datetime.utcnow().date() + timedelta(days=400), datetime.min.time())
+
+    booked = []
+    for n in range(operations):
+        patient_id = rng.choice(list(patient_headers))
+        doctor_id = rng.choice(doctor_ids)
+        start_time = first_day + timedelta(days=n // 8, hours=9 + n % 8)
+        response = client.post("/api/appointments/book", headers=patient_headers[patient_id], json={
+            "doctor_id": doctor_id,
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(minutes=30)).isoformat(),
+        })
+        if response.status_code == 201:
+            booked.append((response.get_json()["appointment"]["id"], patient_id, doctor_id))
+
+    for appointment_id, patient_id, doctor_id in rng.sample(booked, len(booked) // 3):
+        if rng.random() < 0.5:
+            client.post(f"/api/appointments/{appointment_id}/cancel", headers=patient_headers[patient_id])
+        else:
+            status = rng.choice(["completed", "cancelled", "scheduled"])
+            client.put(f"/api/appointments/{appointment_id}/status", headers=doctor_headers[doctor_id], json={"status": status})
+    return len(booked)
+
+
+def run(args):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("analytics_"),
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+    })
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        doctor_ids, patient_ids, first_day, days = seed(args.doctors, 2000, args.appointments, rng)
+        seed_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rollup_rows = analytics.rebuild_rollups()
+        rebuild_seconds = time.perf_counter() - started
+
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=args.range_days - 1)
+        count_ms, old_summary = per_call_ms(count_summary, args.calls)
+        rollup_ms, new_summary = per_call_ms(analytics.summary, args.calls)
+        group_by_ms, _ = per_call_ms(lambda: count_per_day(start, end), args.calls)
+        per_day_ms, _ = per_call_ms(lambda: analytics.appointments_per_day(start, end), args.calls)
+        per_doctor_ms, _ = per_call_ms(lambda: analytics.doctor_stats(start, end), args.calls)
+
+    bookings = churn(app, doctor_ids, patient_ids, args.operations, rng)
+    with app.app_context():
+        drift = analytics.rollup_drift()
+
+    results = {
+        "appointments": args.appointments,
+        "doctors": args.doctors,
+        "seed_seconds": round(seed_seconds, 2),
+        "rebuild": {"seconds": round(rebuild_seconds, 2), "rollup_rows": rollup_rows},
+        "summary": {
+            "count_queries_ms": count_ms,
+            "rollups_ms": rollup_ms,
+            "same_numbers": old_summary == new_summary,
+        },
+        f"last_{args.range_days}_days": {
+            "group_by_appointments_ms": group_by_ms,
+            "appointments_per_day_ms": per_day_ms,
+            "doctor_stats_ms": per_doctor_ms,
+        },
+        "api_churn": {"bookings": bookings, "drifted_rollup_rows": len(drift)},
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+    return 0 if results["summary"]["same_numbers"] and not drift else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare COUNT(*) analytics with the rollup table and check rollup upkeep")
+    parser.add_argument("--appointments", type=int, default=200000, help="Number of appointments to seed (default: 200000)")
+    parser.add_argument("--doctors", type=int, default=200, help="Number of doctors (default: 200)")
+    parser.add_argument("--range-days", type=int, default=90, help="Days covered by the series queries (default: 90)")
+    parser.add_argument("--calls", type=int, default=20, help="Calls per measurement (default: 20)")
+    parser.add_argument("--operations", type=int, default=300, help="Bookings made through the API for the upkeep check (default: 300)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming appointment export.
+Seeds a large appointments table and compares three ways to get all of it
+out: the old all-in-memory listing (query everything, serialize, jsonify),
+scraping the paginated admin listing, and the streaming CSV / NDJSON
+export. Reports total time, time to the first byte and peak Python memory
+for each. Checks that the export contains every appointment exactly once,
+that the filters match the database and that text a spreadsheet would run
+as a formula is quoted in the CSV. Exits non-zero otherwise.
+
+Usage:
+    python -m backend.benchmarks.appointment_export
+    or
+    python -m backend.benchmarks.appointment_export --appointments 1000000
+"""
+
+import sys
+import os
+import csv
+import io
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from flask import jsonify
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Appointment
+from backend.serializers import serialize_appointments
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+
+def measure(fn, memory):
+    """(seconds, first byte seconds, peak MB or None, result) of fn(on_first_byte)"""
+    first = []
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(lambda: first or first.append(time.perf_counter() - started))
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    return round(elapsed, 2), round(first[0] if first else elapsed, 3), peak, result
+
+
+def run(args):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("appointment_export_"),
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "AVAILABILITY_CACHE_SIZE": 0,
+    })
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        doctor_ids, _, _, _ = seed(args.doctors, args.patients, args.appointments, random.Random(args.seed))
+        db.session.commit()
+        total = Appointment.query.count()
+        headers = auth_headers(0, "admin")
+
+    def in_memory(first_byte):
+        # The admin listing before pagination: every row loaded and serialized, then one JSON body
+        with app.test_request_context():
+            body = jsonify(serialize_appointments(Appointment.query.all())).get_data()
+        first_byte()
+        return len(body)
+
+    def paged(first_byte):
+        count, cursor = 0, None
+        while True:
+            url = "/api/admin/appointments?limit=500" + (f"&cursor={cursor}" if cursor else "")
+            page = client.get(url, headers=headers).get_json()
+            first_byte()
+            count += len(page["appointments"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return count
+
+    def streamed(fmt, query="", keep=False):
+        """Read the export; only with keep=True is the body kept (to check its ids)"""
+        def export(first_byte):
+            response = client.get(f"/api/admin/appointments/export?format={fmt}{query}", headers=headers, buffered=False)
+            chunks = []
+            size = 0
+            for chunk in response.response:
+                first_byte()
+                size += len(chunk)
+                if keep:
+                    chunks.append(chunk if isinstance(chunk, str) else chunk.decode())
+            response.close()
+            if not keep:
+                return size
+            text = "".join(chunks)
+            if fmt == "csv":
+                return [int(row["id"]) for row in csv.DictReader(io.StringIO(text))]
+            return [json.loads(line)["id"] for line in text.splitlines()]
+        return export
+
+    results = {"appointments": total}
+    for name, fn in (
+        ("in_memory_listing", in_memory),
+        ("paginated_listing", paged),
+        ("stream_csv", streamed("csv")),
+        ("stream_ndjson", streamed("ndjson")),
+    ):
+        seconds, first_byte, _, _ = measure(fn, memory=False)
+        peak_mb = measure(fn, memory=True)[2]
+        results[name] = {"seconds": seconds, "first_byte_seconds": first_byte, "peak_python_mb": peak_mb}
+    for fmt in ("csv", "ndjson"):
+        ids = measure(streamed(fmt, keep=True), memory=False)[3]
+        results[f"stream_{fmt}"].update({"rows": len(ids), "distinct_ids": len(set(ids))})
+
+    # Filters must agree with the database
+    doctor_id = doctor_ids[0]
+    with app.app_context():
+        first_day = db.session.query(db.func.min(Appointment.start_time)).scalar().date()
+        expected = Appointment.query.filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.status == "completed",
+            Appointment.start_time >= first_day,
+        ).count()
+    ids = measure(streamed("ndjson", f"&doctor_id={doctor_id}&status=completed&start={first_day}", keep=True), memory=False)[3]
+    results["filtered"] = {"expected": expected, "exported": len(ids)}
+
+    # Formula-like text comes out quoted in the CSV and unchanged in NDJSON
+    reasons = ["=HYPERLINK(\"http://example.com\")", "+1", "-1", "@SUM(A1)", "\tx", "plain"]
+    with app.app_context():
+        rows = Appointment.query.order_by(Appointment.id).limit(len(reasons)).all()
+        for appointment, reason in zip(rows, reasons):
+            appointment.reason = reason
+        db.session.commit()
+        injected = [appointment.id for appointment in rows]
+
+    def exported(fmt):
+        return client.get(f"/api/admin/appointments/export?format={fmt}", headers=headers).get_data(as_text=True)
+
+    csv_reasons = {int(row["id"]): row["reason"] for row in csv.DictReader(io.StringIO(exported("csv")))}
+    ndjson_reasons = {row["id"]: row["reason"] for row in map(json.loads, exported("ndjson").splitlines())}
+    results["formula_cells_quoted"] = (
+        [csv_reasons[i] for i in injected] == ["'" + r for r in reasons[:-1]] + [reasons[-1]]
+        and [ndjson_reasons[i] for i in injected] == reasons
+    )
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = all(
+        results[name]["rows"] == total and results[name]["distinct_ids"] == total
+        for name in ("stream_csv", "stream_ndjson")
+    ) and results["filtered"]["expected"] == results["filtered"]["exported"] and results["formula_cells_quoted"]
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare in-memory, paginated and streaming appointment exports")
+    parser.add_argument("--appointments", type=int, default=100000, help="Number of appointments (default: 100000)")
+    parser.add_argument("--doctors", type=int, default=200, help="Number of doctors (default: 200)")
+    parser.add_argument("--patients", type=int, default=5000, help="Number of patients (default: 5000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
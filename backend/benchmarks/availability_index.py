@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the in-process availability index.
+Times doctor conflict checks and day slot lookups straight from the
+database, from the index with a schedule-version check, and from the index
+alone, and checks that all three agree.
+
+Usage:
+    python -m backend.benchmarks.availability_index
+    or
+    python -m backend.benchmarks.availability_index --appointments 500000 --lookups 5000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Appointment
+from backend.availability import availability_index
+from backend.benchmarks.common import temp_database_url, seed
+
+
+def db_conflict(doctor_id, start_time, end_time):
+    return Appointment.query.filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.start_time < end_time,
+        Appointment.end_time > start_time,
+        Appointment.status == "scheduled",
+    ).first() is not None
+
+
+def db_booked_starts(doctor_id, range_start, range_end):
+    return sorted(start_time for (start_time,) in db.session.query(Appointment.start_time).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.start_time >= range_start,
+        Appointment.start_time < range_end,
+        Appointment.status == "scheduled",
+    ))
+
+
+def per_call_us(fn, probes):
+    started = time.perf_counter()
+    answers = [fn(*probe) for probe in probes]
+    return round((time.perf_counter() - started) / len(probes) * 1e6, 2), answers
+
+
+def run(args):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("availability_index_"),
+        "OUTBOX_WORKERS": 0,
+        "AVAILABILITY_CACHE_SIZE": args.doctors,
+        "AVAILABILITY_CACHE_VERIFY_SECONDS": 3600,
+    })
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db.create_all()
+        doctor_ids, _, first_day, days = seed(args.doctors, 1000, args.appointments, rng)
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+        conflict_probes, slot_probes = [], []
+        for _ in range(args.lookups):
+            doctor_id = rng.choice(doctor_ids)
+            start_time = today + timedelta(days=rng.randrange(days // 2), hours=rng.randrange(9, 17))
+            conflict_probes.append((doctor_id, start_time, start_time + timedelta(minutes=30)))
+            day = start_time.replace(hour=0)
+            slot_probes.append((doctor_id, day, day + timedelta(days=1)))
+
+        # Warm the index so the timings below measure lookups, not loading
+        for doctor_id in doctor_ids:
+            availability_index.booked_starts(doctor_id, today, today)
+
+        results = {"appointments": args.appointments, "doctors": args.doctors, "lookups": args.lookups}
+        for name, probes, from_db, from_index in (
+            ("is_conflict", conflict_probes, db_conflict, availability_index.has_conflict),
+            ("booked_starts", slot_probes, db_booked_starts, availability_index.booked_starts),
+        ):
+            db_us, expected = per_call_us(from_db, probes)
+            verified_us, verified = per_call_us(lambda *probe: from_index(*probe, verify=True), probes)
+            cached_us, cached = per_call_us(from_index, probes)
+            results[name] = {
+                "database_us": db_us,
+                "index_with_version_check_us": verified_us,
+                "index_only_us": cached_us,
+                "answers_match": expected == verified == cached,
+            }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+    return 0 if all(results[name]["answers_match"] for name in ("is_conflict", "booked_starts")) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare availability lookups from the database and the in-process index")
+    parser.add_argument("--appointments", type=int, default=100000, help="Number of appointments to seed (default: 100000)")
+    parser.add_argument("--doctors", type=int, default=200, help="Number of doctors (default: 200)")
+    parser.add_argument("--lookups", type=int, default=2000, help="Lookups per measurement (default: 2000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
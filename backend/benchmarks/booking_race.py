@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the booking endpoint.
+Releases hundreds of threads at once, all booking the same doctor slot as
+different patients, and checks that exactly one booking succeeds and the
+rest get 409. A second round books distinct slots in parallel and reports
+throughput.
+
+Usage:
+    python -m backend.benchmarks.booking_race
+    or
+    python -m backend.benchmarks.booking_race --clients 500 --bookings 2000 --threads 32
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Appointment
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+
+def booking(doctor_id, start_time):
+    return {
+        "doctor_id": doctor_id,
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(hours=1)).isoformat(),
+        "reason": "benchmark",
+    }
+
+
+def same_slot_race(app, doctor_id, patient_headers, start_time):
+    """All clients book `start_time` at the same moment; returns status code counts"""
+    barrier = threading.Barrier(len(patient_headers))
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def attempt(headers):
+        client = app.test_client()
+        barrier.wait()
+        status = client.post("/api/appointments/book", headers=headers, json=booking(doctor_id, start_time)).status_code
+        with lock:
+            statuses[status] += 1
+
+    threads = [threading.Thread(target=attempt, args=(headers,)) for headers in patient_headers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, time.perf_counter() - started
+
+
+def distinct_slot_throughput(app, requests, threads):
+    """Book (headers, payload) pairs from a thread pool; returns status code counts"""
+    local = threading.local()
+
+    def attempt(request):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        headers, payload = request
+        return local.client.post("/api/appointments/book", headers=headers, json=payload).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = Counter(pool.map(attempt, requests))
+    return statuses, time.perf_counter() - started
+
+
+def run(args):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("booking_race_"),
+        "OUTBOX_WORKERS": 0,
+    })
+    rng = random.Random(args.seed)
+    patients = max(args.clients, args.bookings)
+
+    with app.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, _, _ = seed(args.doctors, patients, 0, rng)
+        patient_headers = [auth_headers(patient_id, "patient") for patient_id in patient_ids]
+
+    first_day = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time())
+    contested = first_day + timedelta(hours=10)
+    race_statuses, race_seconds = same_slot_race(app, doctor_ids[0], patient_headers[:args.clients], contested)
+
+    with app.app_context():
+        booked = Appointment.query.filter_by(doctor_id=doctor_ids[0], start_time=contested, status="scheduled").count()
+
+    # Every patient books one free slot with a random doctor, none of them collide
+    free_slots = [
+        (doctor_id, first_day + timedelta(days=day, hours=hour))
+        for doctor_id in doctor_ids
+        for day in range(1, args.bookings // (8 * len(doctor_ids)) + 2)
+        for hour in range(9, 17)
+    ]
+    rng.shuffle(free_slots)
+    requests = [
+        (headers, booking(doctor_id, start_time))
+        for headers, (doctor_id, start_time) in zip(patient_headers, free_slots[:args.bookings])
+    ]
+    throughput_statuses, throughput_seconds = distinct_slot_throughput(app, requests, args.threads)
+
+    results = {
+        "same_slot": {
+            "clients": args.clients,
+            "statuses": dict(race_statuses),
+            "appointments_in_slot": booked,
+            "seconds": round(race_seconds, 3),
+            "passed": race_statuses[201] == 1 and race_statuses[409] == args.clients - 1 and booked == 1,
+        },
+        "distinct_slots": {
+            "bookings": len(requests),
+            "threads": args.threads,
+            "doctors": args.doctors,
+            "statuses": dict(throughput_statuses),
+            "seconds": round(throughput_seconds, 3),
+            "bookings_per_second": round(throughput_statuses[201] / throughput_seconds, 1),
+        },
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = results["same_slot"]["passed"] and throughput_statuses[201] == len(requests)
+    print("✅ Exactly one booking won the slot" if passed else "❌ Concurrent bookings were not serialized")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race parallel bookings against one slot and measure booking throughput")
+    parser.add_argument("--clients", type=int, default=200, help="Parallel bookings for the same slot (default: 200)")
+    parser.add_argument("--bookings", type=int, default=1000, help="Bookings of distinct slots for the throughput run (default: 1000)")
+    parser.add_argument("--threads", type=int, default=16, help="Threads for the throughput run (default: 16)")
+    parser.add_argument("--doctors", type=int, default=20, help="Number of doctors (default: 20)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+Shared helpers for the benchmark scripts: throwaway databases, plus the
+seeding, SQL statement capture and auth headers of backend/testing.py.
+"""
+
+import os
+import tempfile
+
+from backend.testing import auth_headers, seed, capture_statements
+
+
+def temp_database_url(prefix):
+    """URL of a fresh temporary SQLite file"""
+    handle, path = tempfile.mkstemp(prefix=prefix, suffix=".db")
+    os.close(handle)
+    return f"sqlite:///{path}"
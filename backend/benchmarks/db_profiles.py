@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write benchmark for the SQLite connection profiles.
+For each profile (SQLite's defaults, WAL, WAL + synchronous=NORMAL, and
+WAL + NORMAL + mmap, which is the shipped configuration) a fresh database
+is seeded, then reader threads fetch available slots and "my appointments"
+while writer threads book distinct slots, for a fixed time. Reports reads
+and bookings per second, latency percentiles and failed requests per
+profile, and checks that the pragmas really took effect. Exits non-zero
+if any request failed or a profile was not applied.
+
+Usage:
+    python -m backend.benchmarks.db_profiles
+    or
+    python -m backend.benchmarks.db_profiles --seconds 10 --readers 16 --writers 4
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import text
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+PROFILES = {
+    "sqlite_defaults": {"SQLITE_JOURNAL_MODE": "", "SQLITE_SYNCHRONOUS": "", "SQLITE_MMAP_SIZE": 0},
+    "wal": {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "", "SQLITE_MMAP_SIZE": 0},
+    "wal_normal": {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "NORMAL", "SQLITE_MMAP_SIZE": 0},
+    "wal_normal_mmap": {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "NORMAL", "SQLITE_MMAP_SIZE": 256 * 2 ** 20},
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 2)
+
+
+def run_profile(args, name, overrides):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url(f"db_profiles_{name}_"),
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        **overrides,
+    })
+    with app.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, first_day, days = seed(
+            args.doctors, args.patients, args.appointments, random.Random(args.seed)
+        )
+        db.session.commit()
+        pragmas = {
+            pragma: db.session.execute(text(f"PRAGMA {pragma}")).scalar()
+            for pragma in ("journal_mode", "synchronous", "mmap_size", "busy_timeout")
+        }
+        db.session.rollback()
+        patient_headers = [auth_headers(patient_id, "patient") for patient_id in patient_ids]
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    reads, writes = [], []
+    statuses = Counter()
+
+    def reader(seed_value):
+        rng = random.Random(seed_value)
+        client = app.test_client()
+        while not stop.is_set():
+            if rng.random() < 0.5:
+                day = first_day + timedelta(days=rng.randrange(days))
+                url = f"/api/appointments/available-slots?doctor_id={rng.choice(doctor_ids)}&date={day:%Y-%m-%d}"
+            else:
+                url = "/api/appointments/my"
+            headers = rng.choice(patient_headers)
+            started = time.perf_counter()
+            status = client.get(url, headers=headers).status_code
+            elapsed = time.perf_counter() - started
+            with lock:
+                reads.append(elapsed)
+                statuses[f"read_{status}"] += 1
+
+    def writer(index):
+        # Each writer has its own doctor and walks forward through its free slots
+        client = app.test_client()
+        doctor_id = doctor_ids[index % len(doctor_ids)]
+        day = datetime.combine(datetime.utcnow().date() + timedelta(days=days + 30 * (index + 1)), datetime.min.time())
+        slot = 0
+        while not stop.is_set():
+            start_time = day + timedelta(days=slot // 8, hours=9 + slot % 8)
+            slot += 1
+            payload = {
+                "doctor_id": doctor_id,
+                "start_time": start_time.isoformat(),
+                "end_time": (start_time + timedelta(hours=1)).isoformat(),
+                "reason": "benchmark",
+            }
+            headers = patient_headers[(index * 7919 + slot) % len(patient_headers)]
+            started = time.perf_counter()
+            status = client.post("/api/appointments/book", headers=headers, json=payload).status_code
+            elapsed = time.perf_counter() - started
+            with lock:
+                writes.append(elapsed)
+                statuses[f"write_{status}"] += 1
+
+    threads = [threading.Thread(target=reader, args=(args.seed + n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+    # 201 = booked; 409 is a patient who already has an appointment at that hour, still a clean answer
+    failed = sum(count for status, count in statuses.items() if status not in ("read_200", "write_201", "write_409"))
+    return {
+        "pragmas": pragmas,
+        "reads_per_second": round(len(reads) / args.seconds, 1),
+        "read_p50_ms": percentile(reads, 0.5),
+        "read_p99_ms": percentile(reads, 0.99),
+        "bookings_per_second": round(statuses["write_201"] / args.seconds, 1),
+        "write_p50_ms": percentile(writes, 0.5),
+        "write_p99_ms": percentile(writes, 0.99),
+        "statuses": dict(statuses),
+        "failed_requests": failed,
+    }
+
+
+def applied(profile, pragmas):
+    """Whether the connection reports the settings the profile asked for"""
+    journal_mode = profile["SQLITE_JOURNAL_MODE"] or "delete"
+    synchronous = {"": 2, "NORMAL": 1}[profile["SQLITE_SYNCHRONOUS"]]
+    return (
+        pragmas["journal_mode"].lower() == journal_mode.lower()
+        and pragmas["synchronous"] == synchronous
+        and pragmas["mmap_size"] == profile["SQLITE_MMAP_SIZE"]
+    )
+
+
+def run(args):
+    names = args.profiles or list(PROFILES)
+    results = {
+        "seconds_per_profile": args.seconds,
+        "readers": args.readers,
+        "writers": args.writers,
+        "appointments": args.appointments,
+    }
+    for name in names:
+        print(f"📊 Running profile {name}...", file=sys.stderr)
+        results[name] = run_profile(args, name, PROFILES[name])
+        results[name]["applied"] = applied(PROFILES[name], results[name]["pragmas"])
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = all(results[name]["applied"] and not results[name]["failed_requests"] for name in names)
+    print("✅ All profiles applied, no failed requests" if passed else "❌ A profile was not applied or requests failed")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite connection profiles under concurrent reads and bookings")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, help="Profiles to run (default: all)")
+    parser.add_argument("--seconds", type=float, default=5, help="Load duration per profile (default: 5)")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads (default: 8)")
+    parser.add_argument("--writers", type=int, default=4, help="Booking threads (default: 4)")
+    parser.add_argument("--appointments", type=int, default=50000, help="Seeded appointments (default: 50000)")
+    parser.add_argument("--doctors", type=int, default=50, help="Number of doctors (default: 50)")
+    parser.add_argument("--patients", type=int, default=2000, help="Number of patients (default: 2000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
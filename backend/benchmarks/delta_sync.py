@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Benchmark and correctness check for delta sync (`?since=`) on the
+appointment listings. Seeds --appointments appointments, then books,
+cancels and completes appointments through the API between polls and fails
+unless:
+
+- a quiet poll returns nothing and keeps its cursor,
+- each poll returns exactly the appointments changed since the last one,
+  once each, with their new values and an advancing cursor,
+- a patient never sees another patient's changes, while the admin sees all,
+- long change lists page with `has_more`,
+- a missing change number (a transaction still open, or rolled back) holds
+  polls back until CHANGES_SETTLE_SECONDS have passed, then is skipped,
+- bookings from concurrent threads all reach a poller running alongside
+  them, exactly once,
+- the `since` queries are answered from an index rather than a table scan,
+- bad cursors are rejected.
+
+Reports bytes and time of re-fetching a patient's whole listing versus one
+delta poll after a single change.
+
+Usage:
+    python -m backend.benchmarks.delta_sync
+    or
+    python -m backend.benchmarks.delta_sync --appointments 200000 --patients 500
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+import threading
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from sqlalchemy import func, select
+
+from backend.extensions import db
+from backend.models import AppointmentChange
+from backend.benchmarks.common import temp_database_url, auth_headers, seed, capture_statements
+from backend.benchmarks.query_plans import explain, full_scans
+
+
+class Booker:
+    """Books one-hour slots far in the future, each on a fresh slot"""
+
+    def __init__(self, client, doctor_ids):
+        self.client = client
+        self.doctor_ids = doctor_ids
+        self.first_day = datetime.combine(datetime.utcnow().date() + timedelta(days=400), datetime.min.time())
+        self.slot = 0
+        self.lock = threading.Lock()
+
+    def book(self, headers, client=None):
+        with self.lock:
+            n = self.slot
+            self.slot += 1
+        start_time = self.first_day + timedelta(days=n // 8, hours=9 + n % 8)
+        response = (client or self.client).post("/api/appointments/book", headers=headers, json={
+            "doctor_id": self.doctor_ids[n % len(self.doctor_ids)],
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(minutes=30)).isoformat(),
+        })
+        return response.get_json()["appointment"]["id"] if response.status_code == 201 else None
+
+
+def poll(client, headers, since, path="/api/appointments/my", limit=None):
+    """Every change after since: (appointments, next_since, requests made)"""
+    appointments = []
+    requests = 0
+    while True:
+        url = f"{path}?since={since}" + (f"&limit={limit}" if limit else "")
+        data = client.get(url, headers=headers).get_json()
+        requests += 1
+        appointments.extend(data["appointments"])
+        since = data["next_since"]
+        if not data["has_more"]:
+            return appointments, since, requests
+
+
+def full_listing(client, headers, path="/api/appointments/my"):
+    """Walk every page of a listing: (appointments, bytes, requests)"""
+    appointments, size, requests, cursor = [], 0, 0, None
+    while True:
+        response = client.get(path + (f"?cursor={cursor}" if cursor else ""), headers=headers)
+        data = response.get_json()
+        size += len(response.get_data())
+        requests += 1
+        appointments.extend(data["appointments"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return appointments, size, requests
+
+
+def median_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3), result
+
+
+def ids(appointments):
+    return [a["id"] for a in appointments]
+
+
+SETTLE_SECONDS = 0.5
+
+
+def run(args):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("delta_sync_"),
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "CHANGES_SETTLE_SECONDS": SETTLE_SECONDS,
+    })
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, _, _ = seed(args.doctors, args.patients, args.appointments, rng)
+        db.session.commit()
+        patient, other = patient_ids[0], patient_ids[1]
+        headers = {
+            "patient": auth_headers(patient, "patient"),
+            "other": auth_headers(other, "patient"),
+            "doctor": {doctor_id: auth_headers(doctor_id, "doctor") for doctor_id in doctor_ids},
+            "admin": auth_headers(0, "admin"),
+        }
+
+    client = app.test_client()
+    booker = Booker(client, doctor_ids)
+    checks = {}
+    results = {"appointments": args.appointments}
+
+    first = client.get("/api/appointments/my", headers=headers["patient"]).get_json()
+    admin_since = client.get("/api/admin/appointments", headers=headers["admin"]).get_json()["next_since"]
+    since = first["next_since"]
+
+    changes, next_since, _ = poll(client, headers["patient"], since)
+    checks["quiet_poll_empty"] = changes == [] and next_since == since
+
+    # Bookings show up once each, in booking order
+    booked = [booker.book(headers["patient"]) for _ in range(3)]
+    other_booking = booker.book(headers["other"])
+    changes, next_since, _ = poll(client, headers["patient"], since)
+    checks["bookings_returned"] = None not in booked and ids(changes) == booked
+    checks["cursor_advances"] = next_since != since
+    since = next_since
+
+    # Cancellation by the patient and status change by the doctor
+    cancelled, completed = booked[0], booked[1]
+    client.post(f"/api/appointments/{cancelled}/cancel", headers=headers["patient"])
+    doctor_id = next(a["doctor"]["id"] for a in changes if a["id"] == completed)
+    client.put(f"/api/appointments/{completed}/status", headers=headers["doctor"][doctor_id], json={"status": "completed"})
+    changes, since, _ = poll(client, headers["patient"], since)
+    statuses = {a["id"]: a["status"] for a in changes}
+    checks["updates_returned"] = (
+        ids(changes) == [cancelled, completed]
+        and statuses == {cancelled: "cancelled", completed: "completed"}
+    )
+    changes, next_since, _ = poll(client, headers["patient"], since)
+    checks["nothing_returned_twice"] = changes == [] and next_since == since
+
+    # A change number that is never committed holds polls back, then is given up on
+    with app.app_context():
+        db.session.add(AppointmentChange(seq=db.session.execute(select(func.max(AppointmentChange.seq))).scalar() + 2))
+        db.session.commit()
+    after_gap = booker.book(headers["patient"])
+    held, held_since, _ = poll(client, headers["patient"], since)
+    checks["gap_holds_polls_back"] = held == [] and held_since == since
+    time.sleep(SETTLE_SECONDS + 0.1)
+    changes, since, _ = poll(client, headers["patient"], since)
+    checks["gap_skipped_once_settled"] = ids(changes) == [after_gap]
+
+    # Paging through a long change list
+    burst = [booker.book(headers["patient"]) for _ in range(args.burst)]
+    changes, since, requests = poll(client, headers["patient"], since, limit=3)
+    checks["long_change_list_pages"] = ids(changes) == burst and requests > 1
+
+    # The admin listing sees every patient's changes
+    admin_changes, _, _ = poll(client, headers["admin"], admin_since, path="/api/admin/appointments")
+    checks["admin_sees_all_changes"] = set(ids(admin_changes)) == set(booked) | set(burst) | {other_booking, after_gap}
+    checks["admin_changes_unique"] = len(ids(admin_changes)) == len(set(ids(admin_changes)))
+
+    # Concurrent bookings against a poller: nothing skipped, nothing repeated
+    concurrent_booked = []
+    seen = []
+    done = threading.Event()
+
+    def booking_thread():
+        thread_client = app.test_client()
+        for _ in range(args.concurrent_bookings):
+            appointment_id = booker.book(headers["patient"], thread_client)
+            if appointment_id is not None:
+                concurrent_booked.append(appointment_id)
+
+    def poller():
+        cursor = since
+        poller_client = app.test_client()
+        while True:
+            finished = done.is_set()
+            changes, cursor, _ = poll(poller_client, headers["patient"], cursor)
+            seen.extend(ids(changes))
+            if finished:
+                return
+
+    threads = [threading.Thread(target=booking_thread) for _ in range(args.threads)]
+    poller_thread = threading.Thread(target=poller)
+    poller_thread.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    poller_thread.join()
+    results["concurrent"] = {"booked": len(concurrent_booked), "seen": len(seen)}
+    checks["concurrent_changes_seen_once"] = (
+        len(concurrent_booked) > 0 and sorted(seen) == sorted(concurrent_booked)
+    )
+
+    # Full re-fetch versus a delta poll after a single change
+    _, since, _ = poll(client, headers["patient"], since)
+    full_ms, (listing, full_bytes, full_requests) = median_ms(
+        lambda: full_listing(client, headers["patient"]), args.runs
+    )
+    booker.book(headers["patient"])
+    delta_url = f"/api/appointments/my?since={since}"
+    delta_ms, delta = median_ms(lambda: client.get(delta_url, headers=headers["patient"]), args.runs)
+    results["patient_listing"] = {
+        "rows": len(listing),
+        "full_refetch": {"ms": full_ms, "bytes": full_bytes, "requests": full_requests},
+        "delta_poll": {"ms": delta_ms, "bytes": len(delta.get_data()), "rows": len(delta.get_json()["appointments"])},
+    }
+    checks["delta_poll_one_row"] = len(delta.get_json()["appointments"]) == 1
+
+    # The since queries use an index
+    plans = {}
+    with app.app_context():
+        engine = db.engine
+        for name, path, request_headers in (
+            ("my", "/api/appointments/my", headers["patient"]),
+            ("doctor", "/api/appointments/my", headers["doctor"][doctor_ids[0]]),
+            ("admin", "/api/admin/appointments", headers["admin"]),
+        ):
+            statements = capture_statements(
+                engine, lambda: client.get(f"{path}?since={since}", headers=request_headers), table="change_seq"
+            )
+            plans[name] = [(statement, explain(engine, statement, parameters)) for statement, parameters in statements]
+    results["plans"] = {name: [plan for _, plan in entries] for name, entries in plans.items()}
+    checks["since_queries_use_index"] = all(entries for entries in plans.values()) and not any(
+        full_scans(engine.dialect.name, statement, plan)
+        for entries in plans.values() for statement, plan in entries
+    )
+
+    bad = client.get("/api/appointments/my?since=nonsense", headers=headers["patient"])
+    both = client.get(f"/api/appointments/my?since={since}&cursor={since}", headers=headers["patient"])
+    checks["bad_since_rejected"] = bad.status_code == 400 and both.status_code == 400
+    results["checks"] = checks
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = all(checks.values())
+    print("✅ Every change was delivered exactly once" if passed else "❌ Delta sync check failed")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time delta sync of appointment listings")
+    parser.add_argument("--appointments", type=int, default=50000, help="Seeded appointments (default: 50000)")
+    parser.add_argument("--doctors", type=int, default=50, help="Seeded doctors (default: 50)")
+    parser.add_argument("--patients", type=int, default=200, help="Seeded patients (default: 200)")
+    parser.add_argument("--burst", type=int, default=10, help="Bookings read back 3 per page (default: 10)")
+    parser.add_argument("--threads", type=int, default=4, help="Threads booking while a poller runs (default: 4)")
+    parser.add_argument("--concurrent-bookings", type=int, default=25, help="Bookings per thread (default: 25)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per figure, the median is reported (default: 5)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the cached doctor directory.
+Times `/api/doctors/` the way it used to work (query and serialize on every
+call), from the cached snapshot, and as a `304 Not Modified` revalidation,
+and checks that an admin change to a doctor shows up with a new ETag.
+
+Usage:
+    python -m backend.benchmarks.doctor_directory
+    or
+    python -m backend.benchmarks.doctor_directory --doctors 5000 --requests 2000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from flask import jsonify
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import User, DoctorProfile
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+
+def uncached_directory():
+    """The directory endpoint before caching: ORM query and jsonify per call"""
+    doctors = User.query.filter_by(role="doctor").join(DoctorProfile, DoctorProfile.user_id == User.id).all()
+    return jsonify([
+        {
+            "id": doc.id,
+            "name": doc.name,
+            "email": doc.email,
+            "specialty": doc.doctor_profile.specialty if doc.doctor_profile else None,
+            "rating": doc.doctor_profile.rating if doc.doctor_profile else None,
+        }
+        for doc in doctors
+    ])
+
+
+def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - started) / calls * 1e6, 1)
+
+
+def run(args):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("doctor_directory_"),
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+    })
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        doctor_ids, _, _, _ = seed(args.doctors, 1, 0, random.Random(args.seed))
+        admin_headers = auth_headers(0, "admin")
+
+    def get(headers=None):
+        return client.get("/api/doctors/", headers=headers or {})
+
+    first = get()
+    etag = first.headers["ETag"]
+    results = {"doctors": args.doctors, "requests": args.requests, "body_bytes": len(first.data)}
+
+    with app.test_request_context():
+        results["uncached_handler_us"] = per_call_us(uncached_directory, max(1, args.requests // 10))
+        results["same_body_as_uncached"] = uncached_directory().get_json() == first.get_json()
+    results["cached_200_us"] = per_call_us(get, args.requests)
+    results["revalidated_304_us"] = per_call_us(lambda: get({"If-None-Match": etag}), args.requests)
+    not_modified = get({"If-None-Match": etag})
+    results["304_status"] = not_modified.status_code
+    results["304_body_bytes"] = len(not_modified.data)
+
+    # An admin edit must invalidate the snapshot and change the ETag
+    client.put(f"/api/admin/doctors/{doctor_ids[0]}", headers=admin_headers, json={"name": "Renamed Doctor"})
+    after_edit = get({"If-None-Match": etag})
+    results["after_edit_status"] = after_edit.status_code
+    results["after_edit_sees_change"] = any(doc["name"] == "Renamed Doctor" for doc in after_edit.get_json())
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = (
+        results["same_body_as_uncached"] and results["304_status"] == 304
+        and results["after_edit_status"] == 200 and results["after_edit_sees_change"]
+    )
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the uncached, cached and 304 doctor directory responses")
+    parser.add_argument("--doctors", type=int, default=1000, help="Number of doctors (default: 1000)")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per measurement (default: 1000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bulk doctor import.
+Creates the same number of doctors once with one `POST /api/admin/doctors`
+per doctor (the old way) and once with a single NDJSON upload to
+`/api/admin/doctors/import`, counting SQL statements for both. Then
+imports a CSV file with broken rows mixed in and checks the error
+report, the created accounts (login, schedule version row, directory) and
+that nothing else was created. Exits non-zero if any check fails.
+
+bcrypt cost is the same for both paths and dominates at production cost,
+so --rounds defaults to a low work factor to make the rest visible.
+
+Usage:
+    python -m backend.benchmarks.doctor_import
+    or
+    python -m backend.benchmarks.doctor_import --doctors 5000 --rounds 10 --workers 4
+"""
+
+import sys
+import os
+import io
+import csv
+import json
+import time
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import User, ScheduleVersion
+from backend.passwords import password_hasher
+from backend.benchmarks.common import temp_database_url, auth_headers, capture_statements
+
+SPECIALTIES = ["Cardiologist", "Dermatologist", "Neurologist", "General Physician"]
+
+
+def doctor_rows(count, prefix):
+    return [
+        {
+            "name": f"{prefix.title()} Doctor {n}",
+            "email": f"{prefix}{n}@import.local",
+            "password": f"password-{n}",
+            "specialty": SPECIALTIES[n % len(SPECIALTIES)],
+            "experience_years": n % 30,
+            "rating": round(3 + (n % 20) / 10, 1),
+        }
+        for n in range(count)
+    ]
+
+
+def make_app(args):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("doctor_import_"),
+        "OUTBOX_WORKERS": 0,
+        "BCRYPT_LOG_ROUNDS": args.rounds,
+        "PASSWORD_HASH_WORKERS": args.workers,
+        "DOCTOR_IMPORT_CHUNK_SIZE": args.chunk_size,
+    })
+
+
+def timed(app, fn):
+    with app.app_context():
+        started = time.perf_counter()
+        statements = capture_statements(db.engine, fn)
+        return round(time.perf_counter() - started, 2), len(statements)
+
+
+def run(args):
+    results = {"doctors": args.doctors, "bcrypt_rounds": args.rounds, "password_hash_workers": args.workers}
+    rows = doctor_rows(args.doctors, "bulk")
+
+    # Old path: one request per doctor
+    app = make_app(args)
+    with app.app_context():
+        db.create_all()
+        headers = auth_headers(0, "admin")
+    client = app.test_client()
+    statuses = []
+    seconds, statements = timed(app, lambda: statuses.extend(
+        client.post("/api/admin/doctors", json=row, headers=headers).status_code for row in rows
+    ))
+    results["one_request_per_doctor"] = {"seconds": seconds, "sql_statements": statements, "created": statuses.count(201)}
+    password_hasher.shutdown()
+
+    # Bulk import: one NDJSON upload
+    app = make_app(args)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    body = "\n".join(json.dumps(row) for row in rows)
+    reports = []
+    seconds, statements = timed(app, lambda: reports.append(client.post(
+        "/api/admin/doctors/import", data=body, headers={**headers, "Content-Type": "application/x-ndjson"}
+    ).get_json()))
+    results["bulk_import"] = {"seconds": seconds, "sql_statements": statements, "created": reports[0]["created"]}
+
+    # CSV with broken rows: an existing email, a duplicate in the file, a missing field, a bad rating
+    extra = doctor_rows(5, "csv")
+    extra.append(dict(rows[0]))                        # line 7: already registered
+    extra.append(dict(extra[1]))                       # line 8: duplicate of line 3
+    extra.append({**extra[2], "email": "new@import.local", "specialty": ""})   # line 9: missing specialty
+    extra.append({**extra[3], "email": "new2@import.local", "rating": "high"})  # line 10: bad rating
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(extra)
+    report = client.post(
+        "/api/admin/doctors/import?format=csv", data=out.getvalue().encode(), headers=headers
+    ).get_json()
+    results["csv_with_errors"] = {
+        "rows": report["rows"],
+        "created": report["created"],
+        "error_rows": [(error["row"], error["message"]) for error in report["errors"]],
+    }
+
+    with app.app_context():
+        doctor_ids = [user.id for user in User.query.filter_by(role="doctor")]
+        versions = ScheduleVersion.query.filter(ScheduleVersion.doctor_id.in_(doctor_ids)).count()
+    login = client.post("/api/auth/login", json={"email": "csv2@import.local", "password": "password-2"})
+    directory = client.get("/api/doctors/", headers=headers).get_json()
+    results["checks"] = {
+        "doctors": len(doctor_ids),
+        "schedule_version_rows": versions,
+        "imported_doctor_can_log_in": login.status_code == 200,
+        "directory_size": len(directory),
+    }
+    password_hasher.shutdown()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    expected_errors = [7, 8, 9, 10]
+    passed = (
+        results["one_request_per_doctor"]["created"] == args.doctors
+        and results["bulk_import"]["created"] == args.doctors
+        and results["csv_with_errors"]["created"] == 5
+        and [row for row, _ in results["csv_with_errors"]["error_rows"]] == expected_errors
+        and results["checks"]["doctors"] == args.doctors + 5
+        and results["checks"]["schedule_version_rows"] == args.doctors + 5
+        and results["checks"]["imported_doctor_can_log_in"]
+        and results["checks"]["directory_size"] == args.doctors + 5
+    )
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-by-one doctor creation with the bulk import")
+    parser.add_argument("--doctors", type=int, default=1000, help="Doctors to create per run (default: 1000)")
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt work factor (default: 4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="PASSWORD_HASH_WORKERS (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="DOCTOR_IMPORT_CHUNK_SIZE (default: 500)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
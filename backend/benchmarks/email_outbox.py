@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark for booking latency with queued email delivery.
+Books appointments through the real endpoint while a local SMTP sink
+(optionally slow, or not running at all) receives the confirmations, then
+reports booking latency, how long the outbox workers took to drain and how
+many SMTP connections they opened.
+
+Usage:
+    python -m backend.benchmarks.email_outbox
+    or
+    python -m backend.benchmarks.email_outbox --smtp-delay 1.0 --bookings 200
+    python -m backend.benchmarks.email_outbox --smtp-down
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import EmailOutbox
+from backend.outbox import start_outbox_workers
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+from backend.testing import SMTPSink, mail_config, unused_port
+
+
+def run(args):
+    sink = None
+    if args.smtp_down:
+        smtp_config = mail_config("127.0.0.1", unused_port())
+    else:
+        sink = SMTPSink(delay=args.smtp_delay).start()
+        smtp_config = sink.mail_config()
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("email_outbox_"),
+        "OUTBOX_WORKERS": 0,
+        "OUTBOX_POLL_INTERVAL": 0.2,
+        "OUTBOX_RETRY_BASE": 1,
+        **smtp_config,
+    })
+
+    with app.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, _, _ = seed(args.doctors, args.bookings, 0, random.Random(args.seed))
+        patient_headers = [auth_headers(patient_id, "patient") for patient_id in patient_ids]
+
+    pool = start_outbox_workers(app, args.workers)
+
+    client = app.test_client()
+    doctor_id = doctor_ids[0]
+    first_slot = datetime.combine(datetime.utcnow().date() + timedelta(days=365), datetime.min.time())
+
+    samples = []
+    for n in range(args.bookings):
+        start_time = first_slot + timedelta(minutes=30 * n)
+        started = time.perf_counter()
+        response = client.post("/api/appointments/book", headers=patient_headers[n], json={
+            "doctor_id": doctor_id,
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(minutes=30)).isoformat(),
+            "reason": "benchmark",
+        })
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 201:
+            raise RuntimeError(f"Booking failed: {response.status_code} {response.get_json()}")
+    booked_at = time.perf_counter()
+
+    drained_after = None
+    deadline = booked_at + args.drain_timeout
+    while time.perf_counter() < deadline:
+        with app.app_context():
+            pending = EmailOutbox.query.filter_by(status="pending").count()
+        if not pending:
+            drained_after = time.perf_counter() - booked_at
+            break
+        time.sleep(0.05)
+    pool.stop(timeout=5)
+
+    with app.app_context():
+        by_status = dict(db.session.query(EmailOutbox.status, db.func.count()).group_by(EmailOutbox.status).all())
+
+    samples.sort()
+    results = {
+        "smtp": "down" if args.smtp_down else f"sink, {args.smtp_delay}s per message",
+        "bookings": args.bookings,
+        "workers": args.workers,
+        "booking_latency": {
+            "mean_ms": round(statistics.mean(samples), 3),
+            "p50_ms": round(samples[len(samples) // 2], 3),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "max_ms": round(samples[-1], 3),
+        },
+        "outbox": by_status,
+        "drain_seconds": round(drained_after, 3) if drained_after is not None else None,
+        "smtp_messages": sink.received if sink else 0,
+        "smtp_connections": sink.connections if sink else 0,
+    }
+    if sink:
+        sink.stop()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure booking latency with background email delivery")
+    parser.add_argument("--bookings", type=int, default=100, help="Appointments to book (default: 100)")
+    parser.add_argument("--doctors", type=int, default=1, help="Number of doctors (default: 1)")
+    parser.add_argument("--workers", type=int, default=2, help="Outbox worker threads (default: 2)")
+    parser.add_argument("--smtp-delay", type=float, default=0.2, help="Seconds the SMTP sink spends per message (default: 0.2)")
+    parser.add_argument("--smtp-down", action="store_true", help="Point Flask-Mail at a closed port instead of the sink")
+    parser.add_argument("--drain-timeout", type=float, default=120, help="Seconds to wait for the outbox to drain (default: 120)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
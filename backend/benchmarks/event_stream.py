@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the appointment event streams (GET /api/appointments/events).
+Serves the app over HTTP and opens --streams EventSource connections, all
+read by one selector thread, then:
+
+- keeps them idle and reports the server's threads, memory, CPU time and
+  SQL statements per open stream, alongside the statements the same
+  dashboards would run polling,
+- books, cancels and completes appointments through the API and reports
+  the delivery latency over the patient's and doctor's streams,
+- starts a second worker process with EVENTS_BACKEND=database and reports
+  how long changes committed in this process take to reach its streams.
+The behaviour itself is checked by tests/test_event_stream.py.
+
+Usage:
+    python -m backend.benchmarks.event_stream
+    or
+    python -m backend.benchmarks.event_stream --streams 2000 --idle-seconds 10
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import socket
+import logging
+import argparse
+import selectors
+import threading
+import subprocess
+import statistics
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.events import appointment_events
+from backend.benchmarks.common import temp_database_url, auth_headers, seed, capture_statements
+
+
+class Stream:
+    """One EventSource connection, parsed as bytes arrive"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.status = None
+        self.ready = False
+        self.heartbeats = 0
+        self.events = []  # (type, id, payload, monotonic receive time)
+        self.closed = False
+        self._buffer = b""
+
+    def feed(self, data, received):
+        self._buffer += data
+        if self.status is None:
+            if b"\r\n\r\n" not in self._buffer:
+                return
+            head, self._buffer = self._buffer.split(b"\r\n\r\n", 1)
+            self.status = int(head.split(b" ", 2)[1])
+        while b"\n\n" in self._buffer:
+            block, self._buffer = self._buffer.split(b"\n\n", 1)
+            fields = {}
+            for line in block.decode().split("\n"):
+                if line.startswith(":"):
+                    self.heartbeats += 1
+                elif line.startswith("retry:"):
+                    self.ready = True
+                else:
+                    name, _, value = line.partition(": ")
+                    fields[name] = value
+            if "event" in fields:
+                self.events.append((fields["event"], fields.get("id"), json.loads(fields["data"]), received))
+
+
+class StreamClients:
+    """Many raw-socket stream clients read by a single selector thread"""
+
+    def __init__(self, port):
+        self.port = port
+        self.streams = []
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def open(self, token=None, param="token"):
+        sock = socket.create_connection(("127.0.0.1", self.port))
+        path = "/api/appointments/events" + (f"?{param}={token}" if token else "")
+        sock.sendall(f"GET {path} HTTP/1.0\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode())
+        sock.setblocking(False)
+        stream = Stream(sock)
+        with self._lock:
+            self._selector.register(sock, selectors.EVENT_READ, stream)
+        self.streams.append(stream)
+        return stream
+
+    def close(self, stream):
+        with self._lock:
+            if not stream.closed:
+                self._selector.unregister(stream.sock)
+                stream.sock.close()
+                stream.closed = True
+
+    def stop(self):
+        for stream in self.streams:
+            self.close(stream)
+        self._stopping.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if not self._selector.get_map():
+                time.sleep(0.05)
+                continue
+            ready = self._selector.select(timeout=0.05)
+            received = time.monotonic()
+            for key, _ in ready:
+                stream = key.data
+                try:
+                    data = stream.sock.recv(65536)
+                except (BlockingIOError, OSError):
+                    continue
+                if data:
+                    stream.feed(data, received)
+                else:
+                    self.close(stream)
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def rss_bytes():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def token(app, user_id, role):
+    """A stream token, minted the way the dashboards get one"""
+    with app.app_context():
+        access_token = create_access_token(identity=str(user_id), additional_claims={"role": role, "name": "bench"})
+    return app.test_client().post(
+        "/api/appointments/events/token", headers={"Authorization": f"Bearer {access_token}"}
+    ).get_json()["token"]
+
+
+def serve(app):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_app(url, **settings):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": url,
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "EVENTS_HEARTBEAT_SECONDS": 1,
+        **settings,
+    })
+
+
+class Booker:
+    """Books one-hour slots far in the future through the test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.first_day = datetime.combine(datetime.utcnow().date() + timedelta(days=400), datetime.min.time())
+        self.slot = 0
+
+    def book(self, headers, doctor_id):
+        start_time = self.first_day + timedelta(days=self.slot // 8, hours=9 + self.slot % 8)
+        self.slot += 1
+        response = self.client.post("/api/appointments/book", headers=headers, json={
+            "doctor_id": doctor_id,
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(minutes=30)).isoformat(),
+        })
+        return response.get_json()["appointment"]["id"]
+
+
+def local_backend(args, url, doctor_ids, patient_ids, results):
+    app = make_app(url, EVENTS_BACKEND="local", EVENTS_MAX_STREAMS=args.streams)
+    server = serve(app)
+    clients = StreamClients(server.server_port)
+    patient, other, doctor = patient_ids[0], patient_ids[1], doctor_ids[0]
+    with app.app_context():
+        headers = {
+            "patient": auth_headers(patient, "patient"),
+            "doctor": auth_headers(doctor, "doctor"),
+        }
+
+    # Open the streams: a tenth for the patient, a tenth for the doctor, the rest for others
+    threads_before, rss_before = threading.active_count(), rss_bytes()
+    tokens = {
+        "patient": token(app, patient, "patient"),
+        "doctor": token(app, doctor, "doctor"),
+        "other": token(app, other, "patient"),
+    }
+    rng = random.Random(args.seed)
+    streams = {"patient": [], "doctor": [], "other": []}
+    for n in range(args.streams):
+        if n % 10 == 0:
+            owner = "patient"
+        elif n % 10 == 1:
+            owner = "doctor"
+        elif n % 10 == 2:
+            owner = "other"
+        else:
+            owner = None
+        if owner:
+            streams[owner].append(clients.open(tokens[owner]))
+        else:
+            user_id = rng.choice(patient_ids[2:] or patient_ids)
+            streams.setdefault("unrelated", []).append(clients.open(token(app, user_id, "patient")))
+    every_stream = [s for group in streams.values() for s in group]
+    wait_until(lambda: all(s.ready for s in every_stream), 60)
+
+    # Idle: what the open streams cost
+    statements = []
+    listener = lambda *a: statements.append(1)  # noqa: E731
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", listener)
+    cpu_before = time.process_time()
+    time.sleep(args.idle_seconds)
+    cpu_seconds = time.process_time() - cpu_before
+    event.remove(engine, "before_cursor_execute", listener)
+    threads = threading.active_count() - threads_before
+    rss = rss_bytes() - rss_before
+    with app.app_context():
+        poll_statements = len(capture_statements(engine, lambda: app.test_client().get(
+            "/api/appointments/my?since=WzBd", headers=headers["doctor"]
+        )))
+    results["idle"] = {
+        "streams": args.streams,
+        "seconds": args.idle_seconds,
+        "sql_statements": len(statements),
+        "server_threads_per_stream": round(threads / args.streams, 2),
+        "rss_kib_per_stream": round(rss / args.streams / 1024, 1),
+        "cpu_ms_per_stream_per_second": round(cpu_seconds * 1000 / args.streams / args.idle_seconds, 4),
+        "polling_instead": {
+            "sql_statements_per_poll": poll_statements,
+            "sql_statements_per_second_polling_every_30s": round(args.streams * poll_statements / 30, 1),
+        },
+    }
+
+    # Changes through the API
+    booker = Booker(app)
+    started = time.monotonic()
+    booked = booker.book(headers["patient"], doctor)
+    wait_until(lambda: all(len(s.events) >= 1 for s in streams["patient"] + streams["doctor"]), 10)
+    latencies = [(s.events[0][3] - started) * 1000 for s in streams["patient"] + streams["doctor"] if s.events]
+    second = booker.book(headers["patient"], doctor)
+    booker.client.post(f"/api/appointments/{booked}/cancel", headers=headers["patient"])
+    booker.client.put(f"/api/appointments/{second}/status", headers=headers["doctor"], json={"status": "completed"})
+    wait_until(lambda: all(len(s.events) >= 4 for s in streams["patient"] + streams["doctor"]), 10)
+    results["delivery_ms"] = {
+        "streams": len(latencies),
+        "p50": round(statistics.median(latencies), 2),
+        "max": round(max(latencies), 2),
+    }
+
+    for stream in every_stream:
+        clients.close(stream)
+    wait_until(lambda: appointment_events.streams == 0, 10)
+    clients.stop()
+    server.shutdown()
+
+
+def start_worker(url, poll_seconds):
+    """A second worker process serving the app with EVENTS_BACKEND=database; returns (process, port)"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.benchmarks.event_stream", "--serve", "--database-url", url,
+         "--poll-seconds", str(poll_seconds)],
+        cwd=parent_dir, stdout=subprocess.PIPE, text=True,
+    )
+    return process, int(process.stdout.readline())
+
+
+def database_backend(args, url, doctor_ids, patient_ids, results):
+    app = make_app(url, EVENTS_BACKEND="database", EVENTS_POLL_SECONDS=args.poll_seconds)
+    worker, port = start_worker(url, args.poll_seconds)
+    clients = StreamClients(port)
+    try:
+        patient, doctor = patient_ids[0], doctor_ids[1]
+        with app.app_context():
+            headers = {"patient": auth_headers(patient, "patient"), "doctor": auth_headers(doctor, "doctor")}
+        streams = [clients.open(token(app, patient, "patient")), clients.open(token(app, doctor, "doctor"))]
+        wait_until(lambda: all(s.ready for s in streams), 30)
+
+        booker = Booker(app)
+        started = time.monotonic()
+        booked = booker.book(headers["patient"], doctor)
+        booker.client.post(f"/api/appointments/{booked}/cancel", headers=headers["patient"])
+        wait_until(lambda: all(len(s.events) >= 2 for s in streams), 10)
+        results["other_worker_delivery_ms"] = round((max(s.events[0][3] for s in streams if s.events) - started) * 1000, 2) \
+            if all(s.events for s in streams) else None
+    finally:
+        clients.stop()
+        worker.terminate()
+        worker.wait()
+        appointment_events.backend.stop()
+
+
+def run_worker(args):
+    app = make_app(args.database_url, EVENTS_BACKEND="database", EVENTS_POLL_SECONDS=args.poll_seconds)
+    server = serve(app)
+    print(server.server_port, flush=True)
+    threading.Event().wait()
+
+
+def run(args):
+    url = temp_database_url("event_stream_")
+    setup = make_app(url)
+    with setup.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, _, _ = seed(args.doctors, args.patients, args.appointments, random.Random(args.seed))
+        db.session.commit()
+
+    results = {}
+    local_backend(args, url, doctor_ids, patient_ids, results)
+    database_backend(args, url, doctor_ids, patient_ids, results)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure appointment event streams (SSE)")
+    parser.add_argument("--streams", type=int, default=500, help="Open event streams (default: 500)")
+    parser.add_argument("--idle-seconds", type=int, default=5, help="Seconds the streams are left idle (default: 5)")
+    parser.add_argument("--poll-seconds", type=float, default=0.2, help="EVENTS_POLL_SECONDS for the database backend (default: 0.2)")
+    parser.add_argument("--doctors", type=int, default=20, help="Seeded doctors (default: 20)")
+    parser.add_argument("--patients", type=int, default=500, help="Seeded patients (default: 500)")
+    parser.add_argument("--appointments", type=int, default=5000, help="Seeded appointments (default: 5000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)  # second worker process
+    parser.add_argument("--database-url", type=str, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.serve:
+        run_worker(args)
+        return
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
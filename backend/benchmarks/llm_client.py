@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the OpenAI recommendation client.
+Serves a fake chat completions API locally and sends `/api/ai/recommend-doctor`
+requests with `use_openai` through the app, reporting latency for:
+- healthy API: the old client-per-call code against the long-lived cached
+  client, counting API calls and TCP connections
+- stalled API: requests that wait out OPENAI_TIMEOUT, then the ones the open
+  circuit breaker sends straight to the rule-based answer
+- recovery: after OPENAI_BREAKER_RESET_SECONDS one trial call closes the
+  breaker again
+The behaviour itself is checked by tests/test_llm_client.py.
+
+Usage:
+    python -m backend.benchmarks.llm_client
+    or
+    python -m backend.benchmarks.llm_client --requests 500 --latency-ms 200 --timeout 0.5
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.llm_client import llm_recommender
+from backend.symptom_matcher import symptom_matcher
+from backend.testing import FakeChatAPI
+
+SYMPTOMS = [
+    "chest pain and high bp",
+    "itchy red rash on my arms",
+    "migraine with numbness in my hand",
+    "fever and a bad cough",
+    "knee joint pain after running",
+    "heartburn and stomach ache after meals",
+    "blurry vision and dry eyes",
+    "sore throat and ringing in my ears",
+]
+
+
+def old_openai_recommendation(symptoms, api_key, base_url):
+    """The code before this change: a new client per call, default timeout and retries"""
+    try:
+        from openai import OpenAI
+        client = OpenAI(api_key=api_key, base_url=base_url)
+
+        valid_specialties = symptom_matcher.specialties
+        prompt = f"""Based on the following symptoms, recommend the most appropriate medical specialty:
+Symptoms: {symptoms}
+
+Choose from: {", ".join(valid_specialties)}
+
+Respond with only the specialty name."""
+
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=50
+        )
+
+        specialty = response.choices[0].message.content.strip()
+        if specialty in valid_specialties:
+            return specialty
+        return None
+    except Exception as e:
+        print(f"OpenAI API error: {e}")
+        return None
+
+
+def variant(text, rng):
+    """Same symptoms as typed by different patients: case, spacing, punctuation"""
+    words = text.split()
+    if rng.random() < 0.5:
+        words = [word.capitalize() for word in words]
+    return "  ".join(words) + rng.choice(["", ".", "!", " ..."])
+
+
+def summarize(samples_ms):
+    samples_ms = sorted(samples_ms)
+    return {
+        "requests": len(samples_ms),
+        "mean_ms": round(statistics.mean(samples_ms), 2),
+        "p50_ms": round(samples_ms[len(samples_ms) // 2], 2),
+        "max_ms": round(samples_ms[-1], 2),
+    }
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    api = FakeChatAPI(args.latency_ms / 1000)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "OPENAI_API_KEY": "benchmark-key",
+        "OPENAI_BASE_URL": api.base_url,
+        "OPENAI_TIMEOUT": args.timeout,
+        "OPENAI_BREAKER_FAILURES": args.breaker_failures,
+        "OPENAI_BREAKER_RESET_SECONDS": args.reset_seconds,
+    })
+    client = app.test_client()
+    texts = [variant(rng.choice(SYMPTOMS), rng) for _ in range(args.requests)]
+
+    def recommend(symptoms):
+        started = time.perf_counter()
+        response = client.post("/api/ai/recommend-doctor", json={"symptoms": symptoms, "use_openai": True})
+        return response.get_json()["method"], (time.perf_counter() - started) * 1000
+
+    results = {"requests": args.requests, "distinct_symptoms": len(SYMPTOMS), "api_latency_ms": args.latency_ms}
+
+    # Healthy API: old client per call
+    with app.app_context():
+        timings = []
+        for symptoms in texts:
+            started = time.perf_counter()
+            old_openai_recommendation(symptoms, "benchmark-key", api.base_url)
+            timings.append((time.perf_counter() - started) * 1000)
+    results["old_client_per_call"] = {**summarize(timings), "api_calls": api.calls, "connections": api.connections}
+
+    # Healthy API: long-lived client with cache, through the endpoint
+    api.reset_counters()
+    answers = [recommend(symptoms) for symptoms in texts]
+    results["cached_client"] = {
+        **summarize([ms for _, ms in answers]),
+        "api_calls": api.calls,
+        "connections": api.connections,
+        "openai_answers": sum(method == "openai" for method, _ in answers),
+    }
+
+    # Stalled API: fresh texts so the cache can't answer
+    llm_recommender.cache.clear()
+    api.set_mode("stall")
+    stalled = [recommend(f"{rng.choice(SYMPTOMS)} day {n}") for n in range(args.breaker_failures + 20)]
+    results["stalled_api"] = {
+        "timed_out": summarize([ms for _, ms in stalled[:args.breaker_failures]]),
+        "breaker_open": summarize([ms for _, ms in stalled[args.breaker_failures:]]),
+        "rule_based_answers": sum(method == "rule-based" for method, _ in stalled),
+        "breaker_state": llm_recommender.breaker.state,
+    }
+
+    # Recovery: the API is back; after the reset period one trial call closes the breaker
+    api.set_mode("ok")
+    time.sleep(args.reset_seconds)
+    recovered = [recommend(f"recovered {symptoms}") for symptoms in SYMPTOMS]
+    results["recovery"] = {
+        "openai_answers": sum(method == "openai" for method, _ in recovered),
+        "breaker_state": llm_recommender.breaker.state,
+    }
+    api.close()
+    llm_recommender.close()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the OpenAI client's connection reuse, cache, timeout and circuit breaker against a fake API")
+    parser.add_argument("--requests", type=int, default=200, help="Recommendation requests against the healthy API (default: 200)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fake API response time (default: 50)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="OPENAI_TIMEOUT for the stalled API (default: 1.0)")
+    parser.add_argument("--breaker-failures", type=int, default=3, help="OPENAI_BREAKER_FAILURES (default: 3)")
+    parser.add_argument("--reset-seconds", type=float, default=2.0, help="OPENAI_BREAKER_RESET_SECONDS (default: 2.0)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the whole API.
+Seeds a database, serves create_app() over HTTP on localhost and runs
+virtual users against it for a fixed time. Each user logs in as its own
+patient and then picks actions at random by weight (--mix): logins, slot
+lookups, my appointments, the doctor directory, bookings, cancellations
+of its own bookings, admin dashboard loads and symptom recommendations
+(rules, local model, and a local fake of the OpenAI API). Booking emails
+go to a local SMTP sink through the outbox workers, so nothing leaves
+the box.
+
+Reports throughput and mean/p50/p95/p99/max latency per route after a
+warm-up, plus the commit the run was made on. With --output the results
+are written as JSON; --compare BASELINE.json adds the change against an
+earlier run per route. Exits non-zero if any request failed (5xx,
+unexpected status or connection error).
+
+Usage:
+    python -m backend.benchmarks.load_test
+    or
+    python -m backend.benchmarks.load_test --users 32 --seconds 60 --appointments 200000 --output before.json
+    python -m backend.benchmarks.load_test --compare before.json --set SQLITE_JOURNAL_MODE=DELETE
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+import statistics
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from werkzeug.serving import make_server
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import User, EmailOutbox
+from backend.outbox import start_outbox_workers
+from backend.passwords import password_hasher
+from backend.benchmarks.common import temp_database_url, seed
+from backend.testing import SMTPSink, FakeChatAPI
+from backend.benchmarks.llm_client import SYMPTOMS
+
+PASSWORD = "load-test-password"
+ADMIN_EMAIL = "admin@bench.local"
+DEFAULT_MIX = "login=3,slots=25,my=20,directory=15,book=10,cancel=5,dashboard=5,recommend=17"
+RECOMMEND_METHODS = ("rule-based", "local", "openai")
+QUALIFIERS = ["", "since yesterday", "for a week", "getting worse", "at night", "after exercise"]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in VirtualUser.ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}, choose from: {', '.join(VirtualUser.ACTIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_setting(text):
+    """KEY=VALUE app config override; the value is parsed as JSON when it can be"""
+    key, _, value = text.partition("=")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return key, value
+
+
+class Recorder:
+    """Latencies and status codes per route, only while recording is on"""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, route, status, elapsed_ms, ok):
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies[route].append(elapsed_ms)
+            self.statuses[route][status] += 1
+            if not ok:
+                self.errors[route] += 1
+
+
+class VirtualUser:
+    """One patient session against the served app"""
+
+    ACTIONS = ("login", "slots", "my", "directory", "book", "cancel", "dashboard", "recommend")
+
+    def __init__(self, base, recorder, rng, email, doctor_ids, admin_headers):
+        self.base = base
+        self.recorder = recorder
+        self.rng = rng
+        self.email = email
+        self.doctor_ids = doctor_ids
+        self.admin_headers = admin_headers
+        self.headers = {}
+        self.booked = []
+
+    def call(self, route, method, path, data=None, headers=None, expected=(200,)):
+        body = json.dumps(data).encode() if data is not None else None
+        req = urllib.request.Request(
+            self.base + path, data=body, method=method,
+            headers={"Content-Type": "application/json", **(headers or {})},
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        except OSError:
+            status, payload = 0, b""
+        self.recorder.add(route, status, (time.perf_counter() - started) * 1000, status in expected)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+    def login(self):
+        status, data = self.call("POST /api/auth/login", "POST", "/api/auth/login",
+                                 {"email": self.email, "password": PASSWORD})
+        if status == 200:
+            self.headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+    def slots(self):
+        day = datetime.utcnow().date() + timedelta(days=self.rng.randint(0, 30))
+        self.call("GET /api/appointments/available-slots", "GET",
+                  f"/api/appointments/available-slots?doctor_id={self.rng.choice(self.doctor_ids)}&date={day}",
+                  headers=self.headers)
+
+    def my(self):
+        self.call("GET /api/appointments/my", "GET", "/api/appointments/my", headers=self.headers)
+
+    def directory(self):
+        self.call("GET /api/doctors/", "GET", "/api/doctors/", headers=self.headers, expected=(200, 304))
+
+    def book(self):
+        # Random future slots: some collide with seeded or other users' bookings (409 is a normal answer)
+        day = datetime.combine(datetime.utcnow().date() + timedelta(days=self.rng.randint(1, 90)), datetime.min.time())
+        start_time = day + timedelta(hours=self.rng.randint(9, 16))
+        status, data = self.call("POST /api/appointments/book", "POST", "/api/appointments/book", {
+            "doctor_id": self.rng.choice(self.doctor_ids),
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=1)).isoformat(),
+            "reason": "load test",
+        }, headers=self.headers, expected=(201, 409))
+        if status == 201:
+            self.booked.append(data["appointment"]["id"])
+
+    def cancel(self):
+        if not self.booked:
+            return self.book()
+        appointment_id = self.booked.pop(self.rng.randrange(len(self.booked)))
+        self.call("POST /api/appointments/<id>/cancel", "POST", f"/api/appointments/{appointment_id}/cancel",
+                  headers=self.headers)
+
+    def dashboard(self):
+        # What the admin dashboard loads on open
+        self.call("GET /api/admin/analytics", "GET", "/api/admin/analytics", headers=self.admin_headers)
+        self.call("GET /api/admin/analytics/appointments-per-day", "GET",
+                  "/api/admin/analytics/appointments-per-day", headers=self.admin_headers)
+
+    def recommend(self):
+        symptoms = f"{self.rng.choice(SYMPTOMS)} {self.rng.choice(QUALIFIERS)}".strip()
+        self.call("POST /api/ai/recommend-doctor", "POST", "/api/ai/recommend-doctor",
+                  {"symptoms": symptoms, "method": self.rng.choice(RECOMMEND_METHODS)}, headers=self.headers)
+
+    def run(self, mix, stop):
+        actions = [getattr(self, name) for name in mix]
+        weights = list(mix.values())
+        self.login()
+        while not stop.is_set():
+            self.rng.choices(actions, weights)[0]()
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summarize(recorder, seconds):
+    routes = {}
+    for route in sorted(recorder.latencies):
+        samples = sorted(recorder.latencies[route])
+        routes[route] = {
+            "requests": len(samples),
+            "requests_per_second": round(len(samples) / seconds, 1),
+            "errors": recorder.errors[route],
+            "statuses": {str(status): count for status, count in sorted(recorder.statuses[route].items())},
+            "mean_ms": round(statistics.mean(samples), 2),
+            "p50_ms": round(percentile(samples, 0.50), 2),
+            "p95_ms": round(percentile(samples, 0.95), 2),
+            "p99_ms": round(percentile(samples, 0.99), 2),
+            "max_ms": round(samples[-1], 2),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "requests": total,
+        "requests_per_second": round(total / seconds, 1),
+        "errors": sum(route["errors"] for route in routes.values()),
+    }, routes
+
+
+def change(new, old):
+    return round((new - old) / old * 100, 1) if old else None
+
+
+def compare(results, baseline):
+    """Percent change per route against an earlier results file (negative latency change = faster)"""
+    comparison = {"baseline_commit": baseline.get("meta", {}).get("commit"), "routes": {}}
+    for route, stats in results["routes"].items():
+        old = baseline.get("routes", {}).get(route)
+        if old:
+            comparison["routes"][route] = {
+                "requests_per_second_change_pct": change(stats["requests_per_second"], old["requests_per_second"]),
+                "p50_ms_change_pct": change(stats["p50_ms"], old["p50_ms"]),
+                "p95_ms_change_pct": change(stats["p95_ms"], old["p95_ms"]),
+                "p99_ms_change_pct": change(stats["p99_ms"], old["p99_ms"]),
+            }
+    comparison["requests_per_second_change_pct"] = change(
+        results["totals"]["requests_per_second"], baseline["totals"]["requests_per_second"]
+    )
+    return comparison
+
+
+def git_commit():
+    """(commit, uncommitted changes?) of the checkout, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=parent_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run(args):
+    mix = args.mix
+    sink = SMTPSink().start()
+    llm = FakeChatAPI(args.llm_latency)
+    overrides = dict(args.set or [])
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("load_test_"),
+        "OUTBOX_WORKERS": 0,
+        "OUTBOX_POLL_INTERVAL": 0.5,
+        "BCRYPT_LOG_ROUNDS": args.rounds,
+        "OPENAI_API_KEY": "load-test",
+        "OPENAI_BASE_URL": llm.base_url,
+        **sink.mail_config(),
+        **overrides,
+    })
+
+    print("📊 Seeding database...", file=sys.stderr)
+    with app.app_context():
+        db.create_all()
+        doctor_ids, _, _, _ = seed(args.doctors, max(args.patients, args.users), args.appointments, random.Random(args.seed))
+        # Everyone shares one real hash at the configured cost, so logins cost what they cost in production
+        password_hash = password_hasher.hash(PASSWORD)
+        User.query.update({"password_hash": password_hash})
+        db.session.add(User(name="Admin", email=ADMIN_EMAIL, password_hash=password_hash, role="admin"))
+        db.session.commit()
+        emails = [email for (email,) in db.session.query(User.email).filter_by(role="patient").limit(args.users)]
+    outbox = start_outbox_workers(app, args.outbox_workers) if args.outbox_workers else None
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    recorder = Recorder()
+    admin = VirtualUser(base, recorder, random.Random(args.seed), ADMIN_EMAIL, doctor_ids, {})
+    admin.login()
+    # Load the local model and the OpenAI client before anything is timed
+    for method in RECOMMEND_METHODS:
+        admin.call("warm-up", "POST", "/api/ai/recommend-doctor",
+                   {"symptoms": SYMPTOMS[0], "method": method}, headers=admin.headers)
+    users = [
+        VirtualUser(base, recorder, random.Random(args.seed + n), email, doctor_ids, admin.headers)
+        for n, email in enumerate(emails)
+    ]
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=user.run, args=(mix, stop)) for user in users]
+    print(f"📊 {len(users)} users, {args.warmup:g}s warm-up, {args.seconds:g}s measured...", file=sys.stderr)
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(args.seconds)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    server.shutdown()
+    if outbox:
+        outbox.stop(timeout=5)
+    with app.app_context():
+        pending = EmailOutbox.query.filter_by(status="pending").count()
+        database = db.engine.dialect.name
+    sink.stop()
+    llm.close()
+    password_hasher.shutdown()
+
+    commit, dirty = git_commit()
+    totals, routes = summarize(recorder, elapsed)
+    results = {
+        "meta": {
+            "commit": commit,
+            "uncommitted_changes": dirty,
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "database": database,
+        },
+        "config": {
+            "users": len(users),
+            "seconds": args.seconds,
+            "warmup_seconds": args.warmup,
+            "doctors": args.doctors,
+            "patients": max(args.patients, args.users),
+            "appointments": args.appointments,
+            "bcrypt_rounds": args.rounds,
+            "llm_latency_seconds": args.llm_latency,
+            "mix": mix,
+            "overrides": overrides,
+        },
+        "totals": totals,
+        "routes": routes,
+        "email": {"delivered_to_sink": sink.received, "pending_in_outbox": pending},
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            results["comparison"] = compare(results, json.load(f))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = totals["requests"] > 0 and totals["errors"] == 0
+    print(f"✅ {totals['requests']} requests, no errors" if passed else f"❌ {totals['errors']} failed requests")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive mixed traffic against the served API and report per-route latency")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent virtual users (default: 16)")
+    parser.add_argument("--seconds", type=float, default=30, help="Measured duration (default: 30)")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured warm-up before that (default: 3)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"Action weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--doctors", type=int, default=100, help="Number of doctors (default: 100)")
+    parser.add_argument("--patients", type=int, default=5000, help="Number of patients (default: 5000)")
+    parser.add_argument("--appointments", type=int, default=50000, help="Seeded appointments (default: 50000)")
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt work factor (default: 4)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake OpenAI API latency in seconds (default: 0.2)")
+    parser.add_argument("--outbox-workers", type=int, default=1, help="Email outbox workers (default: 1)")
+    parser.add_argument("--set", type=parse_setting, action="append", metavar="KEY=VALUE",
+                        help="Override an app setting for this run (repeatable)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--compare", type=str, help="Earlier results file to compare against")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
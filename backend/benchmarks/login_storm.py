@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark for password hashing under a login storm.
+Serves the app over HTTP, keeps many clients logging in at once and
+meanwhile times an unrelated endpoint (the doctor directory). Runs once with
+bcrypt on the request threads (PASSWORD_HASH_WORKERS=0, the old behaviour)
+and once on the process pool, and reports login throughput, rejected logins
+and the latency of the unrelated endpoint for both.
+
+Usage:
+    python -m backend.benchmarks.login_storm
+    or
+    python -m backend.benchmarks.login_storm --clients 64 --seconds 20 --rounds 12
+"""
+
+import sys
+import os
+import json
+import time
+import logging
+import random
+import argparse
+import threading
+import statistics
+import urllib.error
+import urllib.request
+from collections import Counter
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from werkzeug.serving import make_server
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import User
+from backend.passwords import password_hasher
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+PASSWORD = "benchmark-password"
+
+
+def request(url, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "requests": len(samples),
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "max_ms": round(samples[-1], 2),
+    }
+
+
+def storm(args, workers):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("login_storm_"),
+        "OUTBOX_WORKERS": 0,
+        "BCRYPT_LOG_ROUNDS": args.rounds,
+        "PASSWORD_HASH_WORKERS": workers,
+    })
+    with app.app_context():
+        db.create_all()
+        seed(args.doctors, args.clients, 0, random.Random(args.seed))
+        # Every storm user shares one real hash at the configured cost, so nothing is rehashed
+        password_hash = password_hasher.hash(PASSWORD)
+        User.query.filter_by(role="patient").update({"password_hash": password_hash})
+        db.session.commit()
+        emails = [email for (email,) in db.session.query(User.email).filter_by(role="patient")]
+        probe_headers = auth_headers(1, "patient")
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    probe_url = f"{base}/api/doctors/"
+
+    # Start the pool and warm connections before measuring
+    request(f"{base}/api/auth/login", {"email": emails[0], "password": PASSWORD})
+    baseline = []
+    for _ in range(args.probes):
+        started = time.perf_counter()
+        request(probe_url, headers=probe_headers)
+        baseline.append((time.perf_counter() - started) * 1000)
+
+    stop = threading.Event()
+    statuses = Counter()
+    login_ms = []
+    lock = threading.Lock()
+
+    def login_client(email):
+        while not stop.is_set():
+            started = time.perf_counter()
+            status = request(f"{base}/api/auth/login", {"email": email, "password": PASSWORD})
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    login_ms.append(elapsed)
+            if status == 503:
+                time.sleep(0.05)
+
+    clients = [threading.Thread(target=login_client, args=(email,)) for email in emails]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+
+    under_load = []
+    while time.perf_counter() - started < args.seconds:
+        probe_started = time.perf_counter()
+        request(probe_url, headers=probe_headers)
+        under_load.append((time.perf_counter() - probe_started) * 1000)
+        time.sleep(0.05)
+
+    stop.set()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    password_hasher.shutdown()
+
+    return {
+        "password_hash_workers": workers,
+        "logins_per_second": round(statuses[200] / elapsed, 1),
+        "login_statuses": dict(statuses),
+        "login_latency": percentiles(login_ms) if login_ms else None,
+        "doctor_directory_idle": percentiles(baseline),
+        "doctor_directory_under_storm": percentiles(under_load),
+    }
+
+
+def run(args):
+    results = {
+        "clients": args.clients,
+        "seconds": args.seconds,
+        "bcrypt_rounds": args.rounds,
+        "cpus": os.cpu_count(),
+        "request_threads": storm(args, 0),
+        "process_pool": storm(args, args.workers),
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure login throughput and unrelated endpoint latency during a login storm")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent login clients (default: 32)")
+    parser.add_argument("--seconds", type=float, default=10, help="Storm duration per run (default: 10)")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor (default: 12)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Process pool size for the second run (default: CPU count)")
+    parser.add_argument("--probes", type=int, default=20, help="Idle requests to the unrelated endpoint before the storm (default: 20)")
+    parser.add_argument("--doctors", type=int, default=50, help="Number of doctors in the directory (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Check that the appointment list endpoints issue a fixed number of SQL
+statements per request, however many rows they return.
+Seeds the same database at increasing sizes and compares the counts.
+
+Usage:
+    python -m backend.benchmarks.query_counts
+    or
+    python -m backend.benchmarks.query_counts --scales 50 500 5000
+"""
+
+import sys
+import os
+import random
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.benchmarks.common import temp_database_url, auth_headers, seed, capture_statements
+
+# Ask for the largest page the API allows
+ENDPOINTS = {
+    "my_appointments_patient": ("/api/appointments/my?limit=500", "patient"),
+    "my_appointments_doctor": ("/api/appointments/my?limit=500", "doctor"),
+    "list_all_appointments": ("/api/admin/appointments?limit=500", "admin"),
+}
+
+
+def count_queries(appointments, doctors, patients, seed_value):
+    """Seed a fresh database and return {endpoint: (rows returned, statements executed)}"""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": temp_database_url("query_counts_"), "OUTBOX_WORKERS": 0})
+    rng = random.Random(seed_value)
+
+    with app.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, _, _ = seed(doctors, patients, appointments, rng)
+        ids = {"patient": patient_ids[0], "doctor": doctor_ids[0], "admin": 0}
+        client = app.test_client()
+
+        counts = {}
+        for name, (path, role) in ENDPOINTS.items():
+            headers = auth_headers(ids[role], role)
+            responses = []
+
+            def call():
+                responses.append(client.get(path, headers=headers))
+
+            statements = capture_statements(db.engine, call)
+            response = responses[0]
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            counts[name] = (len(response.get_json()["appointments"]), len(statements))
+            db.session.remove()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that list endpoints run a constant number of queries")
+    parser.add_argument("--scales", type=int, nargs="+", default=[50, 500, 5000],
+                        help="Appointment counts to seed (default: 50 500 5000)")
+    parser.add_argument("--doctors", type=int, default=5, help="Number of doctors (default: 5)")
+    parser.add_argument("--patients", type=int, default=20, help="Number of patients (default: 20)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+
+    args = parser.parse_args()
+
+    results = {scale: count_queries(scale, args.doctors, args.patients, args.seed) for scale in args.scales}
+
+    failed = False
+    for name in ENDPOINTS:
+        per_scale = [results[scale][name] for scale in args.scales]
+        summary = ", ".join(f"{rows} rows -> {queries} queries" for rows, queries in per_scale)
+        if len({queries for _, queries in per_scale}) == 1:
+            print(f"✅ {name}: {summary}")
+        else:
+            print(f"❌ {name}: {summary}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
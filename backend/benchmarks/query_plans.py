@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the appointment hot-path queries.
+Seeds a large appointments table, runs the real route helpers / handlers,
+records the EXPLAIN plan and latency of every SQL statement they issue and
+exits non-zero when one of them falls back to a full table scan.
+
+Usage:
+    python -m backend.benchmarks.query_plans
+    or
+    python -m backend.benchmarks.query_plans --appointments 1000000 --output plans.json
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Appointment
+from backend.routes.appointment_routes import booking_check
+from backend.benchmarks.common import temp_database_url, auth_headers, seed, capture_statements
+
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"^SCAN appointments(?! USING (COVERING )?INDEX)"),
+    "postgresql": re.compile(r"Seq Scan on appointments"),
+}
+
+
+def explain(engine, statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    # SQLite returns (id, parent, notused, detail); Postgres returns one text column
+    return [str(row[-1]) for row in rows]
+
+
+def full_scans(dialect, statement, plan):
+    """Plan lines that read the whole appointments table for a filtered query"""
+    pattern = FULL_SCAN_PATTERNS.get(dialect)
+    if pattern is None or "WHERE" not in statement.upper():
+        return []
+    return [line for line in plan if pattern.search(line.strip())]
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def build_scenarios(app, doctor_ids, patient_ids, first_day, days, rng):
+    client = app.test_client()
+    doctor_id = rng.choice(doctor_ids)
+    patient_id = rng.choice(patient_ids)
+    probe_start = first_day + timedelta(days=days // 2, hours=11)
+    probe_end = probe_start + timedelta(minutes=30)
+
+    admin_headers = auth_headers(0, "admin")
+    doctor_headers = auth_headers(doctor_id, "doctor")
+    patient_headers = auth_headers(patient_id, "patient")
+
+    def get(path, headers):
+        def call():
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code)
+        return call
+
+    return {
+        "booking_check": lambda: booking_check(patient_id, doctor_id, probe_start, probe_end),
+        "get_available_slots": get(
+            f"/api/appointments/available-slots?doctor_id={doctor_id}&date={probe_start.date().isoformat()}",
+            patient_headers,
+        ),
+        "my_appointments_patient": get("/api/appointments/my", patient_headers),
+        "my_appointments_doctor": get("/api/appointments/my", doctor_headers),
+        "get_analytics": get("/api/admin/analytics", admin_headers),
+    }
+
+
+def run(args):
+    database_url = args.database_url or temp_database_url("query_plans_")
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url, "OUTBOX_WORKERS": 0, "AVAILABILITY_CACHE_SIZE": 0})
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+        db.drop_all()
+        db.create_all()
+
+        started = time.perf_counter()
+        doctor_ids, patient_ids, first_day, days = seed(args.doctors, args.patients, args.appointments, rng)
+        seed_seconds = time.perf_counter() - started
+        # Refresh planner statistics so the plans match a long-lived database
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        results = {
+            "database": dialect,
+            "appointments": Appointment.query.count(),
+            "seed_seconds": round(seed_seconds, 2),
+            "scenarios": {},
+        }
+        regressions = []
+
+        scenarios = build_scenarios(app, doctor_ids, patient_ids, first_day, days, rng)
+        for name, fn in scenarios.items():
+            statements = []
+            for statement, parameters in capture_statements(engine, fn, table="appointments"):
+                plan = explain(engine, statement, parameters)
+                scans = full_scans(dialect, statement, plan)
+                if scans:
+                    regressions.append({"scenario": name, "statement": statement, "plan": scans})
+                statements.append({"sql": " ".join(statement.split()), "plan": plan, "full_scan": bool(scans)})
+
+            results["scenarios"][name] = {
+                "statements": statements,
+                "latency": time_calls(fn, args.iterations),
+            }
+            db.session.remove()
+
+        results["regressions"] = regressions
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"📝 Results written to {args.output}")
+    else:
+        print(output)
+
+    for name, scenario in results["scenarios"].items():
+        print(f"   {name:<26} p50 {scenario['latency']['p50_ms']:>9.3f} ms   p95 {scenario['latency']['p95_ms']:>9.3f} ms")
+
+    if regressions:
+        for regression in regressions:
+            print(f"❌ Full scan of appointments in {regression['scenario']}: {regression['plan']}")
+        return 1
+    print("✅ Every hot-path query uses an index")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record EXPLAIN plans and latencies for appointment hot-path queries")
+    parser.add_argument("--database-url", type=str, help="Database to seed (default: a temporary SQLite file). It is wiped first!")
+    parser.add_argument("--appointments", type=int, default=200000, help="Number of appointments to seed (default: 200000)")
+    parser.add_argument("--doctors", type=int, default=500, help="Number of doctors (default: 500)")
+    parser.add_argument("--patients", type=int, default=50000, help="Number of patients (default: 50000)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per scenario (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
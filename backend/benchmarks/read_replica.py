@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark for read-replica routing.
+Seeds two identical databases, a primary and a replica (two temporary
+SQLite files unless --database-url / --replica-url point at e.g. two local
+PostgreSQL instances; they are wiped first), and reports the time of each
+read-only endpoint and booking with the SQL statements each database
+received. It then shows where the booking patient's reads go: right after
+booking, once the process has forgotten the write (as another worker
+process would), with a tampered db_pin cookie and after
+DB_REPLICA_PIN_SECONDS. The replica is never updated here, so it plays a
+replica that is lagging behind.
+
+The routing rules themselves are checked by tests/test_read_replica.py.
+
+Usage:
+    python -m backend.benchmarks.read_replica
+    or
+    python -m backend.benchmarks.read_replica --database-url postgresql://localhost:5432/primary --replica-url postgresql://localhost:5433/replica
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import event
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.replica import REPLICA_BIND, PIN_COOKIE, replica_router
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+PIN_SECONDS = 0.5
+
+
+def make_app(url, replica_url=""):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": url,
+        "DATABASE_REPLICA_URL": replica_url,
+        "DB_REPLICA_PIN_SECONDS": PIN_SECONDS,
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "DOCTOR_DIRECTORY_VERIFY_SECONDS": 0,
+    })
+
+
+def seed_database(url, args):
+    """Wipe and seed one database; the same seed gives both databases the same rows"""
+    app = make_app(url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seeded = seed(args.doctors, args.patients, args.appointments, random.Random(args.seed))
+        db.session.commit()
+        db.engine.dispose()
+    return seeded
+
+
+def run(args):
+    primary_url = args.database_url or temp_database_url("read_replica_primary_")
+    replica_url = args.replica_url or temp_database_url("read_replica_replica_")
+    doctor_ids, patient_ids, first_day, _ = seed_database(primary_url, args)
+    seed_database(replica_url, args)
+
+    app = make_app(primary_url, replica_url)
+    statements = Counter()
+    with app.app_context():
+        for name, engine in (("primary", db.engines[None]), ("replica", db.engines[REPLICA_BIND])):
+            event.listen(engine, "before_cursor_execute",
+                         lambda *_, name=name: statements.update([name]))
+        admin = auth_headers(0, "admin")
+        patient = auth_headers(patient_ids[0], "patient")
+        other_patient = auth_headers(patient_ids[1], "patient")
+    client = app.test_client()
+
+    def routed(method, url, headers, **kwargs):
+        """(status, ms, primary statements, replica statements, response JSON or None)"""
+        statements.clear()
+        started = time.perf_counter()
+        response = getattr(client, method)(url, headers=headers, **kwargs)
+        response.get_data()  # runs streamed responses to the end
+        ms = round((time.perf_counter() - started) * 1000, 3)
+        data = response.get_json(silent=True) if response.is_json else None
+        return response.status_code, ms, statements["primary"], statements["replica"], data
+
+    day = f"{first_day + timedelta(days=1):%Y-%m-%d}"
+    read_only = {
+        "list_doctors": ("/api/doctors/", admin),
+        "admin_doctors": ("/api/admin/doctors", admin),
+        "my_appointments": ("/api/appointments/my", patient),
+        "available_slots": (f"/api/appointments/available-slots?doctor_id={doctor_ids[0]}&date={day}", patient),
+        "availability_grid": (f"/api/appointments/availability?doctor_ids={doctor_ids[0]}&start={day}&end={day}", patient),
+        "admin_appointments": ("/api/admin/appointments", admin),
+        "export": ("/api/admin/appointments/export?format=csv", admin),
+        "analytics": ("/api/admin/analytics", admin),
+        "appointments_per_day": ("/api/admin/analytics/appointments-per-day", admin),
+        "doctor_analytics": ("/api/admin/analytics/doctors", admin),
+    }
+    results = {"read_only": {}}
+    for name, (url, headers) in read_only.items():
+        status, ms, primary, replica, _ = routed("get", url, headers)
+        results["read_only"][name] = {"status": status, "ms": ms, "primary": primary, "replica": replica}
+
+    # A booking writes to the primary only
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=400), datetime.min.time()) + timedelta(hours=10)
+    status, ms, primary, replica, data = routed("post", "/api/appointments/book", patient, json={
+        "doctor_id": doctor_ids[0],
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(hours=1)).isoformat(),
+        "reason": "replica check",
+    })
+    booked_id = data["appointment"]["id"] if status == 201 else None
+    results["booking"] = {"status": status, "ms": ms, "primary": primary, "replica": replica}
+
+    def my_ids(headers):
+        status, ms, primary, replica, data = routed("get", "/api/appointments/my?limit=500", headers)
+        ids = {appointment["id"] for appointment in data["appointments"]}
+        return {"ms": ms, "primary": primary, "replica": replica, "sees_booking": booked_id in ids}
+
+    # Read-your-writes: the booking patient is pinned to the primary for a while
+    results["after_booking"] = {"booking_patient": my_ids(patient), "other_patient": my_ids(other_patient)}
+
+    # Another worker process only has the cookie to go by
+    replica_router._writers.clear()
+    cookie = client.get_cookie(PIN_COOKIE)
+    results["other_worker"] = {"booking_patient": my_ids(patient)}
+    client.set_cookie(PIN_COOKIE, cookie.value + "x")
+    results["tampered_cookie"] = {"booking_patient": my_ids(patient)}
+    client.set_cookie(PIN_COOKIE, cookie.value)
+
+    time.sleep(PIN_SECONDS + 0.1)
+    results["after_pin_expired"] = {"booking_patient": my_ids(patient)}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time read-only and write endpoints with a read replica and show which database each used")
+    parser.add_argument("--database-url", type=str, help="Primary database, wiped first (default: temporary SQLite file)")
+    parser.add_argument("--replica-url", type=str, help="Replica database, wiped first (default: temporary SQLite file)")
+    parser.add_argument("--appointments", type=int, default=5000, help="Seeded appointments (default: 5000)")
+    parser.add_argument("--doctors", type=int, default=20, help="Number of doctors (default: 20)")
+    parser.add_argument("--patients", type=int, default=500, help="Number of patients (default: 500)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the batch symptom recommendation endpoint.
+Compares one `/api/ai/recommend-doctor` request per text with a single
+`/api/ai/recommend-doctor/batch` request, first with the rules only and
+then with `use_openai` against a local fake chat completions API (see
+llm_client.py). Then stalls the API and checks that the batch returns at
+the deadline with rule-based answers. Exits non-zero if the batch answers
+differ from the single requests, come back out of order, or miss the
+deadline, or if the batch endpoint serves anonymous callers or roles
+outside AI_BATCH_ROLES, turns away a kiosk account or lets an account
+past AI_BATCH_OPENAI_ITEMS.
+
+Usage:
+    python -m backend.benchmarks.recommend_batch
+    or
+    python -m backend.benchmarks.recommend_batch --texts 500 --llm-texts 200 --latency-ms 200
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.llm_client import llm_recommender
+from backend.benchmarks.llm_client import SYMPTOMS
+from backend.testing import FakeChatAPI
+from backend.benchmarks.common import auth_headers
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    api = FakeChatAPI(args.latency_ms / 1000)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "OPENAI_API_KEY": "benchmark-key",
+        "OPENAI_BASE_URL": api.base_url,
+        "OPENAI_TIMEOUT": args.deadline * 5,  # so the batch deadline, not the call timeout, cuts the stall short
+        "OPENAI_BATCH_CONCURRENCY": args.concurrency,
+        "AI_BATCH_DEADLINE_SECONDS": args.deadline,
+        "AI_BATCH_MAX_ITEMS": max(args.texts, args.llm_texts),
+        "AI_BATCH_OPENAI_ITEMS": 2 * args.llm_texts,  # the two openai batches below, nothing more
+    })
+    client = app.test_client()
+    with app.app_context():
+        admin = auth_headers(0, "admin")
+        kiosk = auth_headers(2, "kiosk")
+        patient = auth_headers(1, "patient")
+
+    def single(texts, use_openai):
+        started = time.perf_counter()
+        answers = []
+        for symptoms in texts:
+            body = client.post("/api/ai/recommend-doctor", json={"symptoms": symptoms, "use_openai": use_openai}).get_json()
+            answers.append((body["specialty"], body["method"]))
+        return answers, round((time.perf_counter() - started) * 1000, 1)
+
+    def batch(texts, use_openai):
+        started = time.perf_counter()
+        body = client.post(
+            "/api/ai/recommend-doctor/batch", headers=admin, json={"symptoms": texts, "use_openai": use_openai}
+        ).get_json()
+        answers = [(item["specialty"], item["method"]) for item in body["results"]]
+        return answers, round((time.perf_counter() - started) * 1000, 1), body["deadline_exceeded"]
+
+    def texts(count, tag):
+        # distinct texts, so the answer cache can't hide the API latency
+        return [f"{rng.choice(SYMPTOMS)} ({tag} patient {n})" for n in range(count)]
+
+    results = {"concurrency": args.concurrency, "api_latency_ms": args.latency_ms, "deadline_seconds": args.deadline}
+
+    rule_texts = texts(args.texts, "rules")
+    single_answers, single_ms = single(rule_texts, False)
+    batch_answers, batch_ms, _ = batch(rule_texts, False)
+    results["rules_only"] = {
+        "texts": args.texts,
+        "single_requests_ms": single_ms,
+        "batch_ms": batch_ms,
+        "same_answers": single_answers == batch_answers,
+    }
+
+    # Different texts for each run so both pay the API latency
+    llm_texts = texts(args.llm_texts, "llm")
+    single_answers, single_ms = single(llm_texts, True)
+    llm_recommender.cache.clear()
+    batch_answers, batch_ms, late = batch(llm_texts, True)
+    results["with_llm"] = {
+        "texts": args.llm_texts,
+        "single_requests_ms": single_ms,
+        "batch_ms": batch_ms,
+        "api_calls": api.calls,
+        "same_answers_in_order": single_answers == batch_answers,
+        "openai_answers": sum(method == "openai" for _, method in batch_answers),
+        "deadline_exceeded": late,
+    }
+
+    api.set_mode("stall")
+    stalled_texts = texts(args.llm_texts, "stalled")
+    expected = [answer for answer, _ in single(stalled_texts, False)[0]]
+    batch_answers, batch_ms, late = batch(stalled_texts, True)
+    results["stalled_api"] = {
+        "texts": args.llm_texts,
+        "batch_ms": batch_ms,
+        "deadline_exceeded": late,
+        "rule_based_answers": sum(method == "rule-based" for _, method in batch_answers),
+        "same_as_rules": [answer for answer, _ in batch_answers] == expected,
+    }
+
+    def batch_status(headers):
+        return client.post("/api/ai/recommend-doctor/batch", headers=headers, json={"symptoms": ["cough"], "use_openai": True}).status_code
+    results["access"] = {
+        "anonymous": batch_status({}),
+        "patient": batch_status(patient),
+        "admin_over_budget": batch_status(admin),
+        "kiosk": batch_status(kiosk),
+    }
+    api.close()
+    llm_recommender.close()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = (
+        results["rules_only"]["same_answers"]
+        and results["with_llm"]["same_answers_in_order"]
+        and results["with_llm"]["openai_answers"] == args.llm_texts
+        and results["stalled_api"]["batch_ms"] < args.deadline * 1000 + 500
+        and results["stalled_api"]["rule_based_answers"] == args.llm_texts
+        and results["stalled_api"]["same_as_rules"]
+        and results["access"] == {"anonymous": 401, "patient": 403, "admin_over_budget": 429, "kiosk": 200}
+    )
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single and batch symptom recommendations, with and without the LLM")
+    parser.add_argument("--texts", type=int, default=500, help="Symptom texts for the rules-only comparison (default: 500)")
+    parser.add_argument("--llm-texts", type=int, default=64, help="Symptom texts for the LLM comparison (default: 64)")
+    parser.add_argument("--latency-ms", type=float, default=100, help="Fake API response time (default: 100)")
+    parser.add_argument("--concurrency", type=int, default=8, help="OPENAI_BATCH_CONCURRENCY (default: 8)")
+    parser.add_argument("--deadline", type=float, default=3.0, help="AI_BATCH_DEADLINE_SECONDS (default: 3.0)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
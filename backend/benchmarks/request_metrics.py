@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the request metrics.
+Serves the same seeded database from two apps, one with METRICS_ENABLED and
+one without, and sends the same requests to both in turns. Then:
+
+- checks that /metrics needs the token, and is not served without one,
+- scrapes /metrics and checks that the request counts match what was sent,
+  with a request that raises counted as a 500,
+  and that the SQL statement counts match the statements the engine really
+  ran for one more request per endpoint,
+- times the metrics hooks on their own (request start and finish plus the
+  two cursor events for each statement) for a request running as many
+  statements as the busiest endpoint, and compares that to the median
+  request latency. Differences between the two apps end to end are printed
+  too, but on a shared machine they are mostly noise at this size.
+
+Exits non-zero if a check fails or the hooks cost more than
+--max-overhead-pct of a request.
+
+Usage:
+    python -m backend.benchmarks.request_metrics
+    or
+    python -m backend.benchmarks.request_metrics --rounds 10 --requests 200
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import argparse
+import statistics
+from collections import defaultdict
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.metrics import RequestMetrics
+from backend.benchmarks.common import temp_database_url, auth_headers, seed, capture_statements
+
+SAMPLE = re.compile(r'^(\w+)\{endpoint="([^"]+)"[^}]*\} (\S+)$')
+HOOK_CALLS = 20000
+TOKEN = "benchmark-token"
+SCRAPE_HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.info = {}
+
+
+def scrape(client):
+    """{(metric, endpoint): value} of the _sum / _count / _total samples on /metrics"""
+    values = defaultdict(float)
+    for line in client.get("/metrics", headers=SCRAPE_HEADERS).get_data(as_text=True).splitlines():
+        match = SAMPLE.match(line)
+        if match and match.group(1).endswith(("_sum", "_count", "_total")):
+            values[match.group(1), match.group(2)] += float(match.group(3))
+    return values
+
+
+def time_hooks(app, path, statements):
+    """Seconds the metrics hooks add to one request running this many statements"""
+    metrics = RequestMetrics()  # a separate instance so the served counts stay exact
+    connection = FakeConnection()
+    response = app.response_class("")
+    with app.test_request_context(path):
+        started = time.perf_counter()
+        for _ in range(HOOK_CALLS):
+            metrics._start()
+            for _ in range(statements):
+                metrics._before_cursor_execute(connection, None, "SELECT 1", (), None, False)
+                metrics._after_cursor_execute(connection, None, "SELECT 1", (), None, False)
+            metrics._status(response)
+            metrics._finish()
+        return (time.perf_counter() - started) / HOOK_CALLS
+
+
+def run(args):
+    url = temp_database_url("request_metrics_")
+    apps = {
+        enabled: create_app({
+            "SQLALCHEMY_DATABASE_URI": url,
+            "OUTBOX_WORKERS": 0,
+            "PASSWORD_HASH_WORKERS": 0,
+            "METRICS_ENABLED": enabled,
+            "METRICS_TOKEN": TOKEN,
+        })
+        for enabled in (False, True)
+    }
+
+    def fail():
+        raise RuntimeError("benchmark error")
+
+    apps[True].add_url_rule("/benchmark-error", "benchmark_error", fail)
+    with apps[True].app_context():
+        db.create_all()
+        doctor_ids, patient_ids, first_day, _ = seed(args.doctors, args.patients, args.appointments, random.Random(args.seed))
+        db.session.commit()
+        admin = auth_headers(0, "admin")
+        patient = auth_headers(patient_ids[0], "patient")
+
+    endpoints = {
+        "doctor.list_doctors": ("/api/doctors/", admin),
+        "appointment.my_appointments": ("/api/appointments/my", patient),
+        "appointment.get_available_slots": (
+            f"/api/appointments/available-slots?doctor_id={doctor_ids[0]}&date={first_day:%Y-%m-%d}", patient
+        ),
+        "admin.list_all_appointments": ("/api/admin/appointments", admin),
+        "admin.list_all_doctors": ("/api/admin/doctors", admin),
+    }
+    clients = {enabled: app.test_client() for enabled, app in apps.items()}
+
+    # Take turns request by request, swapping which app goes first
+    latencies = {False: [], True: []}
+    sent = defaultdict(int)
+    for _ in range(args.rounds):
+        for i in range(args.requests):
+            for enabled in ((False, True) if i % 2 else (True, False)):
+                for name, (path, headers) in endpoints.items():
+                    started = time.perf_counter()
+                    clients[enabled].get(path, headers=headers)
+                    latencies[enabled].append(time.perf_counter() - started)
+                    if enabled:
+                        sent[name] += 1
+
+    failed = clients[True].get("/benchmark-error").status_code
+    scraped = scrape(clients[True])
+    # The statements one request really runs, counted independently of the metrics
+    with apps[True].app_context():
+        engine = db.engine
+    actual = {
+        name: len(capture_statements(engine, lambda: clients[True].get(path, headers=headers)))
+        for name, (path, headers) in endpoints.items()
+    }
+    scraped_after = scrape(clients[True])
+
+    results = {"requests_per_endpoint": args.rounds * args.requests, "endpoints": {}}
+    passed = True
+    for name in endpoints:
+        count = scraped["http_request_duration_seconds_count", name]
+        queries = scraped_after["http_request_sql_queries_sum", name] - scraped["http_request_sql_queries_sum", name]
+        results["endpoints"][name] = {
+            "requests_counted": int(count),
+            "requests_sent": sent[name],
+            "sql_queries_per_request": round(scraped["http_request_sql_queries_sum", name] / count, 2),
+            "sql_ms_per_request": round(scraped["http_request_sql_duration_seconds_sum", name] / count * 1000, 3),
+            "sql_queries_next_request": int(queries),
+            "sql_statements_run": actual[name],
+        }
+        passed = passed and count == sent[name] and queries == actual[name]
+
+    median = {enabled: statistics.median(values) for enabled, values in latencies.items()}
+    statements = max(actual.values())
+    hooks = time_hooks(apps[True], endpoints["admin.list_all_doctors"][0], statements)
+    results["overhead"] = {
+        "median_request_us": round(median[False] * 1e6, 1),
+        "hooks_us_per_request": round(hooks * 1e6, 1),
+        "hooks_statements_per_request": statements,
+        "hooks_pct_of_median_request": round(hooks / median[False] * 100, 2),
+        "end_to_end_median_us": {"metrics_disabled": round(median[False] * 1e6, 1),
+                                 "metrics_enabled": round(median[True] * 1e6, 1)},
+    }
+    passed = passed and results["overhead"]["hooks_pct_of_median_request"] <= args.max_overhead_pct
+
+    metrics_text = clients[True].get("/metrics", headers=SCRAPE_HEADERS).get_data(as_text=True)
+    results["unhandled_exception"] = {
+        "status": failed,
+        "counted_as_500": 'http_requests_total{endpoint="benchmark_error",method="GET",status="500"} 1' in metrics_text.splitlines(),
+    }
+    results["access"] = {
+        "no_token": clients[True].get("/metrics").status_code,
+        "wrong_token": clients[True].get("/metrics", headers={"Authorization": "Bearer nope"}).status_code,
+        "token": clients[True].get("/metrics", headers=SCRAPE_HEADERS).status_code,
+    }
+    # Last: a new app reconfigures the shared request_metrics
+    tokenless = create_app({"SQLALCHEMY_DATABASE_URI": url, "OUTBOX_WORKERS": 0, "PASSWORD_HASH_WORKERS": 0})
+    results["access"]["token_not_configured"] = tokenless.test_client().get("/metrics").status_code
+    passed = (
+        passed
+        and results["access"] == {"no_token": 401, "wrong_token": 401, "token": 200, "token_not_configured": 404}
+        and results["unhandled_exception"]["counted_as_500"]
+    )
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    print("✅ Metrics match the traffic, overhead within limit" if passed else "❌ Metrics are wrong or too expensive")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the overhead and accuracy of the request metrics")
+    parser.add_argument("--rounds", type=int, default=4, help="Measurement rounds (default: 4)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint per round (default: 50)")
+    parser.add_argument("--appointments", type=int, default=20000, help="Seeded appointments (default: 20000)")
+    parser.add_argument("--doctors", type=int, default=20, help="Number of doctors (default: 20)")
+    parser.add_argument("--patients", type=int, default=1000, help="Number of patients (default: 1000)")
+    parser.add_argument("--max-overhead-pct", type=float, default=2, help="Fail above this overhead (default: 2)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Check for on-demand request profiling.
+Seeds a database into a profiling-enabled app and checks that:
+
+- an admin request with "X-Profile: 1" (or ?profile=1) returns an
+  X-Profile-Id, and the profile lists the view's code among its functions,
+  exactly the SQL statements the engine ran, and a pstats file that loads,
+- requests without the flag, or from a patient, or with a bad token, are
+  not profiled,
+- only the newest PROFILE_KEEP profiles are kept,
+- malformed profile ids answer 404.
+
+Also reports how much slower a profiled request is than a plain one.
+Exits non-zero if any check fails.
+
+Usage:
+    python -m backend.benchmarks.request_profiling
+    or
+    python -m backend.benchmarks.request_profiling --appointments 50000
+"""
+
+import sys
+import os
+import json
+import time
+import pstats
+import random
+import shutil
+import argparse
+import statistics
+import tempfile
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.benchmarks.common import temp_database_url, auth_headers, seed, capture_statements
+
+KEEP = 5
+
+
+def median_ms(client, url, headers, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        client.get(url, headers=headers)
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def run(args):
+    profile_dir = tempfile.mkdtemp(prefix="request_profiles_")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": temp_database_url("request_profiling_"),
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "PROFILING_ENABLED": True,
+        "PROFILE_DIR": profile_dir,
+        "PROFILE_KEEP": KEEP,
+    })
+    with app.app_context():
+        db.create_all()
+        _, patient_ids, _, _ = seed(args.doctors, args.patients, args.appointments, random.Random(args.seed))
+        db.session.commit()
+        engine = db.engine
+        admin = auth_headers(0, "admin")
+        patient = auth_headers(patient_ids[0], "patient")
+    client = app.test_client()
+    url = "/api/admin/doctors"
+    checks = {}
+
+    try:
+        # A profiled admin request, with the statements counted independently
+        responses = []
+        statements = capture_statements(
+            engine, lambda: responses.append(client.get(url, headers={**admin, "X-Profile": "1"}))
+        )
+        profile_id = responses[0].headers.get("X-Profile-Id")
+        profile = client.get(f"/api/admin/profiles/{profile_id}", headers=admin).get_json() if profile_id else {}
+        view = [f for f in profile.get("functions", []) if f["function"] == "list_all_doctors" and f["in_app"]]
+        download = client.get(f"/api/admin/profiles/{profile_id}/pstats", headers=admin)
+        with tempfile.NamedTemporaryFile(suffix=".prof") as f:
+            f.write(download.data)
+            f.flush()
+            try:
+                loaded = len(pstats.Stats(f.name).stats) > 0
+            except Exception:
+                loaded = False
+        checks["profiled"] = {
+            "status": responses[0].status_code,
+            "profile_id": profile_id,
+            "view_function": view[0] if view else None,
+            "sql_count": profile.get("sql_count"),
+            "sql_statements_run": len(statements),
+            "pstats_loads": loaded,
+            "passed": (responses[0].status_code == 200 and bool(view)
+                       and profile.get("sql_count") == len(statements) == len(profile.get("sql", []))
+                       and loaded),
+        }
+
+        # Only admins asking for it get profiled
+        not_profiled = {
+            "admin_without_flag": client.get(url, headers=admin),
+            "admin_query_flag": client.get(f"{url}?profile=1", headers=admin),
+            "patient_with_flag": client.get("/api/appointments/my", headers={**patient, "X-Profile": "1"}),
+            "bad_token_with_flag": client.get(url, headers={"Authorization": "Bearer nope", "X-Profile": "1"}),
+        }
+        checks["who_is_profiled"] = {
+            name: {"status": response.status_code, "profile_id": response.headers.get("X-Profile-Id")}
+            for name, response in not_profiled.items()
+        }
+        checks["who_is_profiled"]["passed"] = (
+            not_profiled["admin_query_flag"].headers.get("X-Profile-Id") is not None
+            and all(not_profiled[name].headers.get("X-Profile-Id") is None
+                    for name in ("admin_without_flag", "patient_with_flag", "bad_token_with_flag"))
+            and not_profiled["bad_token_with_flag"].status_code == 422
+        )
+
+        # Pruning keeps the newest PROFILE_KEEP
+        made = [client.get(url, headers={**admin, "X-Profile": "1"}).headers["X-Profile-Id"] for _ in range(KEEP + 2)]
+        listed = [p["id"] for p in client.get("/api/admin/profiles", headers=admin).get_json()["profiles"]]
+        files = sorted(os.listdir(profile_dir))
+        checks["pruning"] = {
+            "listed": len(listed),
+            "files": len(files),
+            "passed": listed == made[::-1][:KEEP] and len(files) == 2 * KEEP,
+        }
+
+        bad_ids = ["nope", "..%2F..%2Fconfig", made[0]]  # the oldest was pruned
+        checks["bad_ids"] = {
+            "statuses": [client.get(f"/api/admin/profiles/{i}", headers=admin).status_code for i in bad_ids],
+        }
+        checks["bad_ids"]["passed"] = all(status == 404 for status in checks["bad_ids"]["statuses"])
+
+        results = {
+            "checks": checks,
+            "latency_ms": {
+                "plain": median_ms(client, url, admin, args.runs),
+                "profiled": median_ms(client, url, {**admin, "X-Profile": "1"}, args.runs),
+            },
+        }
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = all(check["passed"] for check in checks.values())
+    print("✅ Only flagged admin requests were profiled, with their code and SQL" if passed
+          else "❌ Profiling check failed")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check on-demand profiling of single requests")
+    parser.add_argument("--appointments", type=int, default=5000, help="Seeded appointments (default: 5000)")
+    parser.add_argument("--doctors", type=int, default=20, help="Number of doctors (default: 20)")
+    parser.add_argument("--patients", type=int, default=500, help="Number of patients (default: 500)")
+    parser.add_argument("--runs", type=int, default=50, help="Requests timed per latency figure (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark for JSON encoding and response compression of large lists.
+Seeds --rows appointments and --rows doctors and, for a --rows long page of
+/api/admin/appointments and for the doctor directory, reports:
+
+- the CPU time to build the payload and to encode it with Flask's default
+  JSON provider and with orjson, for the objects and columns shapes,
+- bytes on the wire uncompressed, gzipped and (with the brotli package)
+  brotli-compressed, with the time each compression takes,
+- end-to-end request time and bytes through the app for every provider,
+  shape and Accept-Encoding combination.
+
+Fails unless both providers send the same values, compressed bodies
+decompress to the uncompressed ones, the columns shape holds exactly the
+same data as the objects shape, small responses are sent uncompressed and a
+compressed directory still revalidates with a 304.
+
+Usage:
+    python -m backend.benchmarks.response_encoding
+    or
+    python -m backend.benchmarks.response_encoding --rows 50000 --runs 3
+"""
+
+import sys
+import os
+import gzip
+import json
+import time
+import random
+import argparse
+import statistics
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from flask.json.provider import DefaultJSONProvider
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Appointment
+from backend.pagination import paginate_appointments
+from backend.serializers import serialize_appointments, serialize_appointment_columns
+from backend.doctor_directory import directory_rows, serialize_directory
+from backend.compression import response_compressor, brotli
+from backend.json_provider import OrjsonProvider
+from backend.benchmarks.common import temp_database_url, auth_headers, seed
+
+PROVIDERS = ("default", "orjson")
+SHAPES = ("objects", "columns")
+ENCODINGS = ("identity", "gzip", "br") if brotli is not None else ("identity", "gzip")
+
+
+def median_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3), result
+
+
+def decode(response):
+    data = response.get_data()
+    encoding = response.headers.get("Content-Encoding")
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "br":
+        data = brotli.decompress(data)
+    return json.loads(data)
+
+
+def objects_from_columns(page):
+    """Rebuild the objects shape of an appointment page from its columns shape"""
+    patients = {p["id"]: p for p in page.get("patients", [])}
+    doctors = {d["id"]: d for d in page.get("doctors", [])}
+    unknown_patient = {"id": None, "name": "Unknown", "email": None}
+    unknown_doctor = {"id": None, "name": "Unknown", "specialty": None}
+    rows = []
+    for row in page["rows"]:
+        item = {}
+        for column, value in zip(page["columns"], row):
+            if column == "patient_id":
+                item["patient"] = patients.get(value, unknown_patient)
+            elif column == "doctor_id":
+                item["doctor"] = doctors.get(value, unknown_doctor)
+            else:
+                item[column] = value
+        rows.append(item)
+    return rows
+
+
+def make_app(url, provider, rows):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": url,
+        "OUTBOX_WORKERS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "JSON_PROVIDER": provider,
+        "APPOINTMENTS_MAX_PAGE_SIZE": rows,
+    })
+
+
+def payload_results(app, payloads, runs):
+    """Build and encode times and compressed sizes for {shape: (build function, ...)}"""
+    results = {}
+    json_providers = {"default": DefaultJSONProvider(app), "orjson": OrjsonProvider(app)}
+    with app.test_request_context():
+        for shape, build in payloads.items():
+            build_ms, payload = median_ms(build, runs)
+            entry = {"build_ms": build_ms, "encode_ms": {}, "bytes": {}, "compress_ms": {}}
+            for provider, json_provider in json_providers.items():
+                entry["encode_ms"][provider], _ = median_ms(lambda: json_provider.response(payload), runs)
+            body = app.json.response(payload).get_data()
+            entry["bytes"]["identity"] = len(body)
+            for encoding in ENCODINGS[1:]:
+                compress_ms, compressed = median_ms(lambda: response_compressor.encode(body, encoding), runs)
+                entry["compress_ms"][encoding] = compress_ms
+                entry["bytes"][encoding] = len(compressed)
+            results[shape] = entry
+    return results
+
+
+def run(args):
+    url = temp_database_url("response_encoding_")
+    apps = {provider: make_app(url, provider, args.rows) for provider in PROVIDERS}
+    app = apps["orjson"]
+    with app.app_context():
+        db.create_all()
+        doctor_ids, patient_ids, _, _ = seed(args.doctors, args.patients, args.rows, random.Random(args.seed))
+        db.session.commit()
+        admin = auth_headers(0, "admin")
+        patient = auth_headers(patient_ids[0], "patient")
+        appointments, _ = paginate_appointments(Appointment.query, args.rows)
+        appointments = appointments[:args.rows]
+
+    directory_url = temp_database_url("response_encoding_directory_")
+    directory_apps = {provider: make_app(directory_url, provider, args.rows) for provider in PROVIDERS}
+    with directory_apps["orjson"].app_context():
+        db.create_all()
+        seed(args.rows, 1, args.rows, random.Random(args.seed))
+        db.session.commit()
+
+    results = {"rows": len(appointments), "brotli_installed": brotli is not None}
+
+    # CPU and bytes of the payloads themselves
+    with app.app_context():
+        results["appointments_payload"] = payload_results(app, {
+            "objects": lambda: serialize_appointments(appointments),
+            "columns": lambda: serialize_appointment_columns(appointments),
+        }, args.runs)
+    directory_app = directory_apps["orjson"]
+    with directory_app.app_context():
+        rows = directory_rows()
+        results["directory_payload"] = payload_results(directory_app, {
+            "objects": lambda: serialize_directory(rows, "objects"),
+            "columns": lambda: serialize_directory(rows, "columns"),
+        }, args.runs)
+
+    # End to end through the app
+    checks = {}
+    decoded = {}
+    results["appointments_http"] = {}
+    for provider, provider_app in apps.items():
+        client = provider_app.test_client()
+        for shape in SHAPES:
+            for encoding in ENCODINGS:
+                url = f"/api/admin/appointments?limit={args.rows}&shape={shape}"
+                headers = {**admin, "Accept-Encoding": encoding}
+                ms, response = median_ms(lambda: client.get(url, headers=headers), args.runs)
+                results["appointments_http"][f"{provider}/{shape}/{encoding}"] = {
+                    "ms": ms, "bytes": len(response.get_data()),
+                    "content_encoding": response.headers.get("Content-Encoding"),
+                }
+                decoded[provider, shape, encoding] = decode(response)["appointments"]
+    reference = decoded["default", "objects", "identity"]
+    checks["same_values_any_provider_and_encoding"] = all(
+        (page if shape == "objects" else objects_from_columns(page)) == reference
+        for (_, shape, _), page in decoded.items()
+    )
+    checks["compressed_when_asked"] = all(
+        (entry["content_encoding"] or "identity") == key.rsplit("/", 1)[1]
+        for key, entry in results["appointments_http"].items()
+    )
+
+    results["directory_http"] = {}
+    directory = {}
+    for provider, provider_app in directory_apps.items():
+        client = provider_app.test_client()
+        for shape in SHAPES:
+            for encoding in ENCODINGS:
+                url = f"/api/doctors/?shape={shape}"
+                ms, response = median_ms(lambda: client.get(url, headers={"Accept-Encoding": encoding}), args.runs)
+                results["directory_http"][f"{provider}/{shape}/{encoding}"] = {
+                    "ms": ms, "bytes": len(response.get_data()),
+                    "content_encoding": response.headers.get("Content-Encoding"),
+                }
+                directory[provider, shape, encoding] = (decode(response), response.headers.get("ETag"))
+    reference = directory["default", "objects", "identity"][0]
+    checks["directory_same_values"] = all(
+        (data if shape == "objects" else [dict(zip(data["columns"], row)) for row in data["rows"]]) == reference
+        for (_, shape, _), (data, _) in directory.items()
+    )
+    etag = directory["orjson", "objects", "gzip"][1]
+    revalidated = directory_apps["orjson"].test_client().get(
+        "/api/doctors/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    checks["compressed_directory_revalidates"] = (
+        etag.endswith('-gzip"') and not etag.startswith("W/") and revalidated.status_code == 304
+    )
+
+    small = apps["orjson"].test_client().get(
+        "/api/appointments/my?limit=1&fields=status", headers={**patient, "Accept-Encoding": "gzip"}
+    )
+    checks["small_response_uncompressed"] = (
+        small.status_code == 200 and "Content-Encoding" not in small.headers
+        and len(small.get_data()) < app.config["COMPRESSION_MIN_SIZE"]
+    )
+    bad_shape = apps["orjson"].test_client().get("/api/appointments/my?shape=rows", headers=patient)
+    checks["unknown_shape_rejected"] = bad_shape.status_code == 400
+    results["checks"] = checks
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = all(checks.values())
+    print("✅ Every provider, shape and encoding sent the same data" if passed else "❌ Encoding check failed")
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON providers, response shapes and compression on large lists")
+    parser.add_argument("--rows", type=int, default=10000, help="Appointments per page and doctors in the directory (default: 10000)")
+    parser.add_argument("--doctors", type=int, default=50, help="Doctors behind the appointments (default: 50)")
+    parser.add_argument("--patients", type=int, default=2000, help="Patients behind the appointments (default: 2000)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per figure, the median is reported (default: 5)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
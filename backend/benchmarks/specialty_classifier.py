@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the local specialty classifier.
+Cross-validates the classifier on the shipped training examples against the
+rule-based matcher, then times the shipped model: lazy load, one text per
+call (what a request pays) and batched inference. Exits non-zero if a
+single classification takes a millisecond or more at p99.
+
+Usage:
+    python -m backend.benchmarks.specialty_classifier
+    or
+    python -m backend.benchmarks.specialty_classifier --folds 10 --batch 2000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.config import Config, BASE_DIR
+from backend.symptom_matcher import _CompiledRules
+from backend.specialty_classifier import SpecialtyModel, SpecialtyClassifier
+from backend.train_classifier import read_examples
+
+
+def cross_validate(examples, keywords, rules, folds, rng):
+    """Accuracy of the rules and of the classifier on texts it was not trained on,
+    overall and for the texts without any rule keyword"""
+    shuffled = examples[:]
+    rng.shuffle(shuffled)
+    local = matched = unmatched = rules_unmatched = local_unmatched = 0
+    for fold in range(folds):
+        held_out = shuffled[fold::folds]
+        training = [example for n, example in enumerate(shuffled) if n % folds != fold] + keywords
+        model = SpecialtyModel.train([text for text, _ in training], [label for _, label in training])
+        for (specialty, _), (text, label) in zip(model.predict([text for text, _ in held_out]), held_out):
+            local += specialty == label
+            ranked = rules.rank(text)
+            matched += (ranked[0]["specialty"] if ranked else rules.default) == label
+            if not ranked:
+                unmatched += 1
+                rules_unmatched += rules.default == label
+                local_unmatched += specialty == label
+    return {
+        "examples": len(examples),
+        "folds": folds,
+        "rules_accuracy": round(matched / len(examples), 3),
+        "local_accuracy": round(local / len(examples), 3),
+        "without_rule_keywords": {
+            "examples": unmatched,
+            "rules_accuracy": round(rules_unmatched / max(1, unmatched), 3),
+            "local_accuracy": round(local_unmatched / max(1, unmatched), 3),
+        },
+    }
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    with open(Config.SYMPTOM_RULES_PATH) as f:
+        rules_json = json.load(f)
+    rules = _CompiledRules(rules_json)
+    examples = read_examples(args.data)
+    keywords = [(keyword.rstrip("*"), specialty) for specialty, words in rules_json["specialties"].items() for keyword in words]
+
+    results = {"cross_validation": cross_validate(examples, keywords, rules, args.folds, rng)}
+
+    classifier = SpecialtyClassifier()
+    classifier.path = Config.SPECIALTY_MODEL_PATH
+    started = time.perf_counter()
+    model = classifier.model()
+    results["model"] = {
+        "path": Config.SPECIALTY_MODEL_PATH,
+        "bytes": os.path.getsize(Config.SPECIALTY_MODEL_PATH),
+        "features": model.n_features,
+        "specialties": len(model.classes),
+        "covers_rule_specialties": sorted(model.classes) == sorted(rules.specialties),
+        "first_use_load_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+    texts = [text for text, _ in examples]
+    timings = []
+    for _ in range(args.repeat):
+        for text in texts:
+            started = time.perf_counter()
+            classifier.recommend(text, rules.specialties)
+            timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    results["single_text_us"] = {
+        "calls": len(timings),
+        "p50": round(timings[len(timings) // 2], 1),
+        "p99": round(timings[int(len(timings) * 0.99)], 1),
+    }
+
+    batch = [rng.choice(texts) for _ in range(args.batch)]
+    started = time.perf_counter()
+    classifier.recommend_many(batch, rules.specialties)
+    elapsed = time.perf_counter() - started
+    results["batch"] = {"texts": args.batch, "total_ms": round(elapsed * 1000, 2), "per_text_us": round(elapsed / args.batch * 1e6, 1)}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    passed = results["model"]["covers_rule_specialties"] and results["single_text_us"]["p99"] < 1000
+    return 0 if passed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure accuracy and latency of the local specialty classifier")
+    parser.add_argument("--data", type=str, default=os.path.join(BASE_DIR, "data", "symptom_training.jsonl"), help="Labelled examples (default: data/symptom_training.jsonl)")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds (default: 5)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the examples for single-text timing (default: 20)")
+    parser.add_argument("--batch", type=int, default=500, help="Texts in the batched inference run (default: 500)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
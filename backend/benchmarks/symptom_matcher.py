@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the rule-based symptom matcher.
+Times the old first-match keyword scan and the compiled single-pass matcher
+on short and long symptom texts, with the shipped rules and with a large
+synthetic rule set, and shows how both classify a few example texts. The
+old scan stops at the first keyword it finds, so long texts without any
+keyword show its full cost.
+
+Usage:
+    python -m backend.benchmarks.symptom_matcher
+    or
+    python -m backend.benchmarks.symptom_matcher --words 20000 --synthetic-specialties 200
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from backend.config import Config
+from backend.symptom_matcher import _CompiledRules
+
+FILLER = (
+    "i have been feeling unwell since last week and the pain gets worse at night "
+    "it started after work and my family doctor suggested seeing a specialist soon"
+).split()
+
+EXAMPLES = [
+    "I have chest pain and high bp",
+    "my webpage says subpar heartburn after meals",
+    "itchy skin with a red rash",
+    "blurry vision and eye strain",
+    "fever, cough and sore throat",
+    "sprained my knee, joint pain",
+    "ringing in my ears, hearing loss",
+]
+
+
+def old_recommendation(symptoms):
+    """The matcher before this change: substring checks in a fixed priority order"""
+    s = symptoms.lower()
+    if any(word in s for word in ["heart", "chest pain", "bp", "blood pressure", "cardiac"]):
+        return "Cardiologist"
+    if any(word in s for word in ["skin", "rash", "itch", "allergy", "dermatitis", "acne"]):
+        return "Dermatologist"
+    if any(word in s for word in ["headache", "seizure", "stroke", "numbness", "migraine", "neurological"]):
+        return "Neurologist"
+    if any(word in s for word in ["fever", "cold", "cough", "flu", "infection"]):
+        return "General Physician"
+    return "General Physician"
+
+
+def linear_scan(rules):
+    """The old approach generalised to any rule set: one substring scan per keyword"""
+    table = [(specialty, [k.rstrip("*").lower() for k in keywords]) for specialty, keywords in rules["specialties"].items()]
+
+    def recommend(symptoms):
+        s = symptoms.lower()
+        for specialty, keywords in table:
+            if any(keyword in s for keyword in keywords):
+                return specialty
+        return rules["default"]
+    return recommend
+
+
+def synthetic_rules(specialties, keywords, rng):
+    def word():
+        return "".join(rng.choice("bcdfghjklmnpqrstvwxyz") + rng.choice("aeiou") for _ in range(4))
+    return {
+        "default": "Specialty 0",
+        "specialties": {
+            f"Specialty {n}": {word(): rng.randint(1, 3) for _ in range(keywords)}
+            for n in range(specialties)
+        },
+    }
+
+
+def make_text(words, keywords, rng):
+    vocabulary = FILLER + [k.rstrip("*") for k in keywords]
+    return " ".join(rng.choice(FILLER) if rng.random() < 0.97 else rng.choice(vocabulary) for _ in range(words))
+
+
+def per_call_us(fn, texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return round((time.perf_counter() - started) / (repeat * len(texts)) * 1e6, 2)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    with open(Config.SYMPTOM_RULES_PATH) as f:
+        shipped = json.load(f)
+    synthetic = synthetic_rules(args.synthetic_specialties, args.synthetic_keywords, rng)
+
+    results = {"words_per_long_text": args.words}
+    for name, rules, old in (
+        ("shipped_rules", shipped, old_recommendation),
+        ("synthetic_rules", synthetic, linear_scan(synthetic)),
+    ):
+        compiled = _CompiledRules(rules)
+        keywords = [k for specialty in rules["specialties"].values() for k in specialty]
+        short_texts = [make_text(12, keywords, rng) for _ in range(200)]
+        long_texts = [make_text(args.words, keywords, rng) for _ in range(5)]
+        no_match_texts = [make_text(args.words, [], rng) for _ in range(5)]
+        started = time.perf_counter()
+        _CompiledRules(rules)
+        results[name] = {
+            "specialties": len(rules["specialties"]),
+            "keywords": len(keywords),
+            "compile_ms": round((time.perf_counter() - started) * 1000, 2),
+            "short_text": {
+                "old_us": per_call_us(old, short_texts, args.repeat),
+                "compiled_us": per_call_us(compiled.rank, short_texts, args.repeat),
+            },
+            "long_text": {
+                "old_us": per_call_us(old, long_texts, args.repeat),
+                "compiled_us": per_call_us(compiled.rank, long_texts, args.repeat),
+            },
+            "long_text_without_keywords": {
+                "old_us": per_call_us(old, no_match_texts, args.repeat),
+                "compiled_us": per_call_us(compiled.rank, no_match_texts, args.repeat),
+            },
+        }
+
+    compiled = _CompiledRules(shipped)
+    results["examples"] = [
+        {
+            "text": text,
+            "old": old_recommendation(text),
+            "new": [(match["specialty"], match["confidence"]) for match in compiled.rank(text)] or shipped["default"],
+        }
+        for text in EXAMPLES
+    ]
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old and compiled symptom matchers")
+    parser.add_argument("--words", type=int, default=5000, help="Words per long symptom text (default: 5000)")
+    parser.add_argument("--synthetic-specialties", type=int, default=100, help="Specialties in the synthetic rule set (default: 100)")
+    parser.add_argument("--synthetic-keywords", type=int, default=20, help="Keywords per synthetic specialty (default: 20)")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the texts per measurement (default: 5)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=str, help="Write the JSON results to this file")
+
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, func, insert, select
+from .extensions import db
+from .models import Appointment, AppointmentChange
+
+# Sequence numbers read per query while looking for the settled mark
+_BATCH_SIZE = 1000
+
+# appointment_changes rows are kept this long, far longer than any transaction
+_RETENTION = timedelta(hours=1)
+
+# Seconds between deletions of expired appointment_changes rows by one process
+_PRUNE_INTERVAL = 60
+
+
+class ChangeSequence:
+    """Numbers appointment changes (Appointment.change_seq) for delta sync and the event streams.
+
+    Each change takes the next seq of the appointment_changes table, so
+    writers never queue on a shared counter. Transactions can then commit
+    out of order: change 11 may be visible while change 10 is not yet.
+    Readers therefore stop at the settled mark, the highest number up to
+    which none is missing. A missing number is waited for until the change
+    numbered after it is CHANGES_SETTLE_SECONDS old (by its created_at, so
+    every process agrees, however recently it started) and then taken to
+    belong to a transaction that rolled back; a transaction that stays open
+    longer than that after changing an appointment could be missed by
+    pollers. SQLite writes one transaction at a time and rolls back
+    AUTOINCREMENT, so it has no gaps.
+    """
+
+    def __init__(self):
+        self.settle_seconds = 10.0
+        self._marks = {}  # engine -> settled mark
+        self._last_prune = time.monotonic()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.settle_seconds = app.config["CHANGES_SETTLE_SECONDS"]
+        with self._lock:
+            self._marks.clear()
+
+    def reserve(self, session, count):
+        """Take count new sequence numbers, in increasing order"""
+        now = datetime.utcnow()
+        seqs = sorted(session.execute(
+            insert(AppointmentChange).values([{"created_at": now}] * count).returning(AppointmentChange.seq)
+        ).scalars())
+        if time.monotonic() - self._last_prune >= _PRUNE_INTERVAL:
+            self._last_prune = time.monotonic()
+            session.execute(delete(AppointmentChange).where(
+                AppointmentChange.created_at < now - _RETENTION, AppointmentChange.seq < seqs[0]
+            ))
+        return seqs
+
+    def settled(self):
+        """The highest change_seq such that every change numbered up to it has committed or rolled back"""
+        engine = db.session.get_bind()
+        with self._lock:
+            mark = self._marks.get(engine)
+        if mark is None:
+            lowest = db.session.execute(select(func.min(AppointmentChange.seq))).scalar()
+            mark = lowest - 1 if lowest is not None else 0
+        # Queried without the lock, so concurrent readers don't queue behind each other's round trips
+        mark = self._advance(mark)
+        with self._lock:
+            mark = self._marks[engine] = max(mark, self._marks.get(engine, mark))
+        return mark
+
+    def _advance(self, mark):
+        settled_before = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        while True:
+            rows = db.session.execute(
+                select(AppointmentChange.seq, AppointmentChange.created_at)
+                .where(AppointmentChange.seq > mark)
+                .order_by(AppointmentChange.seq)
+                .limit(_BATCH_SIZE)
+            ).all()
+            for seq, created_at in rows:
+                # The numbers in between were taken before seq; once seq is old enough they are given up on
+                if seq > mark + 1 and created_at > settled_before:
+                    return mark
+                mark = seq
+            if len(rows) < _BATCH_SIZE:
+                return mark
+
+
+change_sequence = ChangeSequence()
+
+
+def current_change_seq():
+    """Sequence number of the latest settled appointment change (0 before the first one).
+
+    Everything numbered up to it is visible, so a reader starting from it
+    never skips a change that commits later.
+    """
+    return change_sequence.settled()
+
+
+@event.listens_for(db.session, "before_flush")
+def stamp_appointment_changes(session, flush_context, instances):
+    """Give every appointment inserted or modified in this flush a new change_seq"""
+    changed = [obj for obj in session.new if isinstance(obj, Appointment)]
+    changed += [
+        obj for obj in session.dirty
+        if isinstance(obj, Appointment) and session.is_modified(obj, include_collections=False)
+    ]
+    if not changed:
+        return
+    for seq, appointment in zip(change_sequence.reserve(session, len(changed)), changed):
+        appointment.change_seq = seq
@@ -0,0 +1,84 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+
+
+class ResponseCompressor:
+    """Compresses responses above COMPRESSION_MIN_SIZE with the client's preferred encoding.
+
+    Offers brotli (when the brotli package is installed) and gzip, honouring
+    the q-values in Accept-Encoding. Streamed responses, ranges, 304s and
+    responses that already have a Content-Encoding are left alone. A strong
+    ETag stays strong on the compressed response, with the encoding appended
+    ("<etag>-gzip"), since the bytes differ from the uncompressed ones.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 0
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        self.encodings = ("gzip",)
+
+    def init_app(self, app):
+        self.enabled = app.config["COMPRESSION_ENABLED"]
+        self.min_size = app.config["COMPRESSION_MIN_SIZE"]
+        self.gzip_level = app.config["COMPRESSION_GZIP_LEVEL"]
+        self.brotli_quality = app.config["COMPRESSION_BROTLI_QUALITY"]
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        if self.enabled:
+            app.after_request(self.compress)
+
+    def etag_variants(self, etag):
+        """The ETag of a body and of each of its compressed encodings"""
+        return [etag] + [f"{etag}-{encoding}" for encoding in ("br", "gzip")]
+
+    def encode(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def compress(self, response, cache=None):
+        """Compress response in place if worthwhile; cache maps encoding -> bytes for a body that never changes"""
+        if (
+            not self.enabled
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or "Content-Range" in response.headers
+            or response.mimetype not in COMPRESSIBLE
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        if cache is None:
+            compressed = self.encode(data, encoding)
+        else:
+            compressed = cache.get(encoding)
+            if compressed is None:
+                compressed = cache[encoding] = self.encode(data, encoding)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
+
+
+response_compressor = ResponseCompressor()
@@ -12,8 +12,90 @@ class Config:
         f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read replica for read-only routes (empty = everything uses DATABASE_URL)
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+    DB_REPLICA_PIN_SECONDS = float(os.getenv("DB_REPLICA_PIN_SECONDS", 5))  # users read from the primary this long after a write
+
+    # Connection pool (pre-ping and recycle only apply to database servers)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # seconds to wait for a free connection
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds, -1 = never
+
+    # SQLite connection pragmas (empty = SQLite's default: rollback journal, synchronous=FULL)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # readers and the writer no longer block each other
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # with WAL: no fsync per commit, still crash-safe
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))  # wait for locks before "database is locked"
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 2 ** 20))  # bytes read through mmap, 0 = off
     JWT_SECRET_KEY = SECRET_KEY
+
+    # Request metrics at /metrics (Prometheus text format) and slow request / SQL logging
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # /metrics needs "Authorization: Bearer <token>"; not served while empty
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", 200))  # 0 = don't log slow statements
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 1000))  # 0 = don't log slow requests
+
+    # On-demand profiling of single admin requests (X-Profile: 1 header or ?profile=1)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 100))  # older profiles are deleted
+    PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", 50))  # functions listed in a profile's summary
+
+    # JSON encoding ("auto" = orjson if installed, else Flask's default) and response compression
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # bytes; smaller responses go out as they are
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))  # only with the brotli package
+
+    # Appointment listings (keyset pagination)
+    APPOINTMENTS_PAGE_SIZE = int(os.getenv("APPOINTMENTS_PAGE_SIZE", 50))
+    APPOINTMENTS_MAX_PAGE_SIZE = int(os.getenv("APPOINTMENTS_MAX_PAGE_SIZE", 500))
+    CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", 10))  # delta sync waits for an uncommitted change_seq until the next one is this old
+
+    # Appointment event streams (server-sent events at /api/appointments/events)
+    EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "True").lower() == "true"
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local")  # local = this process only; database = shared by all workers
+    EVENTS_MAX_STREAMS = int(os.getenv("EVENTS_MAX_STREAMS", 50))  # open streams per process, then 503; each holds a server thread, keep it below the thread count
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))  # undelivered events per stream before it must resync
+    EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", 1))  # database backend: checks for other workers' events
+    EVENTS_RETENTION_SECONDS = int(os.getenv("EVENTS_RETENTION_SECONDS", 3600))  # database backend: rows kept this long
+    EVENTS_TOKEN_SECONDS = int(os.getenv("EVENTS_TOKEN_SECONDS", 60))  # stream tokens open a stream within this long
+
+    # Availability grid limits per request
+    AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", 62))
+    AVAILABILITY_MAX_DOCTORS = int(os.getenv("AVAILABILITY_MAX_DOCTORS", 500))
+
+    # In-process availability cache (doctors kept in memory, 0 = disabled)
+    AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", 1000))
+    # How stale a cached schedule may get before it is re-checked against the DB
+    AVAILABILITY_CACHE_VERIFY_SECONDS = float(os.getenv("AVAILABILITY_CACHE_VERIFY_SECONDS", 1))
     
+    # Cached doctor directory: how often to re-check its version against the DB
+    DOCTOR_DIRECTORY_VERIFY_SECONDS = float(os.getenv("DOCTOR_DIRECTORY_VERIFY_SECONDS", 1))
+
+    # Rule-based symptom matcher (reloaded when the file changes)
+    SYMPTOM_RULES_PATH = os.getenv("SYMPTOM_RULES_PATH", os.path.join(BASE_DIR, "data", "symptom_rules.json"))
+    SYMPTOM_RULES_RELOAD_SECONDS = float(os.getenv("SYMPTOM_RULES_RELOAD_SECONDS", 2))
+
+    # Local specialty classifier (trained with train_classifier.py, loaded on first use)
+    SPECIALTY_MODEL_PATH = os.getenv("SPECIALTY_MODEL_PATH", os.path.join(BASE_DIR, "data", "specialty_model.npz"))
+    SPECIALTY_MODEL_MIN_CONFIDENCE = float(os.getenv("SPECIALTY_MODEL_MIN_CONFIDENCE", 0.3))  # below this the rules answer
+
+    # Streaming appointment export: rows fetched from the server-side cursor at a time
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+    # Bulk doctor import: rows per transaction
+    DOCTOR_IMPORT_CHUNK_SIZE = int(os.getenv("DOCTOR_IMPORT_CHUNK_SIZE", 500))
+
+    # Password hashing (bcrypt work factor; logins rehash older hashes to it)
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))  # 0 = hash on the request thread
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))  # queued hashes before answering 503
+
     # Email configuration
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
     MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
@@ -21,6 +103,31 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME", "")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "")
+
+    # Email outbox: notifications are queued in the DB and sent by background workers
+    OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 2))  # threads start_workers() runs in the serving process; 0 = none
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 5))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+    OUTBOX_RETRY_BASE = int(os.getenv("OUTBOX_RETRY_BASE", 30))  # seconds
+    OUTBOX_RETRY_MAX = int(os.getenv("OUTBOX_RETRY_MAX", 3600))
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+    OUTBOX_SMTP_TIMEOUT = float(os.getenv("OUTBOX_SMTP_TIMEOUT", 30))
     
     # OpenAI configuration
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
\ No newline at end of file
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")  # any OpenAI-compatible endpoint; empty = api.openai.com
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 5))  # seconds per call, no retries
+    OPENAI_CACHE_SIZE = int(os.getenv("OPENAI_CACHE_SIZE", 1024))  # cached answers, 0 = disabled
+    OPENAI_CACHE_TTL_SECONDS = float(os.getenv("OPENAI_CACHE_TTL_SECONDS", 3600))
+    OPENAI_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", 3))  # consecutive failures before skipping the API
+    OPENAI_BREAKER_RESET_SECONDS = float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", 30))
+    OPENAI_BATCH_CONCURRENCY = int(os.getenv("OPENAI_BATCH_CONCURRENCY", 8))  # parallel API calls per process for batches
+
+    # Batch symptom recommendations
+    AI_BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", 500))
+    AI_BATCH_DEADLINE_SECONDS = float(os.getenv("AI_BATCH_DEADLINE_SECONDS", 10))  # then remaining items use the rules
+    AI_BATCH_ROLES = os.getenv("AI_BATCH_ROLES", "admin,doctor,kiosk").split(",")  # account roles allowed to send batches
+    AI_BATCH_OPENAI_ITEMS = int(os.getenv("AI_BATCH_OPENAI_ITEMS", 2000))  # openai batch texts per account per window, 0 = no limit
+    AI_BATCH_BUDGET_WINDOW_SECONDS = float(os.getenv("AI_BATCH_BUDGET_WINDOW_SECONDS", 3600))
\ No newline at end of file
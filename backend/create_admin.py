@@ -23,7 +23,7 @@ from backend.extensions import db
 
 def create_admin_user(email, password, name="Admin"):
     """Create an admin user in the database"""
-    app = create_app()
+    app = create_app({"OUTBOX_WORKERS": 0})
     
     with app.app_context():
         # Check if admin already exists
@@ -0,0 +1,89 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from .extensions import db
+from .replica import REPLICA_BIND
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def _is_memory(url):
+    return url.database in (None, "", ":memory:") or url.database.startswith("file::memory:")
+
+
+def engine_options(config, url=None):
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_* / SQLITE_* settings.
+
+    Connection pool sizing applies to every file or server database; pre-ping
+    and recycle only to servers (a SQLite connection cannot go stale). Options
+    already set in SQLALCHEMY_ENGINE_OPTIONS win.
+    """
+    url = make_url(url or config["SQLALCHEMY_DATABASE_URI"])
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        # pysqlite's own lock wait, the same limit as PRAGMA busy_timeout
+        options["connect_args"] = {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}
+        if _is_memory(url):
+            # Flask-SQLAlchemy keeps in-memory databases on a single static connection
+            return {**options, **config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+    else:
+        options["pool_pre_ping"] = config["DB_POOL_PRE_PING"]
+        options["pool_recycle"] = config["DB_POOL_RECYCLE"]
+    options["pool_size"] = config["DB_POOL_SIZE"]
+    options["max_overflow"] = config["DB_MAX_OVERFLOW"]
+    options["pool_timeout"] = config["DB_POOL_TIMEOUT"]
+    return {**options, **config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+
+
+def engine_binds(config):
+    """SQLALCHEMY_BINDS with the read replica (DATABASE_REPLICA_URL) added, if one is configured"""
+    binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+    replica_url = config["DATABASE_REPLICA_URL"]
+    if replica_url and REPLICA_BIND not in binds:
+        binds[REPLICA_BIND] = {"url": replica_url, **engine_options(config, replica_url)}
+    return binds
+
+
+def sqlite_pragmas(config):
+    """PRAGMA statements run on every new SQLite connection; empty settings keep SQLite's default"""
+    journal_mode = config["SQLITE_JOURNAL_MODE"].upper()
+    synchronous = config["SQLITE_SYNCHRONOUS"].upper()
+    if journal_mode and journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of: {', '.join(JOURNAL_MODES)}")
+    if synchronous and synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of: {', '.join(SYNCHRONOUS_MODES)}")
+
+    pragmas = []
+    if journal_mode:
+        pragmas.append(f"PRAGMA journal_mode={journal_mode}")
+    if synchronous:
+        pragmas.append(f"PRAGMA synchronous={synchronous}")
+    pragmas.append(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    if config["SQLITE_MMAP_SIZE"]:
+        pragmas.append(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+    return pragmas
+
+
+def configure_engine(app):
+    """Apply the SQLite pragmas to each connection the app's engines (primary and replica) open.
+
+    journal_mode is stored in the database file, so WAL stays on for other
+    tools too; the other pragmas only last for the connection.
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            _set_pragmas_on_connect(engine, sqlite_pragmas(app.config))
+
+
+def _set_pragmas_on_connect(engine, pragmas):
+    if _is_memory(engine.url):
+        pragmas = [pragma for pragma in pragmas if not pragma.startswith("PRAGMA journal_mode")]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
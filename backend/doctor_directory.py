@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from flask import current_app, request
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from .extensions import db
+from .models import User, DoctorProfile, CacheVersion
+from .compression import response_compressor
+from .serializers import SHAPES
+
+DIRECTORY_VERSION = "doctor_directory"
+DIRECTORY_COLUMNS = ("id", "name", "email", "specialty", "rating")
+
+
+def bump_directory_version():
+    """Increment the directory version in the current transaction (call from any route that changes doctors)"""
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    table = CacheVersion.__table__
+    # An upsert, so two first writers don't both try to insert the row
+    db.session.execute(
+        dialect.insert(table)
+        .values(name=DIRECTORY_VERSION, version=1)
+        .on_conflict_do_update(index_elements=[table.c.name], set_={"version": table.c.version + 1})
+    )
+
+
+def current_directory_version():
+    return db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == DIRECTORY_VERSION)
+    ).scalar() or 0
+
+
+def directory_rows():
+    return db.session.execute(
+        select(User.id, User.name, User.email, DoctorProfile.specialty, DoctorProfile.rating)
+        .join(DoctorProfile, DoctorProfile.user_id == User.id)
+        .where(User.role == "doctor")
+        .order_by(User.id)
+    ).all()
+
+
+def serialize_directory(rows=None, shape="objects"):
+    rows = directory_rows() if rows is None else rows
+    if shape == "columns":
+        return {"columns": list(DIRECTORY_COLUMNS), "rows": [list(row) for row in rows]}
+    return [dict(zip(DIRECTORY_COLUMNS, row)) for row in rows]
+
+
+class _Body:
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.compressed = {}  # encoding -> bytes, filled on first request
+
+
+class _Snapshot:
+    def __init__(self, version, rows):
+        self.version = version
+        json = current_app.json
+        self.bodies = {shape: _Body(json.response(serialize_directory(rows, shape)).get_data()) for shape in SHAPES}
+        self.checked_at = time.monotonic()
+
+
+class DoctorDirectory:
+    """Pre-serialized `/api/doctors/` response, rebuilt only when the directory version changes.
+
+    The version is re-read from the database at most every
+    DOCTOR_DIRECTORY_VERIFY_SECONDS, so changes made through other worker
+    processes show up within that time; changes made in this process clear
+    the snapshot immediately. The ETag is a hash of the body, so it is strong
+    and identical across processes. Each shape of the response, and each
+    compressed encoding of it, is built once per snapshot.
+    """
+
+    def __init__(self):
+        self.verify_seconds = 0.0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.verify_seconds = app.config["DOCTOR_DIRECTORY_VERIFY_SECONDS"]
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.checked_at < self.verify_seconds:
+            return snapshot
+
+        # Read the version first so a concurrent change makes the snapshot look stale, never fresh
+        version = current_directory_version()
+        if snapshot is not None and snapshot.version == version:
+            snapshot.checked_at = time.monotonic()
+            return snapshot
+
+        snapshot = _Snapshot(version, directory_rows())
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def response(self, shape="objects"):
+        """200 with the cached body, or 304 if the client's If-None-Match is current.
+
+        The ETag of any encoding of the current body counts as current: the
+        client only keeps the decoded content, whichever encoding it came in.
+        """
+        body = self._current().bodies[shape]
+        response = current_app.response_class(body.body, mimetype=current_app.json.mimetype)
+        response.set_etag(body.etag)
+        response.cache_control.no_cache = True  # browsers keep it but revalidate every time
+        response = response_compressor.compress(response, cache=body.compressed)
+        if any(request.if_none_match.contains_weak(etag) for etag in response_compressor.etag_variants(body.etag)):
+            not_modified = current_app.response_class(status=304)
+            not_modified.headers["ETag"] = response.headers["ETag"]
+            not_modified.vary.update(response.vary)
+            not_modified.cache_control.no_cache = True
+            return not_modified
+        return response
+
+
+doctor_directory = DoctorDirectory()
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from .extensions import db
+from .models import User, DoctorProfile, ScheduleVersion
+from .passwords import password_hasher
+from .doctor_directory import doctor_directory, bump_directory_version
+from .serializers import IN_CLAUSE_CHUNK
+
+REQUIRED_FIELDS = ("name", "email", "password", "specialty")
+FORMATS = ("csv", "ndjson")
+
+
+def read_rows(stream, fmt):
+    """(line number, row dict or error message) for each record of a binary stream.
+
+    The stream is decoded and parsed as it is read, so a large upload is never
+    held in memory as a whole. Input that can't be decoded ends the rows with
+    an error for the line it was found on.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="" if fmt == "csv" else None)
+    line_number = 0
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                line_number = reader.line_num
+                yield line_number, row
+            return
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield line_number + 1, f"Unreadable input, import stopped here: {e}"
+
+
+def clean_row(row):
+    """(doctor fields, None) or (None, error message), with the same rules as create_doctor"""
+    if not isinstance(row, dict):
+        return None, row
+    values = {field: str(row.get(field) or "").strip() for field in REQUIRED_FIELDS}
+    missing = [field for field in REQUIRED_FIELDS if not values[field]]
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+    values["password"] = str(row["password"])  # passwords are not stripped
+    try:
+        values["experience_years"] = int(row.get("experience_years") or 0)
+        values["rating"] = float(row.get("rating") or 0.0)
+    except (TypeError, ValueError):
+        return None, "experience_years must be an integer and rating a number"
+    return values, None
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+
+    def error(self, line, email, message):
+        self.errors.append({"row": line, "email": email or None, "message": message})
+
+    def to_dict(self):
+        errors = sorted(self.errors, key=lambda error: error["row"])
+        return {"rows": self.rows, "created": self.created, "failed": len(errors), "errors": errors}
+
+
+def _email_chunks(emails):
+    for start in range(0, len(emails), IN_CLAUSE_CHUNK):
+        yield emails[start:start + IN_CLAUSE_CHUNK]
+
+
+def _existing_emails(emails):
+    taken = set()
+    for chunk in _email_chunks(emails):
+        taken.update(db.session.scalars(select(User.email).where(User.email.in_(chunk))))
+    return taken
+
+
+def _user_ids(emails):
+    user_ids = {}
+    for chunk in _email_chunks(emails):
+        user_ids.update(db.session.execute(select(User.email, User.id).where(User.email.in_(chunk))).all())
+    return user_ids
+
+
+def _insert_chunk(chunk, report):
+    """Insert one chunk of validated rows in a single transaction.
+
+    Emails registered in the meantime by someone else make the insert fail on
+    the unique constraint; those rows are reported and the rest retried.
+    """
+    if not chunk:
+        return
+    taken = _existing_emails([values["email"] for _, values in chunk])
+    pending = []
+    for line, values in chunk:
+        if values["email"] in taken:
+            report.error(line, values["email"], "Email already registered")
+        else:
+            pending.append((line, values))
+    db.session.rollback()  # release the connection while hashing
+    hashes = password_hasher.hash_many([values["password"] for _, values in pending])
+    pending = [(line, values, password_hash) for (line, values), password_hash in zip(pending, hashes)]
+
+    while pending:
+        try:
+            db.session.execute(insert(User), [
+                {"name": values["name"], "email": values["email"], "password_hash": password_hash, "role": "doctor"}
+                for _, values, password_hash in pending
+            ])
+            # Not RETURNING: keeping it in parameter order makes SQLite insert row by row
+            user_ids = _user_ids([values["email"] for _, values, _ in pending])
+            db.session.execute(insert(DoctorProfile), [
+                {
+                    "user_id": user_ids[values["email"]],
+                    "specialty": values["specialty"],
+                    "experience_years": values["experience_years"],
+                    "rating": values["rating"],
+                }
+                for _, values, _ in pending
+            ])
+            # Bookings lock this row, so it must exist before the first one
+            db.session.execute(insert(ScheduleVersion), [{"doctor_id": user_id, "version": 0} for user_id in user_ids.values()])
+            bump_directory_version()
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            taken = _existing_emails([values["email"] for _, values, _ in pending])
+            if not taken:  # not a duplicate email: give up on the chunk
+                for line, values, _ in pending:
+                    report.error(line, values["email"], f"Could not be inserted: {e.orig}")
+                return
+            for line, values, _ in pending:
+                if values["email"] in taken:
+                    report.error(line, values["email"], "Email already registered")
+            pending = [item for item in pending if item[1]["email"] not in taken]
+            continue
+        report.created += len(pending)
+        return
+
+
+def import_doctors(rows, chunk_size=500):
+    """Create doctors from (line number, row) pairs, chunk_size rows per transaction.
+
+    Rows are validated and checked against registered emails (one query per
+    IN_CLAUSE_CHUNK emails) and against earlier rows of the same import;
+    passwords are hashed on the password pool; each chunk is inserted with
+    one multi-row INSERT per table. Bad rows are skipped and reported, the
+    others are created. Returns an ImportReport.
+    """
+    report = ImportReport()
+    first_seen = {}
+    chunk = []
+    for line, row in rows:
+        report.rows += 1
+        values, message = clean_row(row)
+        if message:
+            report.error(line, row.get("email") if isinstance(row, dict) else None, message)
+            continue
+        if values["email"] in first_seen:
+            report.error(line, values["email"], f"Duplicate email (first on row {first_seen[values['email']]})")
+            continue
+        first_seen[values["email"]] = line
+        chunk.append((line, values))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, report)
+            chunk = []
+    _insert_chunk(chunk, report)
+
+    if report.created:
+        doctor_directory.clear()
+    return report
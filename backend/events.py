@@ -0,0 +1,328 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from flask import current_app
+from sqlalchemy import delete, event, select
+from .extensions import db
+from .models import AppointmentEvent
+from .changes import current_change_seq
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("booked", "cancelled", "status")
+
+# session.info key for the events of a transaction that has not committed yet
+_PENDING = "appointment_events"
+
+# Rows read from appointment_events per query
+_BATCH_SIZE = 1000
+
+# Seconds between deletions of expired appointment_events rows
+_PRUNE_INTERVAL = 60
+
+
+def event_payload(type, appointment_id, patient_id, doctor_id, start_time, end_time, status, change_seq):
+    return {
+        "type": type,
+        "seq": change_seq,
+        "appointment": {
+            "id": appointment_id,
+            "patient_id": patient_id,
+            "doctor_id": doctor_id,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "status": status,
+        },
+    }
+
+
+class Subscription:
+    """One open event stream: the events for one user, oldest first.
+
+    The queue is bounded. A client that falls EVENTS_QUEUE_SIZE events
+    behind is marked overflowed and told to resync instead.
+    """
+
+    def __init__(self, key, max_queued):
+        self.key = key
+        self.overflowed = False
+        self._events = queue.Queue(max_queued)
+
+    def put(self, payload):
+        try:
+            self._events.put_nowait(payload)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalEventBackend:
+    """Hands events to the streams of this process once the transaction commits.
+
+    Streams served by other worker processes never see them, so this is for
+    a single worker process (and for tests).
+    """
+
+    def __init__(self, hub, app):
+        self.hub = hub
+
+    def stage(self, session, type, appointment):
+        session.info.setdefault(_PENDING, []).append(event_payload(
+            type, appointment.id, appointment.patient_id, appointment.doctor_id,
+            appointment.start_time, appointment.end_time, appointment.status, appointment.change_seq,
+        ))
+
+    def committed(self, session):
+        for payload in session.info.pop(_PENDING, ()):
+            self.hub.dispatch(payload)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class DatabaseEventBackend:
+    """Shares events between worker processes through the appointment_events table.
+
+    Each event is inserted in the transaction that made the change. One
+    thread per process reads the rows past the last change_seq it has seen,
+    every EVENTS_POLL_SECONDS and right after commits made in this process.
+    The database therefore sees two small queries per process per interval,
+    however many streams are open. It reads no further than the settled
+    change_seq (see changes.py), so it never skips an event that commits late.
+    """
+
+    def __init__(self, hub, app):
+        self.hub = hub
+        self.app = app
+        self.poll_seconds = app.config["EVENTS_POLL_SECONDS"]
+        self.retention = timedelta(seconds=app.config["EVENTS_RETENTION_SECONDS"])
+        self._last_seq = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def stage(self, session, type, appointment):
+        session.add(AppointmentEvent(
+            change_seq=appointment.change_seq,
+            type=type,
+            appointment_id=appointment.id,
+            patient_id=appointment.patient_id,
+            doctor_id=appointment.doctor_id,
+            start_time=appointment.start_time,
+            end_time=appointment.end_time,
+            status=appointment.status,
+        ))
+        session.info[_PENDING] = True
+
+    def committed(self, session):
+        if session.info.pop(_PENDING, None):
+            self._wakeup.set()
+
+    def start(self):
+        """Start the reader thread, from the changes committed after now"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            with self.app.app_context():
+                self._last_seq = current_change_seq()
+            self._thread = threading.Thread(target=self._run, name="appointment-events", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def deliver(self):
+        """Dispatch every event committed since the last call; returns how many"""
+        delivered = 0
+        settled = current_change_seq()
+        while True:
+            rows = db.session.execute(
+                select(AppointmentEvent)
+                .where(AppointmentEvent.change_seq > self._last_seq, AppointmentEvent.change_seq <= settled)
+                .order_by(AppointmentEvent.change_seq, AppointmentEvent.id)
+                .limit(_BATCH_SIZE)
+            ).scalars().all()
+            for row in rows:
+                self.hub.dispatch(event_payload(
+                    row.type, row.appointment_id, row.patient_id, row.doctor_id,
+                    row.start_time, row.end_time, row.status, row.change_seq,
+                ))
+            if rows:
+                self._last_seq = rows[-1].change_seq
+            delivered += len(rows)
+            if len(rows) < _BATCH_SIZE:
+                return delivered
+
+    def prune(self):
+        db.session.execute(delete(AppointmentEvent).where(AppointmentEvent.created_at < datetime.utcnow() - self.retention))
+        db.session.commit()
+
+    def _run(self):
+        last_prune = time.monotonic()
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.deliver()
+                    if time.monotonic() - last_prune >= _PRUNE_INTERVAL:
+                        self.prune()
+                        last_prune = time.monotonic()
+            except Exception:
+                logger.exception("Appointment event reader error")
+            self._wakeup.wait(self.poll_seconds)
+
+
+BACKENDS = {"local": LocalEventBackend, "database": DatabaseEventBackend}
+
+
+class AppointmentEvents:
+    """Pub/sub for appointment changes, behind the streams at /api/appointments/events.
+
+    The booking routes publish() before they commit. The event goes out
+    after the commit (or is dropped on rollback) to every open stream of the
+    appointment's patient and doctor. Streams only wait on their own queue:
+    an idle one costs a blocked server thread and a heartbeat every
+    EVENTS_HEARTBEAT_SECONDS, never a database query or connection. Since
+    each stream holds a thread, at most EVENTS_MAX_STREAMS are open per
+    process; it must stay below the server's threads per process.
+
+    EventSource can't send an Authorization header, so streams are opened
+    with a stream token instead of the access token: signed for this one
+    purpose and valid for EVENTS_TOKEN_SECONDS.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.max_streams = 0
+        self.heartbeat_seconds = 15.0
+        self.queue_size = 100
+        self.token_seconds = 60
+        self.backend = None
+        self._signer = None
+        self._subscriptions = {}  # (role, user_id) -> set of Subscription
+        self._streams = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        name = app.config["EVENTS_BACKEND"]
+        if name not in BACKENDS:
+            raise ValueError(f"EVENTS_BACKEND must be one of: {', '.join(BACKENDS)}")
+        if self.backend is not None:
+            self.backend.stop()
+        self.enabled = app.config["EVENTS_ENABLED"]
+        self.max_streams = app.config["EVENTS_MAX_STREAMS"]
+        self.heartbeat_seconds = app.config["EVENTS_HEARTBEAT_SECONDS"]
+        self.queue_size = app.config["EVENTS_QUEUE_SIZE"]
+        self.token_seconds = app.config["EVENTS_TOKEN_SECONDS"]
+        self._signer = URLSafeTimedSerializer(app.config["SECRET_KEY"], salt="appointment-events")
+        self.backend = BACKENDS[name](self, app)
+        with self._lock:
+            self._subscriptions.clear()
+            self._streams = 0
+
+    @property
+    def streams(self):
+        return self._streams
+
+    def publish(self, type, appointment):
+        """Queue an event about appointment for when the current transaction commits"""
+        if not self.enabled:
+            return
+        db.session.flush()  # assigns the appointment's id and change_seq
+        self.backend.stage(db.session, type, appointment)
+
+    def stream_token(self, role, user_id):
+        """A token that only opens the user's event stream"""
+        return self._signer.dumps([role, user_id])
+
+    def token_identity(self, token):
+        """(role, user_id) of a stream token, or None if it is invalid or older than EVENTS_TOKEN_SECONDS"""
+        try:
+            role, user_id = self._signer.loads(token, max_age=self.token_seconds)
+        except (BadSignature, TypeError, ValueError):
+            return None
+        return role, user_id
+
+    def subscribe(self, role, user_id):
+        """Open a stream for one user; None when EVENTS_MAX_STREAMS are already open"""
+        self.backend.start()
+        subscription = Subscription((role, user_id), self.queue_size)
+        with self._lock:
+            if self._streams >= self.max_streams:
+                return None
+            self._subscriptions.setdefault(subscription.key, set()).add(subscription)
+            self._streams += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.key)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.key]
+            self._streams -= 1
+
+    def dispatch(self, payload):
+        appointment = payload["appointment"]
+        keys = (("patient", appointment["patient_id"]), ("doctor", appointment["doctor_id"]))
+        with self._lock:
+            targets = [s for key in keys for s in self._subscriptions.get(key, ())]
+        for subscription in targets:
+            subscription.put(payload)
+
+    def stream(self, subscription):
+        """The text/event-stream body for a subscription.
+
+        Each event's id is its change_seq. A comment line goes out when
+        nothing happened for EVENTS_HEARTBEAT_SECONDS, which keeps proxies
+        from closing the connection and lets the server notice clients that
+        went away. An overflowed subscription gets a `resync` event and the
+        stream ends.
+        """
+        dumps = current_app.json.dumps
+        heartbeat = self.heartbeat_seconds
+
+        def generate():
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            while True:
+                payload = subscription.get(heartbeat)
+                if subscription.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                if payload is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"id: {payload['seq']}\nevent: {payload['type']}\ndata: {dumps(payload)}\n\n"
+
+        return generate()
+
+
+appointment_events = AppointmentEvents()
+
+
+@event.listens_for(db.session, "after_commit")
+def send_committed_events(session):
+    if appointment_events.backend is not None:
+        appointment_events.backend.committed(session)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def drop_rolled_back_events(session, previous_transaction):
+    session.info.pop(_PENDING, None)
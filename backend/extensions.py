@@ -1,11 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_mail import Mail
+from .replica import ReplicaSession
 
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+db = SQLAlchemy(session_options={"class_": ReplicaSession})  # read-only routes may use the replica
 jwt = JWTManager()
 cors = CORS()
 mail = Mail()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script to create many doctor accounts from a CSV or NDJSON file.
+Columns / keys: name, email, password, specialty, and optionally
+experience_years and rating. Rows with errors are skipped and listed; the
+others are created.
+
+Usage:
+    python import_doctors.py doctors.csv
+    or
+    python import_doctors.py doctors.ndjson --chunk-size 1000 --report import_errors.json
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.doctor_import import read_rows, import_doctors, FORMATS
+from backend.passwords import password_hasher
+
+
+def run(args):
+    fmt = args.format or ("csv" if args.file.endswith(".csv") else "ndjson")
+    app = create_app({"OUTBOX_WORKERS": 0})
+
+    with app.app_context():
+        started = time.perf_counter()
+        with open(args.file, "rb") as f:
+            report = import_doctors(read_rows(f, fmt), args.chunk_size or app.config["DOCTOR_IMPORT_CHUNK_SIZE"])
+        elapsed = time.perf_counter() - started
+    password_hasher.shutdown()
+
+    print(f"✅ Created {report.created} of {report.rows} doctors in {elapsed:.1f}s")
+    if report.errors:
+        print(f"❌ {len(report.errors)} rows skipped:")
+        for error in report.errors[:20]:
+            print(f"   row {error['row']} ({error['email']}): {error['message']}")
+        if len(report.errors) > 20:
+            print(f"   ... and {len(report.errors) - 20} more")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report.to_dict(), f, indent=2)
+        print(f"📝 Report written to {args.report}")
+    return 0 if not report.errors else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-create doctor accounts from CSV or NDJSON")
+    parser.add_argument("file", help="CSV or NDJSON file with one doctor per row")
+    parser.add_argument("--format", choices=FORMATS, help="File format (default: from the file extension)")
+    parser.add_argument("--chunk-size", type=int, help="Rows per transaction (default: DOCTOR_IMPORT_CHUNK_SIZE)")
+    parser.add_argument("--report", type=str, help="Write the full report as JSON to this file")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
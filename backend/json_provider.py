@@ -0,0 +1,58 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: Flask's own encoder is used instead
+    orjson = None
+
+PROVIDERS = ("auto", "orjson", "default")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask's JSON provider with orjson doing the encoding and decoding.
+
+    Responses decode to the same values as with the default provider:
+    types orjson has no native form for (datetimes, which Flask sends as
+    HTTP dates, Decimal, objects with __html__) go through Flask's default
+    hook, and anything orjson refuses, such as integers above 64 bits,
+    falls back to the standard library. Non-ASCII text is sent as UTF-8
+    instead of \\u escapes.
+    """
+
+    def _encode(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        body = None if kwargs else self._encode(obj)
+        return super().dumps(obj, **kwargs) if body is None else body.decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return super().loads(s, **kwargs) if kwargs else orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self._encode(obj, indent)
+        if body is None:
+            return super().response(obj)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def json_provider(app):
+    """The JSON provider named by JSON_PROVIDER ("auto" = orjson when it is installed)"""
+    name = app.config["JSON_PROVIDER"]
+    if name not in PROVIDERS:
+        raise ValueError(f"JSON_PROVIDER must be one of: {', '.join(PROVIDERS)}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON_PROVIDER=orjson needs the orjson package")
+    if name == "default" or orjson is None:
+        return DefaultJSONProvider(app)
+    return OrjsonProvider(app)
@@ -0,0 +1,287 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from .symptom_matcher import split_words
+
+logger = logging.getLogger(__name__)
+
+PROMPT = """Based on the following symptoms, recommend the most appropriate medical specialty:
+Symptoms: {symptoms}
+
+Choose from: {specialties}
+
+Respond with only the specialty name."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After OPENAI_BREAKER_FAILURES consecutive failures the breaker opens and
+    `allow()` refuses calls for OPENAI_BREAKER_RESET_SECONDS. Then a single
+    trial call is let through: success closes the breaker, failure opens it
+    again for another period. Opening and closing are logged.
+    """
+
+    def __init__(self, failures=3, reset_seconds=30.0, name="OpenAI API"):
+        self.name = name
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_running = True
+            return True
+
+    def success(self):
+        with self._lock:
+            was_open = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+        if was_open:
+            logger.info("%s circuit breaker closed", self.name)
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            opened = self._trial_running or self._failures >= self.max_failures
+            if opened:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+            failures = self._failures
+        if opened:
+            logger.warning(
+                "%s circuit breaker open for %ss after %d consecutive failures", self.name, self.reset_seconds, failures
+            )
+
+
+class ItemBudget:
+    """How many items each identity may use per fixed window of window_seconds.
+
+    Kept per process; items=0 means no limit.
+    """
+
+    def __init__(self, items=0, window_seconds=3600.0):
+        self.items = items
+        self.window_seconds = window_seconds
+        self._used = {}  # identity -> (window start, items used)
+        self._lock = threading.Lock()
+
+    def take(self, identity, count):
+        """Use count items; returns 0 if granted, else the seconds until the window resets"""
+        if not self.items:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            start, used = self._used.get(identity, (now, 0))
+            if now - start >= self.window_seconds:
+                start, used = now, 0
+            if used + count > self.items:
+                return max(start + self.window_seconds - now, 1)
+            self._used[identity] = (start, used + count)
+            if len(self._used) > 10000:
+                self._used = {
+                    key: value for key, value in self._used.items()
+                    if now - value[0] < self.window_seconds
+                }
+            return 0
+
+
+class _TTLCache:
+    """Bounded LRU mapping whose entries expire after ttl seconds"""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """(True, value) for a fresh entry, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LLMRecommender:
+    """Specialty recommendations from an OpenAI-compatible chat completions API.
+
+    One client is kept for the life of the process, so its HTTP connections
+    are reused, and every call is bounded by OPENAI_TIMEOUT with no retries:
+    a stalled API costs a request at most that long. Answers are cached per
+    normalized symptom text (OPENAI_CACHE_SIZE entries for
+    OPENAI_CACHE_TTL_SECONDS) and a circuit breaker skips the API entirely
+    while it keeps failing. `recommend()` returns None whenever there is no
+    usable answer and the caller should fall back to the rule-based matcher.
+    `recommend_many()` runs up to OPENAI_BATCH_CONCURRENCY calls at once on
+    a shared thread pool; `budget` caps the batch items each user may send
+    to the API (AI_BATCH_OPENAI_ITEMS per AI_BATCH_BUDGET_WINDOW_SECONDS).
+    """
+
+    def __init__(self):
+        self.api_key = ""
+        self.base_url = None
+        self.model = "gpt-3.5-turbo"
+        self.timeout = 5.0
+        self.concurrency = 8
+        self.cache = _TTLCache(0, 0)
+        self.breaker = CircuitBreaker()
+        self.budget = ItemBudget()
+        self._client = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.close()
+        self.api_key = app.config["OPENAI_API_KEY"]
+        self.base_url = app.config["OPENAI_BASE_URL"] or None
+        self.model = app.config["OPENAI_MODEL"]
+        self.timeout = app.config["OPENAI_TIMEOUT"]
+        self.concurrency = app.config["OPENAI_BATCH_CONCURRENCY"]
+        self.cache = _TTLCache(app.config["OPENAI_CACHE_SIZE"], app.config["OPENAI_CACHE_TTL_SECONDS"])
+        self.breaker = CircuitBreaker(app.config["OPENAI_BREAKER_FAILURES"], app.config["OPENAI_BREAKER_RESET_SECONDS"])
+        self.budget = ItemBudget(app.config["AI_BATCH_OPENAI_ITEMS"], app.config["AI_BATCH_BUDGET_WINDOW_SECONDS"])
+
+    @property
+    def enabled(self):
+        return bool(self.api_key)
+
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if client is not None:
+            client.close()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    timeout=self.timeout,
+                    max_retries=0,
+                )
+            return self._client
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="openai")
+            return self._pool
+
+    @staticmethod
+    def _key(symptoms, specialties):
+        return " ".join(split_words(symptoms)), specialties
+
+    def recommend(self, symptoms, specialties):
+        if not self.enabled:
+            return None
+        specialties = tuple(specialties)
+        key = self._key(symptoms, specialties)
+        hit, specialty = self.cache.get(key)
+        if hit:
+            return specialty
+        if not self.breaker.allow():
+            logger.debug("OpenAI circuit breaker is open, falling back to the rules")
+            return None
+
+        try:
+            response = self.client().chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": PROMPT.format(symptoms=symptoms, specialties=", ".join(specialties))}],
+                max_tokens=50,
+            )
+            answer = (response.choices[0].message.content or "").strip()
+        except Exception as e:
+            self.breaker.failure()
+            logger.warning("OpenAI API error, falling back to the rules: %s", e)
+            return None
+        self.breaker.success()
+
+        # An answer outside the list is cached too: asking again would not change it
+        specialty = answer if answer in specialties else None
+        self.cache.set(key, specialty)
+        return specialty
+
+    def recommend_many(self, texts, specialties, deadline):
+        """(specialty or None per text, number of texts not answered within deadline seconds).
+
+        Cached and duplicate texts (after normalization) are not sent again.
+        Calls still running at the deadline are abandoned, not interrupted:
+        they finish within OPENAI_TIMEOUT and still fill the cache.
+        """
+        if not self.enabled:
+            return [None] * len(texts), 0
+        specialties = tuple(specialties)
+        keys = [self._key(text, specialties) for text in texts]
+        answers = {}
+        pending = {}
+        for text, key in zip(texts, keys):
+            if key in answers or key in pending:
+                continue
+            hit, specialty = self.cache.get(key)
+            if hit:
+                answers[key] = specialty
+            else:
+                pending[key] = text
+
+        late = set()
+        if pending:
+            executor = self._executor()
+            futures = {executor.submit(self.recommend, text, specialties): key for key, text in pending.items()}
+            done, not_done = wait(futures, timeout=deadline)
+            for future in not_done:
+                future.cancel()
+                late.add(futures[future])
+            for future in done:
+                answers[futures[future]] = future.result()
+        return [answers.get(key) for key in keys], sum(key in late for key in keys)
+
+
+llm_recommender = LLMRecommender()
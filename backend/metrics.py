@@ -0,0 +1,199 @@
+import bisect
+import hmac
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# [statements, seconds in SQL] of the current request; a context variable
+# rather than flask.g because the cursor events run once per statement
+_sql_usage = ContextVar("sql_usage", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.labels, labels)} {_number(value)}" for labels, value in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._values = {}  # labels -> [count per bucket (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        names = self.labels + ("le",)
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class RequestMetrics:
+    """Per-endpoint request latency and SQL accounting, served at /metrics in Prometheus text format.
+
+    Each request counts its SQL statements and their time through engine
+    events; at the end both go into per-endpoint histograms along with the
+    request latency. Statements slower than SQL_SLOW_QUERY_MS and requests
+    slower than SLOW_REQUEST_MS are logged as warnings. The cost is a few
+    dict updates under a lock per request and two clock reads per statement.
+
+    Requests are recorded when their context is torn down, so ones that end
+    in an unhandled exception are counted too, as 500s. /metrics is only
+    served when METRICS_TOKEN is set, and needs it as a bearer token.
+
+    Values are kept per process; with several worker processes, scrape each
+    one (or run one process) to see everything. Streamed responses are timed
+    until their headers go out, not until the body finishes.
+    """
+
+    def __init__(self):
+        self.slow_query_seconds = 0.0
+        self.slow_request_seconds = 0.0
+        self.token = ""
+        self.requests = Counter("http_requests_total", "Requests handled", ("endpoint", "method", "status"))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency", LATENCY_BUCKETS, ("endpoint", "method")
+        )
+        self.queries = Histogram(
+            "http_request_sql_queries", "SQL statements per request", QUERY_COUNT_BUCKETS, ("endpoint",)
+        )
+        self.query_time = Histogram(
+            "http_request_sql_duration_seconds", "Time spent in SQL per request", LATENCY_BUCKETS, ("endpoint",)
+        )
+        self.slow_queries = Counter("sql_slow_queries_total", "SQL statements slower than SQL_SLOW_QUERY_MS", ("endpoint",))
+        self.slow_requests = Counter("http_slow_requests_total", "Requests slower than SLOW_REQUEST_MS", ("endpoint",))
+        self._metrics = (self.requests, self.latency, self.queries, self.query_time, self.slow_queries, self.slow_requests)
+
+    def init_app(self, app):
+        self.slow_query_seconds = app.config["SQL_SLOW_QUERY_MS"] / 1000
+        self.slow_request_seconds = app.config["SLOW_REQUEST_MS"] / 1000
+        self.token = app.config["METRICS_TOKEN"]
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._status)
+        app.teardown_request(self._finish)
+        if self.token:
+            app.add_url_rule("/metrics", "metrics", self.response)
+        else:
+            logger.warning("METRICS_TOKEN is not set, so /metrics is not served")
+
+    def _start(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_usage = _sql_usage.set([0, 0.0])
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        usage = _sql_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += elapsed
+        if elapsed >= self.slow_query_seconds > 0:
+            endpoint = (request.endpoint or "unmatched") if has_request_context() else "background"
+            self.slow_queries.inc((endpoint,))
+            logger.warning("Slow SQL (%.0f ms, %s): %s", elapsed * 1000, endpoint, " ".join(statement.split())[:500])
+
+    def _status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _finish(self, exc=None):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        queries, sql_seconds = _sql_usage.get()
+        _sql_usage.reset(g.pop("metrics_sql_usage"))
+        # No status means the response was never finished: an unhandled exception
+        status = 500 if exc is not None else g.pop("metrics_status", 500)
+        endpoint = request.endpoint or "unmatched"
+        self.requests.inc((endpoint, request.method, str(status)))
+        self.latency.observe(elapsed, (endpoint, request.method))
+        self.queries.observe(queries, (endpoint,))
+        self.query_time.observe(sql_seconds, (endpoint,))
+        if elapsed >= self.slow_request_seconds > 0:
+            self.slow_requests.inc((endpoint,))
+            logger.warning("Slow request (%.0f ms, %d SQL statements, %.0f ms in SQL): %s %s",
+                           elapsed * 1000, queries, sql_seconds * 1000, request.method, request.path)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def response(self):
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {self.token}".encode()):
+            return current_app.response_class("Unauthorized\n", status=401, mimetype="text/plain")
+        return current_app.response_class(self.render(), content_type=CONTENT_TYPE)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Script to bring an existing database up to date with the current models.
+`db.create_all()` only creates missing tables, so columns (with a server
+default) and indexes added to tables that already exist have to be created
+here. Doctors created before schedule
+versions existed also get their (lockable) schedule_versions row, the
+analytics rollups are backfilled when their table is first created, and a
+new appointment_changes sequence starts after the change numbers in use.
+
+Usage:
+    python migrate.py
+    or
+    python migrate.py --dry-run
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+
+from backend.app import create_app
+from backend.extensions import db
+from backend import models  # noqa: F401  ensures tables load
+from backend.analytics import rebuild_rollups
+
+
+def missing_columns(engine):
+    """Return the model columns that are not present in their (existing) tables"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(column for column in table.columns if column.name not in existing)
+    return missing
+
+
+def add_column(engine, column):
+    """ALTER TABLE ... ADD COLUMN; NOT NULL columns need a server_default to fill existing rows"""
+    table = engine.dialect.identifier_preparer.format_table(column.table)
+    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+
+
+def missing_indexes(engine):
+    """Return the model indexes that are not present in the database"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # create_all() builds the table together with its indexes
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                missing.append(index)
+    return missing
+
+
+def missing_schedule_versions():
+    """Return the ids of doctors without a schedule_versions row"""
+    return db.session.execute(
+        select(models.User.id)
+        .outerjoin(models.ScheduleVersion, models.ScheduleVersion.doctor_id == models.User.id)
+        .where(models.User.role == "doctor", models.ScheduleVersion.doctor_id.is_(None))
+    ).scalars().all()
+
+
+def start_change_sequence(engine):
+    """Make appointment_changes hand out numbers above every change_seq already issued"""
+    issued = db.session.execute(select(func.max(models.Appointment.change_seq))).scalar() or 0
+    counter = db.session.get(models.CacheVersion, "appointment_changes")  # the counter used before the table
+    issued = max(issued, counter.version if counter else 0)
+    if issued:
+        db.session.add(models.AppointmentChange(seq=issued))
+        db.session.flush()
+        if engine.dialect.name == "postgresql":
+            db.session.execute(text("SELECT setval(pg_get_serial_sequence('appointment_changes', 'seq'), :seq)"), {"seq": issued})
+    db.session.commit()
+    return issued
+
+
+def upgrade_database(dry_run=False):
+    """Create missing tables, columns and indexes. Safe to run repeatedly."""
+    app = create_app({"OUTBOX_WORKERS": 0})
+
+    with app.app_context():
+        engine = db.engine
+        columns = missing_columns(engine)
+        pending = missing_indexes(engine)
+
+        if dry_run:
+            for column in columns:
+                print(f"   would add column {column.name} to {column.table.name}")
+            for index in pending:
+                print(f"   would create index {index.name} on {index.table.name}")
+            if inspect(engine).has_table(models.ScheduleVersion.__tablename__):
+                print(f"   would add {len(missing_schedule_versions())} schedule version row(s)")
+            if not inspect(engine).has_table(models.AppointmentChange.__tablename__):
+                print("   would start appointment change numbers after the ones in use")
+            return pending
+
+        new_rollups = not inspect(engine).has_table(models.AppointmentRollup.__tablename__)
+        new_changes = not inspect(engine).has_table(models.AppointmentChange.__tablename__)
+        db.create_all()
+        for column in columns:
+            print(f"   adding column {column.name} to {column.table.name}")
+            add_column(engine, column)
+        for index in pending:
+            print(f"   creating index {index.name} on {index.table.name}")
+            index.create(bind=engine, checkfirst=True)
+
+        doctor_ids = missing_schedule_versions()
+        if doctor_ids:
+            print(f"   adding {len(doctor_ids)} schedule version row(s)")
+            db.session.add_all(models.ScheduleVersion(doctor_id=doctor_id, version=0) for doctor_id in doctor_ids)
+            db.session.commit()
+
+        if new_rollups:
+            print(f"   backfilling analytics rollups ({rebuild_rollups()} row(s))")
+
+        if new_changes:
+            print(f"   starting appointment change numbers after {start_change_sequence(engine)}")
+
+        print(f"✅ Database is up to date ({len(columns)} column(s) added, {len(pending)} index(es) created)")
+        return pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade the Healthcare Appointment System database schema")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the changes that would be made")
+
+    args = parser.parse_args()
+    upgrade_database(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
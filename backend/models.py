@@ -1,5 +1,6 @@
 from datetime import datetime
-from .extensions import db, bcrypt
+from .extensions import db
+from .passwords import password_hasher
 
 class User(db.Model):
     __tablename__ = "users"
@@ -14,10 +15,13 @@ class User(db.Model):
     doctor_profile = db.relationship("DoctorProfile", backref="user", uselist=False)
 
     def set_password(self, password: str):
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(password, self.password_hash)
+
+    def password_needs_rehash(self) -> bool:
+        return password_hasher.needs_rehash(self.password_hash)
 
 
 class PatientProfile(db.Model):
@@ -41,6 +45,22 @@ class DoctorProfile(db.Model):
 
 class Appointment(db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # conflict checks and slot lookups: doctor_id = ? AND status = ? AND start_time < ?
+        db.Index("ix_appointments_doctor_status_start", "doctor_id", "status", "start_time"),
+        db.Index("ix_appointments_patient_status_start", "patient_id", "status", "start_time"),
+        # "my appointments" listings ordered by start_time
+        db.Index("ix_appointments_doctor_start", "doctor_id", "start_time"),
+        db.Index("ix_appointments_patient_start", "patient_id", "start_time"),
+        # admin listing, keyset-paginated on (start_time, id)
+        db.Index("ix_appointments_start_id", "start_time", "id"),
+        # upcoming appointment counts in admin analytics
+        db.Index("ix_appointments_status_start", "status", "start_time"),
+        # delta sync (?since=): rows changed after a sequence number
+        db.Index("ix_appointments_patient_change", "patient_id", "change_seq"),
+        db.Index("ix_appointments_doctor_change", "doctor_id", "change_seq"),
+        db.Index("ix_appointments_change", "change_seq"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -50,6 +70,108 @@ class Appointment(db.Model):
     status = db.Column(db.String(20), default="scheduled")  # scheduled / cancelled / done
     reason = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set from the appointment_changes counter on every insert and update (see changes.py)
+    change_seq = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     patient = db.relationship("User", foreign_keys=[patient_id], backref="patient_appointments")
     doctor = db.relationship("User", foreign_keys=[doctor_id], backref="doctor_appointments")
+
+
+class EmailOutbox(db.Model):
+    """Emails waiting to be delivered by the background outbox workers"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default="pending", nullable=False)  # pending / sent / failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+
+class AppointmentEvent(db.Model):
+    """Appointment changes waiting to be pushed to the event streams of every
+    worker process (EVENTS_BACKEND=database).
+
+    Written in the same transaction as the change and deleted after
+    EVENTS_RETENTION_SECONDS. No foreign keys, like the rollups.
+    """
+    __tablename__ = "appointment_events"
+    __table_args__ = (
+        db.Index("ix_appointment_events_change_seq", "change_seq"),
+        db.Index("ix_appointment_events_created_at", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    change_seq = db.Column(db.Integer, nullable=False)  # the appointment's change_seq after this change
+    type = db.Column(db.String(20), nullable=False)  # booked / cancelled / status
+    appointment_id = db.Column(db.Integer, nullable=False)
+    patient_id = db.Column(db.Integer, nullable=False)
+    doctor_id = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class AppointmentChange(db.Model):
+    """One row per change_seq handed out to an appointment change.
+
+    The autoincrementing seq (a sequence on Postgres) numbers the changes
+    without a shared counter row, so concurrent writers never wait for each
+    other. Rows are only needed until every reader has moved past them and
+    are deleted after an hour (see changes.py).
+    """
+    __tablename__ = "appointment_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # deleted numbers are never handed out again
+
+    seq = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ScheduleVersion(db.Model):
+    """Per-doctor counter bumped on every change to the doctor's appointments.
+
+    In-process availability caches compare against it to detect changes made
+    by other workers.
+    """
+    __tablename__ = "schedule_versions"
+
+    doctor_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+
+class CacheVersion(db.Model):
+    """Named counters bumped whenever the data behind a cached response changes.
+
+    Lets every worker process notice that its in-memory copy is stale.
+    """
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+
+class AppointmentRollup(db.Model):
+    """Appointment counts per day (of start_time, UTC), doctor and status.
+
+    Kept current by the booking routes and rebuilt from `appointments` with
+    rebuild_analytics.py. doctor_id has no foreign key so history outlives
+    deleted doctors.
+    """
+    __tablename__ = "appointment_rollups"
+    __table_args__ = (
+        db.Index("ix_appointment_rollups_doctor_day", "doctor_id", "day"),
+    )
+
+    day = db.Column(db.Date, primary_key=True)
+    doctor_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
@@ -0,0 +1,193 @@
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Connection, Message
+from sqlalchemy import update
+from .extensions import db
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Set whenever new mail is committed so idle workers don't wait out their poll interval
+_wakeup = threading.Event()
+
+
+def enqueue_email(recipient, subject, body):
+    """Add an email to the outbox.
+
+    The row joins the caller's session, so it is committed (or rolled back)
+    together with whatever change triggered the email.
+    """
+    db.session.add(EmailOutbox(recipient=recipient, subject=subject, body=body))
+
+
+def wake_workers():
+    _wakeup.set()
+
+
+def retry_delay(attempts):
+    """Exponential backoff: OUTBOX_RETRY_BASE seconds, doubled per attempt, capped at OUTBOX_RETRY_MAX"""
+    config = current_app.config
+    return timedelta(seconds=min(config["OUTBOX_RETRY_MAX"], config["OUTBOX_RETRY_BASE"] * 2 ** (attempts - 1)))
+
+
+def claim_batch(batch_size):
+    """Lease up to batch_size due emails to this worker.
+
+    Claiming pushes next_attempt_at forward by OUTBOX_LEASE_SECONDS with a
+    conditional UPDATE, so concurrent workers never pick the same row and
+    emails held by a crashed worker become due again once the lease expires.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=current_app.config["OUTBOX_LEASE_SECONDS"])
+
+    due = EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now
+    query = (
+        db.session.query(EmailOutbox.id)
+        .filter(*due)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+    )
+    if db.engine.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+
+    claimed = []
+    for (email_id,) in query.all():
+        result = db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == email_id, *due)
+            .values(next_attempt_at=lease_until, attempts=EmailOutbox.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed.append(email_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
+
+class TimeoutConnection(Connection):
+    """Flask-Mail connection whose socket has a timeout from the start.
+
+    Flask-Mail opens smtplib.SMTP without one, so a server that accepts the
+    TCP connection but never greets (or hangs in STARTTLS or login) would
+    block a worker forever.
+    """
+
+    def __init__(self, mail, timeout):
+        super().__init__(mail)
+        self.timeout = timeout
+
+    def configure_host(self):
+        if self.mail.use_ssl:
+            host = smtplib.SMTP_SSL(self.mail.server, self.mail.port, timeout=self.timeout)
+        else:
+            host = smtplib.SMTP(self.mail.server, self.mail.port, timeout=self.timeout)
+
+        host.set_debuglevel(int(self.mail.debug))
+
+        if self.mail.use_tls:
+            host.starttls()
+
+        if self.mail.username and self.mail.password:
+            host.login(self.mail.username, self.mail.password)
+
+        return host
+
+
+def record_failure(email, error):
+    email.last_error = str(error)[:500]
+    if email.attempts >= current_app.config["OUTBOX_MAX_ATTEMPTS"]:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = datetime.utcnow() + retry_delay(email.attempts)
+
+
+def deliver_batch(batch_size=None):
+    """Claim a batch of due emails and send them over a single SMTP connection.
+
+    Returns the number of emails claimed (sent or rescheduled).
+    """
+    config = current_app.config
+    emails = claim_batch(batch_size or config["OUTBOX_BATCH_SIZE"])
+    if not emails:
+        return 0
+
+    handled = set()
+    try:
+        with TimeoutConnection(current_app.extensions["mail"], config["OUTBOX_SMTP_TIMEOUT"]) as conn:
+            for email in emails:
+                try:
+                    conn.send(Message(email.subject, recipients=[email.recipient], body=email.body))
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    raise  # the connection is gone, retry the rest of the batch later
+                except Exception as e:
+                    record_failure(email, e)
+                else:
+                    email.status = "sent"
+                    email.sent_at = datetime.utcnow()
+                    email.last_error = None
+                handled.add(email.id)
+    except Exception as e:
+        logger.warning("Email delivery failed: %s", e)
+        for email in emails:
+            if email.id not in handled:
+                record_failure(email, e)
+
+    db.session.commit()
+    return len(emails)
+
+
+class OutboxWorkerPool:
+    """Background threads that drain the email outbox"""
+
+    def __init__(self, app, workers, poll_interval):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    claimed = deliver_batch()
+            except Exception as e:
+                logger.exception("Outbox worker error")
+                claimed = 0
+
+            if not claimed:
+                _wakeup.wait(self.poll_interval)
+                _wakeup.clear()
+
+
+def start_outbox_workers(app, workers=None):
+    pool = OutboxWorkerPool(
+        app,
+        workers if workers is not None else app.config["OUTBOX_WORKERS"],
+        app.config["OUTBOX_POLL_INTERVAL"],
+    ).start()
+    app.extensions["outbox"] = pool
+    return pool
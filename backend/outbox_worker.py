@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script to run email outbox workers as a standalone process.
+Useful when the web servers run with OUTBOX_WORKERS=0 and mail delivery
+should live in its own process.
+
+Usage:
+    python outbox_worker.py
+    or
+    python outbox_worker.py --workers 4
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.outbox import start_outbox_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued emails for the Healthcare Appointment System")
+    parser.add_argument("--workers", type=int, help="Number of worker threads (default: OUTBOX_WORKERS or 2)")
+
+    args = parser.parse_args()
+
+    app = create_app({"OUTBOX_WORKERS": 0})
+    workers = args.workers or int(os.getenv("OUTBOX_WORKERS", 0)) or 2
+    pool = start_outbox_workers(app, workers)
+    print(f"📬 {workers} outbox worker(s) running, press Ctrl+C to stop")
+
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        pool.stop(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import base64
+import json
+from datetime import datetime
+from flask import current_app, request, jsonify
+from sqlalchemy import and_, func, or_
+from .models import Appointment
+from .analytics import STATUSES
+from .changes import current_change_seq
+from .serializers import parse_fields, parse_shape, serialize_appointments, serialize_appointment_columns
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(appointment):
+    """Opaque cursor pointing just past the given appointment"""
+    raw = json.dumps([appointment.start_time.isoformat(), appointment.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_time, appointment_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(start_time), int(appointment_id)
+    except Exception:
+        raise InvalidCursor(cursor)
+
+
+def encode_since(change_seq):
+    """Opaque delta-sync cursor: changes numbered above change_seq are still to come"""
+    return base64.urlsafe_b64encode(json.dumps([change_seq]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_since(since):
+    try:
+        padded = since + "=" * (-len(since) % 4)
+        change_seq, = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return int(change_seq)
+    except Exception:
+        raise InvalidCursor(since)
+
+
+def page_size(value):
+    """Clamp the requested page size to the configured bounds"""
+    default = current_app.config["APPOINTMENTS_PAGE_SIZE"]
+    maximum = current_app.config["APPOINTMENTS_MAX_PAGE_SIZE"]
+    if value is None:
+        return default
+    return max(1, min(value, maximum))
+
+
+def paginate_appointments(query, limit, cursor=None):
+    """Keyset pagination over (start_time, id), newest first.
+
+    Returns (appointments, next_cursor); next_cursor is None on the last page.
+    The cursor only stores the last row's sort key, so pages stay stable while
+    appointments are added or removed and deep pages cost the same as the first.
+    """
+    if cursor:
+        start_time, appointment_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Appointment.start_time < start_time,
+            and_(Appointment.start_time == start_time, Appointment.id < appointment_id),
+        ))
+
+    rows = (
+        query.order_by(Appointment.start_time.desc(), Appointment.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def changed_appointments(query, limit, since):
+    """Appointments of `query` changed after the `since` cursor, oldest change first.
+
+    Returns (appointments, next_since, has_more). Only changes up to the
+    settled mark are returned (see changes.py), so a change that commits
+    after the cursor was issued never turns up behind it.
+    """
+    change_seq = decode_since(since)
+    rows = (
+        query.filter(Appointment.change_seq > change_seq, Appointment.change_seq <= current_change_seq())
+        .order_by(Appointment.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, encode_since(rows[-1].change_seq if rows else change_seq), has_more
+
+
+def appointment_counts(query):
+    """Totals behind a listing, however many pages it has: per status, all, and upcoming (scheduled, not started)"""
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(
+        query.with_entities(Appointment.status, func.count()).group_by(Appointment.status).order_by(None).all()
+    )
+    counts["total"] = sum(counts.values())
+    counts["upcoming"] = query.filter(
+        Appointment.status == "scheduled", Appointment.start_time > datetime.utcnow()
+    ).with_entities(func.count()).order_by(None).scalar()
+    return counts
+
+
+def appointment_page_response(query, counts=False):
+    """Serve one page of `query` according to the `limit`, `cursor`, `since`, `fields` and `shape` query parameters.
+
+    With `since`, the page holds the appointments changed after that cursor
+    instead. The first page of a listing carries `next_since` to start from.
+    With counts=True, the first page and every `since` page also carry
+    `counts` (see appointment_counts), since one page can't show totals.
+    """
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"message": f"Unknown fields: {e}"}), 400
+    try:
+        shape = parse_shape(request.args.get("shape"))
+    except ValueError:
+        return jsonify({"message": "shape must be objects or columns"}), 400
+
+    limit = page_size(request.args.get("limit", type=int))
+    serialize = serialize_appointment_columns if shape == "columns" else serialize_appointments
+    cursor = request.args.get("cursor")
+    since = request.args.get("since")
+    if since is not None:
+        if cursor:
+            return jsonify({"message": "Use either cursor or since"}), 400
+        try:
+            appointments, next_since, has_more = changed_appointments(query, limit, since)
+        except InvalidCursor:
+            return jsonify({"message": "Invalid since cursor"}), 400
+        body = {"appointments": serialize(appointments, fields), "next_since": next_since, "has_more": has_more}
+        if counts:
+            body["counts"] = appointment_counts(query)
+        return jsonify(body), 200
+
+    # Read before the page, so changes made while it is read come after it
+    next_since = None if cursor else encode_since(current_change_seq())
+    try:
+        appointments, next_cursor = paginate_appointments(query, limit, cursor)
+    except InvalidCursor:
+        return jsonify({"message": "Invalid cursor"}), 400
+
+    body = {"appointments": serialize(appointments, fields), "next_cursor": next_cursor}
+    if next_since:
+        body["next_since"] = next_since
+        if counts:
+            body["counts"] = appointment_counts(query)
+    return jsonify(body), 200
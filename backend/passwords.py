@@ -0,0 +1,132 @@
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hash jobs are already queued"""
+
+
+# Run in the worker processes, so they only depend on bcrypt
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _verify(password, password_hash):
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except ValueError:  # malformed stored hash
+        return False
+
+
+def hash_rounds(password_hash):
+    """Work factor of a "$2b$12$..." hash, or None if it is not a bcrypt hash"""
+    parts = password_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded process pool.
+
+    A bcrypt call at cost 12 takes a few hundred ms of CPU; running it in
+    separate processes keeps a burst of logins from starving the request
+    threads that serve everything else. At most PASSWORD_HASH_WORKERS hashes
+    run at once and at most PASSWORD_HASH_MAX_PENDING wait for a worker;
+    beyond that PasswordHasherBusy is raised and the app answers 503.
+    With PASSWORD_HASH_WORKERS=0 hashing runs on the calling thread.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 0
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.rounds = app.config["BCRYPT_LOG_ROUNDS"]
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self._slots = threading.BoundedSemaphore(self.workers + app.config["PASSWORD_HASH_MAX_PENDING"])
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the parent has running threads (outbox workers)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            pool = self._executor()
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed); start a fresh pool for later calls
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def hash_many(self, passwords):
+        """Hashes of passwords, in order, for bulk imports.
+
+        Keeps at most PASSWORD_HASH_WORKERS jobs in the pool at a time and
+        waits for free slots instead of raising PasswordHasherBusy, so logins
+        never queue behind more than one round of import hashes.
+        """
+        if not self.workers:
+            return [_hash(password, self.rounds) for password in passwords]
+        pool = self._executor()
+        hashes = []
+        in_flight = deque()
+        try:
+            for password in passwords:
+                if len(in_flight) >= self.workers:
+                    hashes.append(in_flight.popleft().result())
+                self._slots.acquire()
+                try:
+                    future = pool.submit(_hash, password, self.rounds)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                future.add_done_callback(lambda _: self._slots.release())
+                in_flight.append(future)
+            hashes.extend(future.result() for future in in_flight)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+        return hashes
+
+    def verify(self, password, password_hash):
+        return self._run(_verify, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,206 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from flask import g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from sqlalchemy import event
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# [(statement, seconds)] of the request being profiled, None otherwise
+_statements = ContextVar("profile_statements", default=None)
+
+
+def _requested():
+    return request.headers.get(PROFILE_HEADER) == "1" or request.args.get("profile") == "1"
+
+
+def _is_admin():
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False  # the view answers the bad token itself
+    return get_jwt().get("role") == "admin"
+
+
+def _function(key, stat):
+    filename, line, name = key
+    calls, _, own, cumulative, _ = stat
+    in_app = filename.startswith(PACKAGE_DIR)
+    return {
+        "function": name,
+        "file": os.path.relpath(filename, os.path.dirname(PACKAGE_DIR)) if in_app else filename,
+        "line": line,
+        "in_app": in_app,
+        "calls": calls,
+        "own_ms": round(own * 1000, 3),
+        "cumulative_ms": round(cumulative * 1000, 3),
+    }
+
+
+class RequestProfiler:
+    """Profiles single requests on demand and keeps the results on disk.
+
+    With PROFILING_ENABLED, a request from an admin carrying "X-Profile: 1"
+    (or ?profile=1) runs under cProfile and has its SQL statements recorded.
+    The pstats file and a JSON summary (slowest functions, statements with
+    their time) are written to PROFILE_DIR, the newest PROFILE_KEEP are
+    kept, and the response carries the profile id in X-Profile-Id. Other
+    requests only pay for checking the header.
+
+    Only the request thread is profiled: password hashing on the process
+    pool and streamed response bodies are not included.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.directory = ""
+        self.keep = 0
+        self.top_functions = 0
+
+    def init_app(self, app):
+        self.enabled = app.config["PROFILING_ENABLED"]
+        self.directory = app.config["PROFILE_DIR"]
+        self.keep = app.config["PROFILE_KEEP"]
+        self.top_functions = app.config["PROFILE_TOP_FUNCTIONS"]
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._stop)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if _statements.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        statements = _statements.get()
+        if statements is not None:
+            statements.append((statement, time.perf_counter() - conn.info["profile_started"].pop()))
+
+    def _start(self):
+        if not _requested() or not _is_admin():
+            return
+        g.profile_statements = _statements.set([])
+        g.profile_started = time.perf_counter()
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+
+    def _finish(self, response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        profile.disable()
+        elapsed = time.perf_counter() - g.pop("profile_started")
+        statements = _statements.get()
+        _statements.reset(g.pop("profile_statements"))
+        try:
+            response.headers["X-Profile-Id"] = self._save(profile, elapsed, statements, response)
+        except OSError:
+            logger.exception("Could not save the profile of %s %s", request.method, request.path)
+        return response
+
+    def _stop(self, exc):
+        # after_request did not run (an error escaped): don't leave the profiler on
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+            _statements.reset(g.pop("profile_statements"))
+
+    def _save(self, profile, elapsed, statements, response):
+        now = datetime.utcnow()
+        profile_id = f"{now:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        stats = pstats.Stats(profile)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        summary = {
+            "id": profile_id,
+            "created_at": now.isoformat(),
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "user_id": get_jwt_identity(),
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql_count": len(statements),
+            "sql_ms": round(sum(seconds for _, seconds in statements) * 1000, 3),
+            "functions": [_function(key, stat) for key, stat in functions[:self.top_functions]],
+            "sql": [{"statement": statement, "ms": round(seconds * 1000, 3)} for statement, seconds in statements],
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        stats.dump_stats(self._path(profile_id, ".prof"))
+        path = self._path(profile_id, ".json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(summary, f)
+        os.replace(path + ".tmp", path)
+        self._prune()
+        return profile_id
+
+    def _path(self, profile_id, suffix):
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def _ids(self):
+        """Stored profile ids, newest first (ids start with their UTC time)"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((name[:-5] for name in names if name.endswith(".json") and PROFILE_ID.match(name[:-5])),
+                      reverse=True)
+
+    def _prune(self):
+        for profile_id in self._ids()[self.keep:]:
+            for suffix in (".json", ".prof"):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass  # another process pruned it first
+
+    def list(self):
+        """Summaries of the stored profiles without their functions and SQL, newest first"""
+        profiles = []
+        for profile_id in self._ids():
+            summary = self.get(profile_id)
+            if summary is not None:
+                summary.pop("functions")
+                summary.pop("sql")
+                profiles.append(summary)
+        return profiles
+
+    def get(self, profile_id):
+        """The full summary of one profile, or None"""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, ".json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def pstats_path(self, profile_id):
+        """Path of the pstats file of one profile, or None"""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = self._path(profile_id, ".prof")
+        return path if os.path.exists(path) else None
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the analytics rollup table from the appointments table.
+Run it once after upgrading (migrate.py does this when it creates the
+table), after importing appointments directly into the database, or
+whenever --check reports drift.
+
+Usage:
+    python rebuild_analytics.py
+    or
+    python rebuild_analytics.py --check
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from backend.app import create_app
+from backend.analytics import rebuild_rollups, rollup_drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Healthcare Appointment System analytics rollups")
+    parser.add_argument("--check", action="store_true", help="Only compare the rollups with the appointments table")
+
+    args = parser.parse_args()
+
+    app = create_app({"OUTBOX_WORKERS": 0})
+    with app.app_context():
+        if args.check:
+            drift = rollup_drift()
+            for (day, doctor_id, status), (rolled, live) in sorted(drift.items())[:20]:
+                print(f"   {day} doctor {doctor_id} {status}: rollup {rolled}, appointments {live}")
+            if drift:
+                print(f"❌ {len(drift)} rollup row(s) out of date, run without --check to rebuild")
+                sys.exit(1)
+            print("✅ Rollups match the appointments table")
+            return
+
+        rows = rebuild_rollups()
+        print(f"✅ Rebuilt analytics rollups ({rows} row(s))")
+
+
+if __name__ == "__main__":
+    main()
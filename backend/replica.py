@@ -0,0 +1,142 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from itsdangerous import BadSignature, URLSafeSerializer
+from flask import current_app, g, request, has_request_context
+from flask_sqlalchemy.session import Session
+from flask_jwt_extended import get_jwt_identity
+
+REPLICA_BIND = "replica"
+
+# Only these methods are ever routed to the replica, even on a read-only blueprint
+SAFE_METHODS = ("GET", "HEAD")
+
+# Cookie that carries a user's last write time between worker processes
+PIN_COOKIE = "db_pin"
+
+
+def read_only(view):
+    """Mark a view as read-only: its queries may be answered by the replica"""
+    view.read_only = True
+    return view
+
+
+class ReplicaSession(Session):
+    """Session that sends the queries of read-only requests to the replica bind.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary,
+    and once a session has written, its later reads do too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and REPLICA_BIND in self._db.engines:
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info["wrote"] = True
+                if has_request_context():
+                    g.db_wrote = True
+            elif not self.info.get("wrote") and replica_router.use_replica():
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Decides per request whether reads may go to the replica.
+
+    A GET to a view marked with @read_only, or to a blueprint registered
+    with read_only_blueprint(), reads from the replica, unless the same user
+    wrote something within DB_REPLICA_PIN_SECONDS: then it reads from the
+    primary, so users always see their own changes despite replication lag.
+    Without DATABASE_REPLICA_URL everything uses the primary.
+
+    A write response sets the signed db_pin cookie with the user and the
+    time of the write, so the next read is pinned whichever worker process
+    serves it. The writes this process saw are also kept in memory, which
+    pins the user without the cookie (a client that drops cookies) and
+    saves checking its signature.
+    """
+
+    def __init__(self):
+        self.pin_seconds = 0.0
+        self.max_pinned = 10000
+        self._blueprints = set()
+        self._writers = OrderedDict()  # identity -> monotonic time of its last write
+        self._lock = threading.Lock()
+        self._signer = None
+
+    def init_app(self, app):
+        self.pin_seconds = app.config["DB_REPLICA_PIN_SECONDS"]
+        self._signer = URLSafeSerializer(app.config["SECRET_KEY"], salt="db-replica-pin")
+        with self._lock:
+            self._writers.clear()
+        app.after_request(self._remember_writer)
+
+    def read_only_blueprint(self, blueprint):
+        """Route every GET of the blueprint to the replica"""
+        self._blueprints.add(blueprint.name)
+        return blueprint
+
+    def _identity(self):
+        try:
+            return get_jwt_identity()
+        except RuntimeError:  # the view did not check a JWT
+            return None
+
+    def _pinned(self, identity):
+        if identity is None:
+            return False
+        with self._lock:
+            written_at = self._writers.get(identity)
+        if written_at is not None and time.monotonic() - written_at < self.pin_seconds:
+            return True
+        return self._cookie_pinned(identity)
+
+    def _cookie_pinned(self, identity):
+        """Whether the request's db_pin cookie records a recent write by identity"""
+        value = request.cookies.get(PIN_COOKIE)
+        if not value:
+            return False
+        try:
+            pinned_identity, written_at = self._signer.loads(value)
+        except (BadSignature, TypeError, ValueError):
+            return False
+        return pinned_identity == identity and 0 <= time.time() - written_at < self.pin_seconds
+
+    def use_replica(self):
+        """Whether the current request may read from the replica; decided at its first query"""
+        if not has_request_context():
+            return False
+        if "db_replica" not in g:
+            view = current_app.view_functions.get(request.endpoint)
+            g.db_replica = (
+                request.method in SAFE_METHODS
+                and (getattr(view, "read_only", False) or request.blueprint in self._blueprints)
+                and not self._pinned(self._identity())
+            )
+        return g.db_replica
+
+    def _remember_writer(self, response):
+        if g.get("db_wrote") and self.pin_seconds > 0:
+            identity = self._identity()
+            if identity is not None:
+                response.set_cookie(
+                    PIN_COOKIE,
+                    self._signer.dumps([identity, time.time()]),
+                    max_age=math.ceil(self.pin_seconds),
+                    httponly=True,
+                    secure=request.is_secure,
+                    samesite="Lax",
+                )
+                now = time.monotonic()
+                with self._lock:
+                    self._writers[identity] = now
+                    self._writers.move_to_end(identity)
+                    while self._writers and (
+                        len(self._writers) > self.max_pinned
+                        or now - next(iter(self._writers.values())) >= self.pin_seconds
+                    ):
+                        self._writers.popitem(last=False)
+        return response
+
+
+replica_router = ReplicaRouter()
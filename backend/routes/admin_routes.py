@@ -1,9 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from functools import wraps
 from ..extensions import db, mail
 from flask_mail import Message
-from ..models import User, DoctorProfile, PatientProfile, Appointment
+from ..models import User, DoctorProfile, PatientProfile, Appointment, ScheduleVersion
+from ..availability import availability_index
+from ..doctor_directory import doctor_directory, bump_directory_version
+from ..pagination import appointment_page_response
+from .. import analytics
+from ..doctor_import import read_rows, import_doctors, FORMATS
+from .. import appointment_export
+from ..replica import read_only
+from ..profiling import request_profiler
+from ..auth_utils import admin_required
 from datetime import datetime
 from flask_jwt_extended import jwt_required, get_jwt
 
@@ -12,18 +20,6 @@ admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
 
 
-def admin_required(f):
-    """Decorator to ensure only admin can access"""
-    @wraps(f)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        claims = get_jwt()  # <-- FIX HERE
-        if claims.get("role") != "admin":
-            return jsonify({"message": "Admin access required"}), 403
-        return f(*args, **kwargs)
-    return wrapper
-
-
 @admin_bp.route("/doctors", methods=["POST"])
 @admin_required
 def create_doctor():
@@ -55,7 +51,11 @@ def create_doctor():
         rating=rating
     )
     db.session.add(profile)
+    # Bookings lock this row, so it must exist before the first one
+    db.session.add(ScheduleVersion(doctor_id=user.id, version=0))
+    bump_directory_version()
     db.session.commit()
+    doctor_directory.clear()
 
     return jsonify({
         "message": "Doctor created successfully",
@@ -68,7 +68,27 @@ def create_doctor():
     }), 201
 
 
+@admin_bp.route("/doctors/import", methods=["POST"])
+@admin_required
+def import_doctors_bulk():
+    """Create many doctors from a CSV or NDJSON request body (admin only).
+
+    The format comes from ?format= or the Content-Type (text/csv,
+    application/x-ndjson). Valid rows are created, the others are listed
+    with their line number in the error report.
+    """
+    fmt = request.args.get("format")
+    if not fmt:
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson" if request.mimetype in ("application/x-ndjson", "application/jsonl") else None
+    if fmt not in FORMATS:
+        return jsonify({"message": "Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"}), 400
+
+    report = import_doctors(read_rows(request.stream, fmt), current_app.config["DOCTOR_IMPORT_CHUNK_SIZE"])
+    return jsonify(report.to_dict()), 200
+
+
 @admin_bp.route("/doctors", methods=["GET"])
+@read_only
 @admin_required
 def list_all_doctors():
     """List all doctors"""
@@ -119,7 +139,9 @@ def update_doctor(doctor_id):
         if "rating" in data:
             doctor.doctor_profile.rating = data["rating"]
 
+    bump_directory_version()
     db.session.commit()
+    doctor_directory.clear()
 
     return jsonify({
         "message": "Doctor updated successfully",
@@ -143,60 +165,112 @@ def delete_doctor(doctor_id):
     # Delete profile first
     if doctor.doctor_profile:
         db.session.delete(doctor.doctor_profile)
+    ScheduleVersion.query.filter_by(doctor_id=doctor_id).delete()
     db.session.delete(doctor)
+    bump_directory_version()
     db.session.commit()
+    availability_index.invalidate(doctor_id)
+    doctor_directory.clear()
 
     return jsonify({"message": "Doctor deleted successfully"}), 200
 
 
 @admin_bp.route("/appointments", methods=["GET"])
+@read_only
 @admin_required
 def list_all_appointments():
-    """List all appointments in the system"""
-    appointments = Appointment.query.order_by(Appointment.start_time.desc()).all()
+    """List all appointments in the system, one page at a time"""
+    return appointment_page_response(Appointment.query)
 
-    result = []
-    for apt in appointments:
-        patient = User.query.get(apt.patient_id)
-        doctor = User.query.get(apt.doctor_id)
-        result.append({
-            "id": apt.id,
-            "patient": {
-                "id": patient.id if patient else None,
-                "name": patient.name if patient else "Unknown",
-                "email": patient.email if patient else None,
-            },
-            "doctor": {
-                "id": doctor.id if doctor else None,
-                "name": doctor.name if doctor else "Unknown",
-                "specialty": doctor.doctor_profile.specialty if doctor and doctor.doctor_profile else None,
-            },
-            "start_time": apt.start_time.isoformat(),
-            "end_time": apt.end_time.isoformat(),
-            "status": apt.status,
-            "reason": apt.reason,
-            "created_at": apt.created_at.isoformat() if apt.created_at else None,
-        })
 
-    return jsonify(result), 200
+@admin_bp.route("/appointments/export", methods=["GET"])
+@read_only
+@admin_required
+def export_appointments():
+    """Stream all matching appointments as CSV or NDJSON (format, start, end, doctor_id, status)"""
+    fmt = request.args.get("format", "csv")
+    if fmt not in appointment_export.FORMATS:
+        return jsonify({"message": "format must be csv or ndjson"}), 400
+    try:
+        filters = appointment_export.parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    filename = f"appointments-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(
+        stream_with_context(appointment_export.export_rows(fmt, filters, current_app.config["EXPORT_BATCH_SIZE"])),
+        mimetype=appointment_export.FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
 @admin_bp.route("/analytics", methods=["GET"])
+@read_only
 @admin_required
 def get_analytics():
     """Get basic analytics"""
-    total_doctors = User.query.filter_by(role="doctor").count()
-    total_patients = User.query.filter_by(role="patient").count()
-    total_appointments = Appointment.query.count()
-    upcoming_appointments = Appointment.query.filter(
-        Appointment.start_time >= datetime.utcnow(),
-        Appointment.status == "scheduled"
-    ).count()
+    return jsonify(analytics.summary()), 200
+
+
+@admin_bp.route("/analytics/appointments-per-day", methods=["GET"])
+@read_only
+@admin_required
+def get_appointments_per_day():
+    """Appointments per day with status breakdown (start/end=YYYY-MM-DD, optional doctor_id)"""
+    try:
+        start, end = analytics.parse_range(request.args.get("start"), request.args.get("end"))
+    except ValueError as e:
+        return jsonify({"message": f"Invalid date range: {e}"}), 400
+    doctor_id = request.args.get("doctor_id", type=int)
+
+    return jsonify({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "doctor_id": doctor_id,
+        "days": analytics.appointments_per_day(start, end, doctor_id),
+    }), 200
+
+
+@admin_bp.route("/analytics/doctors", methods=["GET"])
+@read_only
+@admin_required
+def get_doctor_analytics():
+    """Per-doctor appointment counts and cancellation rate (start/end=YYYY-MM-DD)"""
+    try:
+        start, end = analytics.parse_range(request.args.get("start"), request.args.get("end"))
+    except ValueError as e:
+        return jsonify({"message": f"Invalid date range: {e}"}), 400
 
     return jsonify({
-        "total_doctors": total_doctors,
-        "total_patients": total_patients,
-        "total_appointments": total_appointments,
-        "upcoming_appointments": upcoming_appointments,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "doctors": analytics.doctor_stats(start, end),
     }), 200
 
+
+@admin_bp.route("/profiles", methods=["GET"])
+@admin_required
+def list_profiles():
+    """Stored request profiles, newest first (send an admin request with "X-Profile: 1" to make one)"""
+    return jsonify({"enabled": request_profiler.enabled, "profiles": request_profiler.list()}), 200
+
+
+@admin_bp.route("/profiles/<profile_id>", methods=["GET"])
+@admin_required
+def get_profile(profile_id):
+    """One profile: its slowest functions and every SQL statement with its time"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"message": "Profile not found"}), 404
+    return jsonify(profile), 200
+
+
+@admin_bp.route("/profiles/<profile_id>/pstats", methods=["GET"])
+@admin_required
+def download_profile(profile_id):
+    """The raw pstats file, for snakeviz or python -m pstats"""
+    path = request_profiler.pstats_path(profile_id)
+    if path is None:
+        return jsonify({"message": "Profile not found"}), 404
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=f"{profile_id}.prof")
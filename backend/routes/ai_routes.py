@@ -1,86 +1,119 @@
-from flask import Blueprint, request, jsonify
-import os
+import math
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..symptom_matcher import symptom_matcher
+from ..llm_client import llm_recommender
+from ..specialty_classifier import specialty_classifier
+from ..auth_utils import role_denied
 
 ai_bp = Blueprint("ai", __name__, url_prefix="/api/ai")
 
+METHODS = ("rule-based", "local", "openai")
+
 
 def simple_specialty_recommendation(symptoms: str) -> str:
-    """Rule-based specialty recommendation"""
-    s = symptoms.lower()
-    if any(word in s for word in ["heart", "chest pain", "bp", "blood pressure", "cardiac"]):
-        return "Cardiologist"
-    if any(word in s for word in ["skin", "rash", "itch", "allergy", "dermatitis", "acne"]):
-        return "Dermatologist"
-    if any(word in s for word in ["headache", "seizure", "stroke", "numbness", "migraine", "neurological"]):
-        return "Neurologist"
-    if any(word in s for word in ["fever", "cold", "cough", "flu", "infection"]):
-        return "General Physician"
-    return "General Physician"
+    """Rule-based specialty recommendation (rules in data/symptom_rules.json)"""
+    return symptom_matcher.recommend(symptoms)
 
 
 def openai_recommendation(symptoms: str) -> str:
-    """Use OpenAI API for specialty recommendation if available"""
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    if not openai_api_key:
-        return None
-
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=openai_api_key)
-        
-        prompt = f"""Based on the following symptoms, recommend the most appropriate medical specialty:
-Symptoms: {symptoms}
-
-Choose from: Cardiologist, Dermatologist, Neurologist, General Physician, Orthopedist, Gastroenterologist, Ophthalmologist, ENT Specialist
-
-Respond with only the specialty name."""
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=50
-        )
-        
-        specialty = response.choices[0].message.content.strip()
-        # Validate the response
-        valid_specialties = ["Cardiologist", "Dermatologist", "Neurologist", "General Physician", 
-                           "Orthopedist", "Gastroenterologist", "Ophthalmologist", "ENT Specialist"]
-        if specialty in valid_specialties:
-            return specialty
-        return None
-    except Exception as e:
-        print(f"OpenAI API error: {e}")
-        return None
+    """Use OpenAI API for specialty recommendation if available (cached, circuit-broken)"""
+    return llm_recommender.recommend(symptoms, symptom_matcher.specialties)
+
+
+def local_recommendation(symptoms: str) -> str:
+    """Offline specialty recommendation from the trained classifier (train_classifier.py)"""
+    return specialty_classifier.recommend(symptoms, symptom_matcher.specialties)
+
+
+def requested_method(data):
+    """The "method" field, or "openai" for the older use_openai flag"""
+    return data.get("method") or ("openai" if data.get("use_openai") else "rule-based")
 
 
 @ai_bp.route("/recommend-doctor", methods=["POST"])
 def recommend_doctor():
     data = request.get_json()
     symptoms = data.get("symptoms", "")
-    use_openai = data.get("use_openai", False)
+    method = requested_method(data)
 
     if not symptoms:
         return jsonify({"message": "Symptoms are required"}), 400
+    if method not in METHODS:
+        return jsonify({"message": f"method must be one of: {', '.join(METHODS)}"}), 400
 
     specialty = None
-    method = "rule-based"
+    ranked = symptom_matcher.rank(symptoms)
 
-    # Try OpenAI if requested and available
-    if use_openai:
-        try:
-            specialty = openai_recommendation(symptoms)
-            if specialty:
-                method = "openai"
-        except Exception as e:
-            print(f"OpenAI failed: {e}")
+    # Try the requested model if available
+    if method == "openai":
+        specialty = openai_recommendation(symptoms)
+    elif method == "local":
+        specialty = local_recommendation(symptoms)
+    if not specialty:
+        method = "rule-based"
 
     # Fallback to rule-based
     if not specialty:
-        specialty = simple_specialty_recommendation(symptoms)
+        specialty = ranked[0]["specialty"] if ranked else symptom_matcher.rules().default
 
     return jsonify({
         "specialty": specialty,
         "method": method,
+        "ranked": ranked,
         "message": f"Based on your symptoms, we recommend consulting a {specialty}.",
         "symptoms": symptoms,
     }), 200
+
+
+@ai_bp.route("/recommend-doctor/batch", methods=["POST"])
+@jwt_required()
+def recommend_doctors_batch():
+    """Recommendations for a list of symptom texts, in input order (roles in AI_BATCH_ROLES).
+
+    The rules score every text; "method": "local" classifies them all in one
+    matrix operation; "openai" asks the API for all of them concurrently,
+    and texts it has not answered within AI_BATCH_DEADLINE_SECONDS keep the
+    rule-based answer. Each account may send AI_BATCH_OPENAI_ITEMS texts to
+    the API per AI_BATCH_BUDGET_WINDOW_SECONDS, then gets a 429.
+    """
+    denied = role_denied(current_app.config["AI_BATCH_ROLES"], "Batch recommendations are not available to this account")
+    if denied:
+        return denied
+    data = request.get_json() or {}
+    texts = data.get("symptoms")
+    method = requested_method(data)
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"message": "symptoms must be a non-empty list"}), 400
+    max_items = current_app.config["AI_BATCH_MAX_ITEMS"]
+    if len(texts) > max_items:
+        return jsonify({"message": f"At most {max_items} symptom texts per request"}), 400
+    for n, symptoms in enumerate(texts):
+        if not isinstance(symptoms, str) or not symptoms.strip():
+            return jsonify({"message": f"symptoms[{n}] must be a non-empty string"}), 400
+    if method not in METHODS:
+        return jsonify({"message": f"method must be one of: {', '.join(METHODS)}"}), 400
+
+    if method == "openai" and llm_recommender.enabled:
+        retry_after = llm_recommender.budget.take(get_jwt_identity(), len(texts))
+        if retry_after:
+            return jsonify({"message": "OpenAI batch budget used up, please try again later"}), 429, \
+                {"Retry-After": str(math.ceil(retry_after))}
+
+    rules = symptom_matcher.rules()
+    ranked = [rules.rank(symptoms) for symptoms in texts]
+    answers, late = [None] * len(texts), 0
+    if method == "openai":
+        answers, late = llm_recommender.recommend_many(texts, rules.specialties, current_app.config["AI_BATCH_DEADLINE_SECONDS"])
+    elif method == "local":
+        answers = specialty_classifier.recommend_many(texts, rules.specialties)
+
+    results = []
+    for matches, specialty in zip(ranked, answers):
+        results.append({
+            "specialty": specialty or (matches[0]["specialty"] if matches else rules.default),
+            "method": method if specialty else "rule-based",
+            "ranked": matches,
+        })
+    return jsonify({"results": results, "deadline_exceeded": late}), 200
@@ -1,74 +1,128 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
-from ..extensions import db, mail
-from flask_mail import Message
-from ..models import Appointment, User
+from sqlalchemy import and_, exists, select
+from sqlalchemy.exc import IntegrityError
+from ..extensions import db
+from ..models import Appointment, User, DoctorProfile
+from ..outbox import enqueue_email, wake_workers
+from ..availability import availability_index, bump_schedule_version, lock_schedule, schedule_snapshot
+from ..pagination import appointment_page_response
+from ..analytics import record_appointment_change
+from ..events import appointment_events
+from ..replica import read_only
 
 appointment_bp = Blueprint("appointment", __name__, url_prefix="/api/appointments")
 
+# Bookable one-hour slots each day (start hours)
+SLOT_HOURS = range(9, 17)
+
+# Tries per booking; see the IntegrityError retry in book_appointment
+BOOKING_ATTEMPTS = 2
+
 
 # ==========================================================
 # HELPERS
 # ==========================================================
 
-def is_conflict(doctor_id, start_time, end_time, exclude_id=None):
-    query = Appointment.query.filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.start_time < end_time,
-        Appointment.end_time > start_time,
-        Appointment.status == "scheduled",
-    )
-    if exclude_id:
-        query = query.filter(Appointment.id != exclude_id)
-    return query.first() is not None
+def queue_appointment_email(user_email, user_name, doctor_name, start_time, end_time, action="confirmed"):
+    """Add the notification to the email outbox; it is delivered after the caller commits"""
+    if action == "confirmed":
+        subject = "Appointment Confirmation"
+        body = f"""
+        Dear {user_name},
+
+        Your appointment with Dr. {doctor_name} has been confirmed.
+
+        Date & Time: {start_time.strftime('%Y-%m-%d %H:%M')} - {end_time.strftime('%H:%M')}
+
+        Please arrive 10 minutes early.
+
+        Regards,
+        Healthcare AI System
+        """
+    elif action == "cancelled":
+        subject = "Appointment Cancelled"
+        body = f"""
+        Dear {user_name},
+
+        Your appointment with Dr. {doctor_name} scheduled for 
+        {start_time.strftime('%Y-%m-%d %H:%M')} has been cancelled.
+
+        Regards,
+        Healthcare AI System
+        """
 
+    enqueue_email(user_email, subject, body)
 
-def is_patient_conflict(patient_id, start_time, end_time, exclude_id=None):
-    query = Appointment.query.filter(
-        Appointment.patient_id == patient_id,
+
+def booking_check(patient_id, doctor_id, start_time, end_time):
+    """Both users (id, name, email, role) by id, each row also carrying
+    doctor_busy / patient_busy overlap flags, in a single query"""
+    overlapping = and_(
+        Appointment.status == "scheduled",
         Appointment.start_time < end_time,
         Appointment.end_time > start_time,
-        Appointment.status == "scheduled",
     )
-    if exclude_id:
-        query = query.filter(Appointment.id != exclude_id)
-    return query.first() is not None
-
-
-def send_appointment_email(user_email, user_name, doctor_name, start_time, end_time, action="confirmed"):
-    try:
-        if action == "confirmed":
-            subject = "Appointment Confirmation"
-            body = f"""
-            Dear {user_name},
+    rows = db.session.execute(
+        select(
+            User.id, User.name, User.email, User.role,
+            exists().where(Appointment.doctor_id == doctor_id, overlapping).label("doctor_busy"),
+            exists().where(Appointment.patient_id == patient_id, overlapping).label("patient_busy"),
+        ).where(User.id.in_([doctor_id, patient_id]))
+    ).all()
+    return {row.id: row for row in rows}
 
-            Your appointment with Dr. {doctor_name} has been confirmed.
 
-            Date & Time: {start_time.strftime('%Y-%m-%d %H:%M')} - {end_time.strftime('%H:%M')}
+def reserve_slot(patient_id, doctor_id, start_time, end_time, reason):
+    """Check and insert a booking in one transaction with as few round trips as possible.
 
-            Please arrive 10 minutes early.
+    1. Lock the doctor's schedule (UPDATE ... RETURNING on schedule_versions),
+       so concurrent bookings for the doctor are serialized until commit.
+    2. One SELECT returns both users plus doctor/patient overlap flags.
+    3. Insert the appointment and its confirmation email, then commit.
 
-            Regards,
-            Healthcare AI System
-            """
-        elif action == "cancelled":
-            subject = "Appointment Cancelled"
-            body = f"""
-            Dear {user_name},
+    Returns (appointment snapshot, schedule version, error response or None).
+    """
+    schedule_version = lock_schedule(doctor_id)
 
-            Your appointment with Dr. {doctor_name} scheduled for 
-            {start_time.strftime('%Y-%m-%d %H:%M')} has been cancelled.
+    users = booking_check(patient_id, doctor_id, start_time, end_time)
+    doctor = users.get(doctor_id)
+    patient = users.get(patient_id)
 
-            Regards,
-            Healthcare AI System
-            """
+    error = None
+    if not doctor or doctor.role != "doctor":
+        error = jsonify({"message": "Invalid doctor"}), 404
+    elif doctor.doctor_busy:
+        error = jsonify({"message": "Doctor time slot already booked"}), 409
+    elif patient.patient_busy:
+        error = jsonify({"message": "You already have an appointment at this time"}), 409
+    if error:
+        db.session.rollback()
+        return None, None, error
 
-        msg = Message(subject, recipients=[user_email], body=body)
-        mail.send(msg)
+    appointment = Appointment(
+        patient_id=patient_id,
+        doctor_id=doctor_id,
+        start_time=start_time,
+        end_time=end_time,
+        reason=reason,
+        status="scheduled",
+    )
+    db.session.add(appointment)
+    record_appointment_change(appointment)
+    queue_appointment_email(
+        patient.email, patient.name, doctor.name,
+        start_time, end_time, action="confirmed"
+    )
+    if schedule_version is None:
+        schedule_version = bump_schedule_version(doctor_id)
+    db.session.flush()
+    appointment_events.publish("booked", appointment)
 
-    except Exception as e:
-        print("Email sending failed:", e)
+    snapshot = schedule_snapshot(appointment)
+    db.session.commit()
+    return snapshot, schedule_version, None
 
 
 # ==========================================================
@@ -109,38 +163,38 @@ def book_appointment():
     except Exception:
         return jsonify({"message": "Invalid datetime format"}), 400
 
-    # Conflict checks
-    if is_conflict(doctor_id, start_time, end_time):
-        return jsonify({"message": "Doctor time slot already booked"}), 409
-
-    if is_patient_conflict(user_id, start_time, end_time):
-        return jsonify({"message": "You already have an appointment at this time"}), 409
-
     if start_time < datetime.utcnow():
         return jsonify({"message": "Cannot book appointments in the past"}), 400
 
-    doctor = User.query.get(doctor_id)
-    if not doctor or doctor.role != "doctor":
-        return jsonify({"message": "Invalid doctor"}), 404
-
-    patient = User.query.get(user_id)
+    if end_time <= start_time:
+        return jsonify({"message": "end_time must be after start_time"}), 400
 
-    appointment = Appointment(
-        patient_id=user_id,
-        doctor_id=doctor_id,
-        start_time=start_time,
-        end_time=end_time,
-        reason=reason,
-        status="scheduled",
-    )
+    try:
+        doctor_id = int(doctor_id)
+    except (TypeError, ValueError):
+        return jsonify({"message": "Invalid doctor"}), 404
 
-    db.session.add(appointment)
-    db.session.commit()
+    # Slots this worker's index already shows as taken are turned away without a
+    # query or the schedule lock; everything else, including every booking that
+    # goes through, is decided by the locked check in reserve_slot
+    if availability_index.has_conflict(doctor_id, start_time, end_time, cached_only=True):
+        return jsonify({"message": "Doctor time slot already booked"}), 409
 
-    send_appointment_email(
-        patient.email, patient.name, doctor.name,
-        start_time, end_time, action="confirmed"
-    )
+    # A first booking for a doctor without a schedule_versions row can lose the
+    # race to create it; the retry then runs under the lock and sees the winner
+    for attempt in range(BOOKING_ATTEMPTS):
+        try:
+            appointment, schedule_version, error = reserve_slot(user_id, doctor_id, start_time, end_time, reason)
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == BOOKING_ATTEMPTS - 1:
+                raise
+
+    if error:
+        return error
+    availability_index.apply(doctor_id, schedule_version, appointment)
+    wake_workers()
 
     return jsonify({
         "message": "Appointment booked successfully",
@@ -158,6 +212,7 @@ def book_appointment():
 # ==========================================================
 
 @appointment_bp.route("/my", methods=["GET"])
+@read_only
 @jwt_required()
 def my_appointments():
     claims = get_jwt()
@@ -165,44 +220,62 @@ def my_appointments():
     user_id = int(get_jwt_identity())
 
     if role == "patient":
-        appts = Appointment.query.filter_by(
-            patient_id=user_id
-        ).order_by(Appointment.start_time.desc()).all()
+        query = Appointment.query.filter_by(patient_id=user_id)
 
     elif role == "doctor":
-        appts = Appointment.query.filter_by(
-            doctor_id=user_id
-        ).order_by(Appointment.start_time.desc()).all()
+        query = Appointment.query.filter_by(doctor_id=user_id)
 
     else:
         return jsonify({"message": "Invalid role"}), 403
 
-    result = []
-    for a in appts:
-        patient = User.query.get(a.patient_id)
-        doctor = User.query.get(a.doctor_id)
-
-        result.append({
-            "id": a.id,
-            "patient": {
-                "id": patient.id if patient else None,
-                "name": patient.name if patient else "Unknown",
-                "email": patient.email if patient else None,
-            },
-            "doctor": {
-                "id": doctor.id if doctor else None,
-                "name": doctor.name if doctor else "Unknown",
-                "specialty": doctor.doctor_profile.specialty
-                if doctor and doctor.doctor_profile else None,
-            },
-            "start_time": a.start_time.isoformat(),
-            "end_time": a.end_time.isoformat(),
-            "status": a.status,
-            "reason": a.reason,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-        })
-
-    return jsonify(result), 200
+    return appointment_page_response(query, counts=True)
+
+
+# ==========================================================
+# APPOINTMENT EVENTS (SSE)
+# ==========================================================
+
+@appointment_bp.route("/events/token", methods=["POST"])
+@jwt_required()
+def appointment_event_token():
+    claims = get_jwt()
+    role = claims.get("role")
+    user_id = int(get_jwt_identity())
+
+    if role not in ("patient", "doctor"):
+        return jsonify({"message": "Invalid role"}), 403
+
+    if not appointment_events.enabled:
+        return jsonify({"message": "Event streams are disabled"}), 404
+
+    return jsonify({
+        "token": appointment_events.stream_token(role, user_id),
+        "expires_in": appointment_events.token_seconds,
+    }), 200
+
+
+@appointment_bp.route("/events", methods=["GET"])
+def appointment_event_stream():
+    # EventSource can't send headers: ?token=<stream token from POST /events/token>
+    identity = appointment_events.token_identity(request.args.get("token", ""))
+    if identity is None:
+        return jsonify({"message": "Invalid or expired stream token"}), 401
+    role, user_id = identity
+
+    if not appointment_events.enabled:
+        return jsonify({"message": "Event streams are disabled"}), 404
+
+    subscription = appointment_events.subscribe(role, user_id)
+    if subscription is None:
+        return jsonify({"message": "Too many open event streams, please try again"}), 503, {"Retry-After": "5"}
+
+    response = Response(
+        appointment_events.stream(subscription),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(lambda: appointment_events.unsubscribe(subscription))
+    return response
 
 
 # ==========================================================
@@ -226,19 +299,30 @@ def cancel_appointment(appointment_id):
     if role == "doctor" and appointment.doctor_id != user_id:
         return jsonify({"message": "Unauthorized"}), 403
 
+    # Check the status under the doctor's schedule lock so two concurrent
+    # cancels can't both succeed (and both be counted in the rollups)
+    doctor_id = appointment.doctor_id
+    schedule_version = bump_schedule_version(doctor_id)
+    db.session.refresh(appointment)
     if appointment.status != "scheduled":
+        db.session.rollback()
         return jsonify({"message": "Only scheduled appointments can be cancelled"}), 400
 
     appointment.status = "cancelled"
-    db.session.commit()
+    record_appointment_change(appointment, "scheduled")
 
     patient = User.query.get(appointment.patient_id)
     doctor = User.query.get(appointment.doctor_id)
 
-    send_appointment_email(
+    queue_appointment_email(
         patient.email, patient.name, doctor.name,
         appointment.start_time, appointment.end_time, action="cancelled"
     )
+    appointment_events.publish("cancelled", appointment)
+    snapshot = schedule_snapshot(appointment)
+    db.session.commit()
+    availability_index.apply(doctor_id, schedule_version, snapshot)
+    wake_workers()
 
     return jsonify({"message": "Appointment cancelled successfully"}), 200
 
@@ -270,12 +354,20 @@ def update_appointment_status(appointment_id):
     if new_status not in ["scheduled", "completed", "cancelled"]:
         return jsonify({"message": "Invalid status"}), 400
 
+    doctor_id = appointment.doctor_id
+    schedule_version = bump_schedule_version(doctor_id)
+    db.session.refresh(appointment)  # current status, read under the schedule lock
+    old_status = appointment.status
     appointment.status = new_status
+    record_appointment_change(appointment, old_status)
+    appointment_events.publish("status", appointment)
+    snapshot = schedule_snapshot(appointment)
     db.session.commit()
+    availability_index.apply(doctor_id, schedule_version, snapshot)
 
     return jsonify({
         "message": "Appointment status updated",
-        "appointment": {"id": appointment.id, "status": appointment.status}
+        "appointment": {"id": snapshot.id, "status": snapshot.status}
     }), 200
 
 
@@ -284,6 +376,7 @@ def update_appointment_status(appointment_id):
 # ==========================================================
 
 @appointment_bp.route("/available-slots", methods=["GET"])
+@read_only
 @jwt_required()
 def get_available_slots():
     doctor_id = request.args.get("doctor_id", type=int)
@@ -300,17 +393,21 @@ def get_available_slots():
     start_of_day = datetime.combine(date, datetime.min.time())
     end_of_day = datetime.combine(date, datetime.max.time())
 
-    existing_appointments = Appointment.query.filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.start_time >= start_of_day,
-        Appointment.start_time < end_of_day,
-        Appointment.status == "scheduled"
-    ).all()
+    booked_starts = availability_index.booked_starts(doctor_id, start_of_day, end_of_day)
+    if booked_starts is None:
+        booked_starts = [
+            start_time for (start_time,) in db.session.query(Appointment.start_time).filter(
+                Appointment.doctor_id == doctor_id,
+                Appointment.start_time >= start_of_day,
+                Appointment.start_time < end_of_day,
+                Appointment.status == "scheduled"
+            )
+        ]
 
-    booked_hours = {apt.start_time.hour for apt in existing_appointments}
+    booked_hours = {start_time.hour for start_time in booked_starts}
 
     available_slots = []
-    for hour in range(9, 17):
+    for hour in SLOT_HOURS:
         if hour not in booked_hours:
             slot = datetime.combine(date, datetime.min.time().replace(hour=hour))
             available_slots.append(slot.isoformat())
@@ -320,3 +417,85 @@ def get_available_slots():
         "doctor_id": doctor_id,
         "available_slots": available_slots
     }), 200
+
+
+# ==========================================================
+# AVAILABILITY GRID (MANY DOCTORS, MANY DAYS)
+# ==========================================================
+
+@appointment_bp.route("/availability", methods=["GET"])
+@read_only
+@jwt_required()
+def get_availability_grid():
+    """Free slots for several doctors over a date range in one request.
+
+    Each doctor gets one integer per day (index 0 = `start`); bit i is set
+    when the slot starting at `slot_hours[i]` is free. A specialty with more
+    than AVAILABILITY_MAX_DOCTORS doctors comes in pages by doctor id:
+    `next_after` is then set, pass it back as `after` for the next page.
+    """
+    start_str = request.args.get("start")
+    end_str = request.args.get("end")
+    doctor_ids_str = request.args.get("doctor_ids")
+    specialty = request.args.get("specialty")
+
+    if not start_str or not end_str or not (doctor_ids_str or specialty):
+        return jsonify({"message": "start, end and doctor_ids or specialty are required"}), 400
+
+    try:
+        start = datetime.strptime(start_str, "%Y-%m-%d").date()
+        end = datetime.strptime(end_str, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"message": "Invalid date format, use YYYY-MM-DD"}), 400
+
+    days = (end - start).days + 1
+    if days < 1:
+        return jsonify({"message": "end must not be before start"}), 400
+    if days > current_app.config["AVAILABILITY_MAX_DAYS"]:
+        return jsonify({"message": f"At most {current_app.config['AVAILABILITY_MAX_DAYS']} days per request"}), 400
+
+    try:
+        after = int(request.args.get("after", 0))
+    except ValueError:
+        return jsonify({"message": "after must be a doctor id"}), 400
+
+    doctors = db.session.query(User.id).filter(User.role == "doctor", User.id > after)
+    if doctor_ids_str:
+        try:
+            requested_ids = {int(doctor_id) for doctor_id in doctor_ids_str.split(",") if doctor_id.strip()}
+        except ValueError:
+            return jsonify({"message": "doctor_ids must be a comma-separated list of ids"}), 400
+        if len(requested_ids) > current_app.config["AVAILABILITY_MAX_DOCTORS"]:
+            return jsonify({"message": f"At most {current_app.config['AVAILABILITY_MAX_DOCTORS']} doctors per request"}), 400
+        doctors = doctors.filter(User.id.in_(requested_ids))
+    if specialty:
+        doctors = doctors.join(DoctorProfile, DoctorProfile.user_id == User.id).filter(
+            DoctorProfile.specialty == specialty
+        )
+    max_doctors = current_app.config["AVAILABILITY_MAX_DOCTORS"]
+    doctor_ids = [doctor_id for (doctor_id,) in doctors.order_by(User.id).limit(max_doctors + 1)]
+    next_after = doctor_ids[max_doctors - 1] if len(doctor_ids) > max_doctors else None
+    doctor_ids = doctor_ids[:max_doctors]
+
+    all_free = (1 << len(SLOT_HOURS)) - 1
+    grid = {doctor_id: [all_free] * days for doctor_id in doctor_ids}
+
+    if doctor_ids:
+        booked = db.session.query(Appointment.doctor_id, Appointment.start_time).filter(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.status == "scheduled",
+            Appointment.start_time >= datetime.combine(start, datetime.min.time()),
+            Appointment.start_time < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        )
+        for doctor_id, start_time in booked:
+            bit = start_time.hour - SLOT_HOURS.start
+            if 0 <= bit < len(SLOT_HOURS):
+                grid[doctor_id][(start_time.date() - start).days] &= ~(1 << bit)
+
+    return jsonify({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "slot_hours": list(SLOT_HOURS),
+        "doctors": {str(doctor_id): masks for doctor_id, masks in grid.items()},
+        "next_after": next_after,
+    }), 200
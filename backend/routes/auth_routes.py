@@ -47,9 +47,23 @@ def login():
     password = data.get("password")
 
     user = User.query.filter_by(email=email).first()
-    if not user or not user.check_password(password):
+    if not user:
         return jsonify({"message": "Invalid credentials"}), 401
 
+    # Hand the DB connection back while bcrypt runs; otherwise a burst of
+    # logins holds the whole connection pool and stalls every other endpoint
+    db.session.expunge(user)
+    db.session.rollback()
+
+    if not user.check_password(password):
+        return jsonify({"message": "Invalid credentials"}), 401
+
+    # Upgrade hashes made with a different BCRYPT_LOG_ROUNDS while we have the password
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+
     
     token = create_access_token(
     identity=str(user.id),   # must be string
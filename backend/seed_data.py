@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Script to fill an empty database with a large, realistic synthetic dataset
+for load testing: doctors with specialties, ratings and weekly working
+hours, patients with profiles, and non-overlapping appointments spread over
+past and future days with per-doctor booking and cancellation rates.
+The same --seed always produces the same rows (dates are relative to today).
+
+Every account gets the same password (hashed once). Rows are bulk-inserted
+in large chunks (COPY on PostgreSQL), the appointment indexes are built after
+the load, and the analytics rollups are rebuilt at the end.
+
+Usage:
+    python seed_data.py
+    or
+    python seed_data.py --doctors 20000 --patients 500000 --appointments 20000000 --wipe
+"""
+
+import sys
+import os
+import io
+import csv
+import math
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from itertools import islice
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import select, text
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import User, PatientProfile, DoctorProfile, Appointment, ScheduleVersion
+from backend.passwords import password_hasher
+from backend.analytics import rebuild_rollups
+from backend.doctor_directory import bump_directory_version
+
+SPECIALTY_WEIGHTS = {
+    "General Physician": 30, "Orthopedist": 12, "Cardiologist": 10, "Dermatologist": 10,
+    "Gastroenterologist": 9, "Neurologist": 8, "Ophthalmologist": 8, "ENT Specialist": 8,
+}
+FIRST_NAMES = [
+    "James", "Mary", "Wei", "Aisha", "Carlos", "Priya", "Olga", "Kenji", "Fatima", "John", "Sofia", "Ahmed",
+    "Emma", "Luca", "Amara", "Noah", "Yuki", "Elena", "Omar", "Grace", "Ivan", "Chloe", "Ravi", "Zara",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Chen", "Khan", "Schmidt", "Rossi", "Patel", "Kim", "Silva", "Nguyen", "Okafor", "Novak",
+    "Brown", "Tanaka", "Cohen", "Haddad", "Jensen", "Dubois", "Ivanova", "Lopez", "Singh", "Walker", "Costa", "Ali",
+]
+REASONS = [
+    "Routine checkup", "Follow-up visit", "Persistent headache", "Back pain", "Skin rash", "Chest pain",
+    "Stomach ache", "Blurry vision", "Ear pain", "Fever and cough", "Joint pain", "Prescription renewal", None,
+]
+GENDERS = ["female", "male", "other"]
+# (start, end) hours of a shift; bookable hours are 9-17 as in the booking routes
+SHIFTS = [(9, 17), (9, 17), (9, 13), (13, 17)]
+# How far ahead appointments are booked, in days
+BOOKING_LEADS = [0, 1, 1, 2, 3, 5, 7, 7, 10, 14, 21, 30]
+# Share of the date range that lies in the past
+PAST_SHARE = 0.8
+
+
+class Doctor:
+    """Working pattern and behaviour of one generated doctor"""
+
+    def __init__(self, user_id, rng):
+        self.id = user_id
+        self.weekdays = set(rng.sample(range(6), rng.choice([3, 4, 5, 5, 5, 6])))  # Mon-Sat
+        start, end = rng.choice(SHIFTS)
+        self.hours = range(start, end)
+        self.utilisation = min(0.95, max(0.1, rng.betavariate(4, 2)))  # share of working slots booked
+        self.cancel_rate = rng.uniform(0.04, 0.2)
+        self.no_show_rate = rng.uniform(0.0, 0.05)  # past appointments never marked completed
+
+
+# Columns of the generated row tuples, per table
+USER_COLUMNS = ("name", "email", "password_hash", "role")
+DOCTOR_PROFILE_COLUMNS = ("user_id", "specialty", "experience_years", "rating")
+PATIENT_PROFILE_COLUMNS = ("user_id", "age", "gender")
+SCHEDULE_VERSION_COLUMNS = ("doctor_id", "version")
+APPOINTMENT_COLUMNS = ("patient_id", "doctor_id", "start_time", "end_time", "status", "reason", "created_at")
+
+
+def user_rows(role, count, password_hash, rng):
+    title = "Dr. " if role == "doctor" else ""
+    prefix = "dr." if role == "doctor" else ""
+    for n in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield f"{title}{first} {last}", f"{prefix}{first}.{last}.{n}@{role}.example.com".lower(), password_hash, role
+
+
+def doctor_profile_rows(doctor_ids, rng):
+    specialties, weights = list(SPECIALTY_WEIGHTS), list(SPECIALTY_WEIGHTS.values())
+    for doctor_id in doctor_ids:
+        yield (
+            doctor_id,
+            rng.choices(specialties, weights)[0],
+            int(rng.triangular(1, 40, 8)),
+            round(min(5.0, max(1.0, rng.gauss(4.2, 0.5))), 1),
+        )
+
+
+def patient_profile_rows(patient_ids, rng):
+    for patient_id in patient_ids:
+        yield patient_id, int(rng.triangular(0, 95, 38)), rng.choice(GENDERS)
+
+
+def date_range(doctors, appointments):
+    """(first day, number of days) so that the doctors' expected bookings cover `appointments`"""
+    per_week = sum(len(doctor.weekdays) * len(doctor.hours) * doctor.utilisation for doctor in doctors)
+    days = max(1, math.ceil(appointments / (per_week / 7) * 1.05))
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    return today - timedelta(days=int(days * PAST_SHARE)), days
+
+
+def appointment_rows(doctors, patient_ids, first_day, days, limit, rng):
+    """Up to `limit` appointments, day by day.
+
+    A doctor has at most one appointment per hour, and in every hour the
+    doctors get distinct patients (index = doctor * stride + per-hour offset,
+    modulo the patient count, with stride coprime to it), so no one is
+    double-booked.
+    """
+    patients = len(patient_ids)
+    stride = next(n for n in range(7919, 7919 + patients + 1) if math.gcd(n, patients) == 1)
+    now = datetime.utcnow()
+    leads = [timedelta(days=lead, hours=3) for lead in BOOKING_LEADS]
+    one_hour = timedelta(hours=1)
+    produced = 0
+
+    for day in range(days):
+        date = first_day + timedelta(days=day)
+        weekday = date.weekday()
+        # Only a few distinct datetimes per day: build them once, so the
+        # (SQLite) bind processors below can memoise their string form
+        starts = {hour: date + timedelta(hours=hour) for hour in range(24)}
+        ends = {hour: start + one_hour for hour, start in starts.items()}
+        created = {hour: [start - lead for lead in leads] for hour, start in starts.items()}
+        offsets = {hour: rng.randrange(patients) for hour in range(24)}
+        for index, doctor in enumerate(doctors):
+            if weekday not in doctor.weekdays:
+                continue
+            for hour in doctor.hours:
+                if rng.random() >= doctor.utilisation:
+                    continue
+                start_time = starts[hour]
+                roll = rng.random()
+                if roll < doctor.cancel_rate:
+                    status = "cancelled"
+                elif start_time >= now or roll < doctor.cancel_rate + doctor.no_show_rate:
+                    status = "scheduled"
+                else:
+                    status = "completed"
+                yield (
+                    patient_ids[(index * stride + offsets[hour]) % patients],
+                    doctor.id,
+                    start_time,
+                    ends[hour],
+                    status,
+                    rng.choice(REASONS),
+                    created[hour][rng.randrange(len(leads))],
+                )
+                produced += 1
+                if produced >= limit:
+                    return
+
+
+def _copy(table, columns, rows):
+    """COPY row tuples into a PostgreSQL table (psycopg 3 or psycopg2)"""
+    statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    raw = db.session.connection().connection.driver_connection
+    with raw.cursor() as cursor:
+        if hasattr(cursor, "copy"):  # psycopg 3
+            with cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)  # None becomes an empty field, which CSV COPY reads as NULL
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+
+def _memoised(processor):
+    cache = {}
+
+    def process(value):
+        try:
+            return cache[value]
+        except KeyError:
+            cache[value] = result = processor(value)
+            return result
+    return process
+
+
+def _executemany(table, columns, rows):
+    """The compiled Core INSERT, run as one DBAPI executemany with each column's bind processor applied.
+
+    Skips building a parameter dict per row; the processors (datetime
+    formatting on SQLite) are memoised, as the generated values repeat a lot.
+    """
+    dialect = db.engine.dialect
+    statement = table.insert().compile(dialect=dialect, column_keys=list(columns))
+    processors = [table.c[column].type.dialect_impl(dialect).bind_processor(dialect) for column in columns]
+    processors = [
+        _memoised(processor) if processor and isinstance(table.c[column].type, db.DateTime) else processor
+        for column, processor in zip(columns, processors)
+    ]
+    if any(processors):
+        rows = [
+            tuple(value if processor is None or value is None else processor(value) for processor, value in zip(processors, row))
+            for row in rows
+        ]
+    db.session.connection().exec_driver_sql(str(statement), rows)
+
+
+def bulk_insert(table, columns, rows, chunk_size):
+    """Insert an iterable of row tuples chunk by chunk, one commit per chunk; returns the row count"""
+    dialect, driver = db.engine.dialect.name, db.engine.driver
+    rows = iter(rows)
+    count = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return count
+        if dialect == "postgresql" and driver in ("psycopg", "psycopg2"):
+            _copy(table, columns, chunk)
+        elif dialect == "sqlite":
+            _executemany(table, columns, chunk)
+        else:
+            db.session.execute(table.insert(), [dict(zip(columns, row)) for row in chunk])
+        db.session.commit()
+        count += len(chunk)
+
+
+def create_indexes(table, rows):
+    for index in table.indexes:
+        index.create(bind=db.engine)
+    return rows
+
+
+def ids_by_role(role):
+    return db.session.execute(select(User.id).where(User.role == role).order_by(User.id)).scalars().all()
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - started
+    print(f"   {label}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+    return count, elapsed
+
+
+def run(args):
+    if args.patients < args.doctors:
+        print("❌ Need at least as many patients as doctors (each hour every doctor sees a different patient)")
+        return 1
+    rng = random.Random(args.seed)
+    app = create_app({"OUTBOX_WORKERS": 0, "PASSWORD_HASH_WORKERS": 0})
+
+    with app.app_context():
+        if args.wipe:
+            print("⚠️  Dropping all tables")
+            db.drop_all()
+        db.create_all()
+        if db.session.query(User.id).first() is not None:
+            print("❌ The database already has users; use --wipe to replace everything")
+            return 1
+
+        started = time.perf_counter()
+        password_hash = password_hasher.hash(args.password)
+        print(f"📊 Seeding {args.doctors:,} doctors, {args.patients:,} patients, {args.appointments:,} appointments (seed {args.seed})")
+
+        users = User.__table__
+        chunk_size = args.chunk_size
+        timed("doctors", lambda: bulk_insert(
+            users, USER_COLUMNS, user_rows("doctor", args.doctors, password_hash, rng), chunk_size
+        ))
+        timed("patients", lambda: bulk_insert(
+            users, USER_COLUMNS, user_rows("patient", args.patients, password_hash, rng), chunk_size
+        ))
+        doctor_ids, patient_ids = ids_by_role("doctor"), ids_by_role("patient")
+        timed("doctor profiles", lambda: bulk_insert(
+            DoctorProfile.__table__, DOCTOR_PROFILE_COLUMNS, doctor_profile_rows(doctor_ids, rng), chunk_size
+        ))
+        timed("patient profiles", lambda: bulk_insert(
+            PatientProfile.__table__, PATIENT_PROFILE_COLUMNS, patient_profile_rows(patient_ids, rng), chunk_size
+        ))
+        timed("schedule versions", lambda: bulk_insert(
+            ScheduleVersion.__table__, SCHEDULE_VERSION_COLUMNS, ((doctor_id, 0) for doctor_id in doctor_ids), chunk_size
+        ))
+
+        doctors = [Doctor(doctor_id, rng) for doctor_id in doctor_ids]
+        first_day, days = date_range(doctors, args.appointments)
+        print(f"   appointments span {days:,} days from {first_day:%Y-%m-%d}")
+
+        # Building the indexes once after the load is much faster than updating them per row
+        appointments = Appointment.__table__
+        for index in appointments.indexes:
+            index.drop(bind=db.engine, checkfirst=True)
+        count, _ = timed("appointments", lambda: bulk_insert(
+            appointments, APPOINTMENT_COLUMNS,
+            appointment_rows(doctors, patient_ids, first_day, days, args.appointments, rng), chunk_size
+        ))
+        timed("appointment indexes", lambda: create_indexes(appointments, count))
+
+        timed("analytics rollups", rebuild_rollups)
+        bump_directory_version()
+        db.session.commit()
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+        elapsed = time.perf_counter() - started
+        total = args.doctors * 2 + args.patients * 2 + count
+        print(f"✅ Seeded {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s overall)")
+        print(f"📝 Every account's password is '{args.password}', e.g. {db.session.query(User.email).filter_by(role='patient').first()[0]}")
+    return 0 if count == args.appointments else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with a deterministic synthetic dataset")
+    parser.add_argument("--doctors", type=int, default=1000, help="Number of doctors (default: 1000)")
+    parser.add_argument("--patients", type=int, default=50000, help="Number of patients (default: 50000)")
+    parser.add_argument("--appointments", type=int, default=1000000, help="Number of appointments (default: 1000000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--password", type=str, default="password123", help="Password of every account (default: password123)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per INSERT / COPY and commit (default: 50000)")
+    parser.add_argument("--wipe", action="store_true", help="Drop all tables first")
+
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from sqlalchemy.orm import selectinload
+from .models import User
+
+# Stay below SQLite's default limit on bound parameters per statement
+IN_CLAUSE_CHUNK = 900
+
+APPOINTMENT_FIELDS = (
+    "id", "patient", "doctor", "start_time", "end_time", "status", "reason", "created_at",
+)
+DATETIME_FIELDS = ("start_time", "end_time", "created_at")
+
+# List responses: one object per row, or column names plus one array per row
+SHAPES = ("objects", "columns")
+
+
+def load_users(user_ids):
+    """Fetch users (with their doctor profiles) by id, two queries per IN_CLAUSE_CHUNK ids"""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+
+    users = {}
+    for start in range(0, len(user_ids), IN_CLAUSE_CHUNK):
+        chunk = user_ids[start:start + IN_CLAUSE_CHUNK]
+        for user in (
+            User.query.options(selectinload(User.doctor_profile))
+            .filter(User.id.in_(chunk))
+        ):
+            users[user.id] = user
+    return users
+
+
+def parse_fields(value):
+    """Parse a `fields=` query parameter into a tuple of appointment fields.
+
+    `id` is always included; raises ValueError on unknown field names.
+    """
+    if not value:
+        return APPOINTMENT_FIELDS
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - set(APPOINTMENT_FIELDS)
+    if unknown:
+        raise ValueError(", ".join(sorted(unknown)))
+    return tuple(name for name in APPOINTMENT_FIELDS if name == "id" or name in requested)
+
+
+def parse_shape(value):
+    """Parse a `shape=` query parameter; raises ValueError on anything but objects or columns"""
+    if not value:
+        return "objects"
+    if value not in SHAPES:
+        raise ValueError(value)
+    return value
+
+
+def serialize_appointment(a, users, fields=APPOINTMENT_FIELDS):
+    result = {}
+    for name in fields:
+        if name == "patient":
+            patient = users.get(a.patient_id)
+            result["patient"] = {
+                "id": patient.id if patient else None,
+                "name": patient.name if patient else "Unknown",
+                "email": patient.email if patient else None,
+            }
+        elif name == "doctor":
+            doctor = users.get(a.doctor_id)
+            result["doctor"] = {
+                "id": doctor.id if doctor else None,
+                "name": doctor.name if doctor else "Unknown",
+                "specialty": doctor.doctor_profile.specialty
+                if doctor and doctor.doctor_profile else None,
+            }
+        elif name in DATETIME_FIELDS:
+            value = getattr(a, name)
+            result[name] = value.isoformat() if value else None
+        else:
+            result[name] = getattr(a, name)
+    return result
+
+
+def serialize_appointments(appointments, fields=APPOINTMENT_FIELDS):
+    """Serialize a list of appointments without a query per row.
+
+    Patients, doctors and doctor profiles are loaded in bulk up front, so the
+    number of queries stays the same however many appointments are passed in.
+    Nothing is loaded when neither `patient` nor `doctor` is requested.
+    """
+    user_ids = []
+    if "patient" in fields:
+        user_ids.extend(a.patient_id for a in appointments)
+    if "doctor" in fields:
+        user_ids.extend(a.doctor_id for a in appointments)
+    users = load_users(user_ids)
+    return [serialize_appointment(a, users, fields) for a in appointments]
+
+
+def serialize_appointment_columns(appointments, fields=APPOINTMENT_FIELDS):
+    """Serialize a list of appointments as columns and rows.
+
+    `patient` and `doctor` become `patient_id` and `doctor_id` columns, and
+    each patient or doctor is listed once in `patients` / `doctors` instead
+    of being repeated on every row. Ids with no user behind them are left
+    out of those lists.
+    """
+    columns = [f"{name}_id" if name in ("patient", "doctor") else name for name in fields]
+    rows = []
+    for a in appointments:
+        row = []
+        for name in fields:
+            if name == "patient":
+                row.append(a.patient_id)
+            elif name == "doctor":
+                row.append(a.doctor_id)
+            elif name in DATETIME_FIELDS:
+                value = getattr(a, name)
+                row.append(value.isoformat() if value else None)
+            else:
+                row.append(getattr(a, name))
+        rows.append(row)
+    result = {"columns": columns, "rows": rows}
+
+    patient_ids = {a.patient_id for a in appointments} if "patient" in fields else set()
+    doctor_ids = {a.doctor_id for a in appointments} if "doctor" in fields else set()
+    users = load_users(patient_ids | doctor_ids)
+    if "patient" in fields:
+        result["patients"] = [
+            {"id": user.id, "name": user.name, "email": user.email}
+            for user in (users.get(user_id) for user_id in sorted(patient_ids)) if user
+        ]
+    if "doctor" in fields:
+        result["doctors"] = [
+            {
+                "id": user.id,
+                "name": user.name,
+                "specialty": user.doctor_profile.specialty if user.doctor_profile else None,
+            }
+            for user in (users.get(user_id) for user_id in sorted(doctor_ids)) if user
+        ]
+    return result
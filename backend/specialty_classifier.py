@@ -0,0 +1,152 @@
+import os
+import threading
+import zlib
+import numpy as np
+from .symptom_matcher import split_words
+
+
+def text_features(text):
+    """Words, word pairs and character trigrams ("itchy" and "itching" share "itc")"""
+    words = split_words(text)
+    features = ["w:" + word for word in words]
+    features += ["b:" + first + " " + second for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += ["c:" + padded[n:n + 3] for n in range(len(padded) - 2)]
+    return features
+
+
+def encode(texts, n_features):
+    """Hashed, sublinear-tf, L2-normalized features of each text as (rows, columns, values)"""
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        counts = {}
+        for feature in text_features(text):
+            column = zlib.crc32(feature.encode()) % n_features
+            counts[column] = counts.get(column, 0) + 1
+        weights = 1 + np.log(np.fromiter(counts.values(), np.float32, len(counts)))
+        norm = np.sqrt((weights ** 2).sum()) or 1.0
+        rows += [row] * len(counts)
+        columns += counts
+        values.append(weights / norm)
+    return (
+        np.array(rows, np.int32),
+        np.array(columns, np.int32),
+        np.concatenate(values) if values else np.zeros(0, np.float32),
+    )
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    return scores / scores.sum(axis=1, keepdims=True)
+
+
+class SpecialtyModel:
+    """Linear (softmax regression) classifier over hashed text features"""
+
+    def __init__(self, classes, weights, bias):
+        self.classes = list(classes)
+        self.weights = weights  # n_features x classes
+        self.bias = bias
+
+    @property
+    def n_features(self):
+        return self.weights.shape[0]
+
+    def _scores(self, rows, columns, values, count):
+        scores = np.tile(self.bias, (count, 1))
+        np.add.at(scores, rows, self.weights[columns] * values[:, None])
+        return scores
+
+    def predict_proba(self, texts):
+        """texts x classes matrix of probabilities"""
+        return _softmax(self._scores(*encode(texts, self.n_features), len(texts)))
+
+    def predict(self, texts):
+        """(specialty, probability) per text"""
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [(self.classes[n], float(probabilities[row, n])) for row, n in enumerate(best)]
+
+    @classmethod
+    def train(cls, texts, labels, n_features=2 ** 14, epochs=300, learning_rate=2.0, l2=1e-4):
+        """Full-batch gradient descent on the cross-entropy loss"""
+        classes = sorted(set(labels))
+        index = {label: n for n, label in enumerate(classes)}
+        targets = np.zeros((len(texts), len(classes)), np.float32)
+        targets[np.arange(len(texts)), [index[label] for label in labels]] = 1
+
+        model = cls(classes, np.zeros((n_features, len(classes)), np.float32), np.zeros(len(classes), np.float32))
+        rows, columns, values = encode(texts, n_features)
+        for _ in range(epochs):
+            error = (_softmax(model._scores(rows, columns, values, len(texts))) - targets) / len(texts)
+            gradient = l2 * model.weights
+            np.add.at(gradient, columns, values[:, None] * error[rows])
+            model.weights -= learning_rate * gradient
+            model.bias -= learning_rate * error.sum(axis=0)
+        return model
+
+    def save(self, path):
+        # float16 weights: the logits don't need more precision and the file halves
+        np.savez_compressed(
+            path,
+            classes=np.array(self.classes),
+            weights=self.weights.astype(np.float16),
+            bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["classes"].tolist(), data["weights"].astype(np.float32), data["bias"].astype(np.float32))
+
+
+class SpecialtyClassifier:
+    """Offline specialty recommendations from a model trained with train_classifier.py.
+
+    The model file (SPECIALTY_MODEL_PATH) is loaded on first use, not at
+    startup. Answers below SPECIALTY_MODEL_MIN_CONFIDENCE, or naming a
+    specialty the current rules don't list, are None so the caller falls
+    back to the rule-based matcher; so is everything when there is no model.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.min_confidence = 0.0
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config["SPECIALTY_MODEL_PATH"]
+        self.min_confidence = app.config["SPECIALTY_MODEL_MIN_CONFIDENCE"]
+        with self._lock:
+            self._model = None
+            self._loaded = False
+
+    def model(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    if os.path.exists(self.path):
+                        self._model = SpecialtyModel.load(self.path)
+                    else:
+                        print(f"No specialty model at {self.path}; run backend/train_classifier.py")
+                    self._loaded = True
+        return self._model
+
+    def recommend_many(self, texts, specialties):
+        model = self.model()
+        if model is None or not texts:
+            return [None] * len(texts)
+        return [
+            specialty if confidence >= self.min_confidence and specialty in specialties else None
+            for specialty, confidence in model.predict(texts)
+        ]
+
+    def recommend(self, symptoms, specialties):
+        return self.recommend_many([symptoms], specialties)[0]
+
+
+specialty_classifier = SpecialtyClassifier()
@@ -0,0 +1,186 @@
+import json
+import os
+import string
+import threading
+import time
+from itertools import compress
+
+
+# Punctuation becomes a word break; str.translate + split is several times
+# faster than a regex tokenizer on long texts
+_PUNCTUATION = str.maketrans({char: " " for char in string.punctuation + "‘’“”–—…"})
+
+
+def split_words(text):
+    return text.lower().translate(_PUNCTUATION).split()
+
+
+class _CompiledRules:
+    """Keyword rules compiled into a trie over words.
+
+    `rank()` splits the text into words once and walks the trie from each
+    word, so the cost grows with the text length, not with the number of
+    rules. Keywords only match whole words ("bp" never matches inside
+    "subpar"); a trailing "*" makes the last word a prefix ("itch*" matches
+    "itching"); the longest keyword at a position wins ("chest pain" over
+    "chest").
+    """
+
+    def __init__(self, rules):
+        self.default = rules["default"]
+        # file order breaks score ties
+        self.priority = {specialty: n for n, specialty in enumerate(rules["specialties"])}
+        self.specialties = list(self.priority)
+
+        # keyword -> [(specialty, weight)]
+        self.targets = {}
+        for specialty, keywords in rules["specialties"].items():
+            for keyword, weight in keywords.items():
+                self.targets.setdefault(keyword.lower(), []).append((specialty, weight))
+
+        # node = {"words": {word: node}, "keyword": keyword or None, "prefixes": {stem: keyword}}
+        self.root = self._node()
+        for keyword in self.targets:
+            words = split_words(keyword)
+            if not words:
+                raise ValueError(f"Keyword without words: {keyword!r}")
+            node = self.root
+            for word in words[:-1]:
+                node = node["words"].setdefault(word, self._node())
+            if keyword.endswith("*"):
+                node["prefixes"][words[-1]] = keyword
+            else:
+                node["words"].setdefault(words[-1], self._node())["keyword"] = keyword
+
+    @staticmethod
+    def _node():
+        return {"words": {}, "keyword": None, "prefixes": {}}
+
+    def _match_at(self, words, start):
+        """(keyword, words consumed) of the longest keyword starting at words[start], or None"""
+        best = None
+        node = self.root
+        for position in range(start, len(words)):
+            word = words[position]
+            prefixes = node["prefixes"]
+            if prefixes:
+                for end in range(len(word), 0, -1):
+                    keyword = prefixes.get(word[:end])
+                    if keyword:
+                        best = (keyword, position - start + 1)
+                        break
+            node = node["words"].get(word)
+            if node is None:
+                break
+            if node["keyword"]:
+                best = (node["keyword"], position - start + 1)
+        return best
+
+    def _starts_keyword(self, word):
+        if word in self.root["words"]:
+            return True
+        prefixes = self.root["prefixes"]
+        return any(word[:end] in prefixes for end in range(1, len(word) + 1))
+
+    def matched_keywords(self, text):
+        words = split_words(text)
+        # Only words that can begin a keyword need a trie walk; checking the
+        # distinct words first keeps long texts cheap
+        starts = {word for word in set(words) if self._starts_keyword(word)}
+        found = set()
+        resume = 0
+        for position in compress(range(len(words)), map(starts.__contains__, words)):
+            if position < resume:
+                continue  # inside a longer keyword that was already matched
+            match = self._match_at(words, position)
+            if match:
+                found.add(match[0])
+                resume = position + match[1]
+        return found
+
+    def rank(self, text):
+        scores = {}
+        keywords = {}
+        for keyword in self.matched_keywords(text):
+            for specialty, weight in self.targets[keyword]:
+                scores[specialty] = scores.get(specialty, 0) + weight
+                keywords.setdefault(specialty, []).append(keyword.rstrip("*"))
+
+        total = sum(scores.values())
+        ranked = sorted(scores, key=lambda specialty: (-scores[specialty], self.priority[specialty]))
+        return [
+            {
+                "specialty": specialty,
+                "score": scores[specialty],
+                "confidence": round(scores[specialty] / total, 3),
+                "matched": sorted(keywords[specialty]),
+            }
+            for specialty in ranked
+        ]
+
+
+class SymptomMatcher:
+    """Scores every specialty against symptom text in a single pass over its words.
+
+    Rules (specialty -> {keyword: weight}) come from SYMPTOM_RULES_PATH and
+    are reloaded when the file changes, checked at most every
+    SYMPTOM_RULES_RELOAD_SECONDS. A broken file is reported and the previous
+    rules stay in use.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.reload_seconds = 0.0
+        self._rules = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config["SYMPTOM_RULES_PATH"]
+        self.reload_seconds = app.config["SYMPTOM_RULES_RELOAD_SECONDS"]
+        with self._lock:
+            self._rules = None
+            self._mtime = None
+
+    def _load(self):
+        mtime = None
+        try:
+            mtime = os.path.getmtime(self.path)
+            if self._rules is not None and mtime == self._mtime:
+                return
+            with open(self.path) as f:
+                rules = _CompiledRules(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            if self._rules is None:
+                raise
+            if mtime != self._mtime:  # report each broken version once
+                print(f"Symptom rules reload failed, keeping previous rules: {e}")
+                self._mtime = mtime
+            return
+        self._rules = rules
+        self._mtime = mtime
+
+    def rules(self):
+        now = time.monotonic()
+        if self._rules is None or now - self._checked_at >= self.reload_seconds:
+            with self._lock:
+                if self._rules is None or now - self._checked_at >= self.reload_seconds:
+                    self._load()
+                    self._checked_at = now
+        return self._rules
+
+    @property
+    def specialties(self):
+        return self.rules().specialties
+
+    def rank(self, symptoms):
+        """All specialties with at least one matching keyword, best first"""
+        return self.rules().rank(symptoms)
+
+    def recommend(self, symptoms):
+        ranked = self.rank(symptoms)
+        return ranked[0]["specialty"] if ranked else self.rules().default
+
+
+symptom_matcher = SymptomMatcher()
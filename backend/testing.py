@@ -0,0 +1,268 @@
+"""
+Helpers shared by the tests and the benchmark scripts: bulk seeding, SQL
+statement capture, auth headers for the Flask test client, and local
+stand-ins for the mail server and the OpenAI API, so nothing leaves the box.
+"""
+
+import json
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+
+from backend.extensions import db
+from backend.models import User, DoctorProfile, Appointment, ScheduleVersion
+from backend.analytics import rebuild_rollups
+
+CHUNK_SIZE = 10000
+# Placeholder hash, seeded users never log in
+DUMMY_PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+
+def auth_headers(user_id, role, name="test"):
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role, "name": name})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed(doctors, patients, appointments, rng):
+    """Bulk insert users and non-overlapping appointments"""
+    users = User.__table__
+    db.session.execute(users.insert(), [
+        {"name": f"Doctor {i}", "email": f"doctor{i}@example.com",
+         "password_hash": DUMMY_PASSWORD_HASH, "role": "doctor"}
+        for i in range(doctors)
+    ])
+    for start in range(0, patients, CHUNK_SIZE):
+        db.session.execute(users.insert(), [
+            {"name": f"Patient {i}", "email": f"patient{i}@example.com",
+             "password_hash": DUMMY_PASSWORD_HASH, "role": "patient"}
+            for i in range(start, min(start + CHUNK_SIZE, patients))
+        ])
+
+    doctor_ids = [row[0] for row in db.session.query(User.id).filter_by(role="doctor")]
+    patient_ids = [row[0] for row in db.session.query(User.id).filter_by(role="patient")]
+    db.session.execute(DoctorProfile.__table__.insert(), [
+        {"user_id": doctor_id, "specialty": "General Physician", "experience_years": 5, "rating": 4.0}
+        for doctor_id in doctor_ids
+    ])
+    db.session.execute(ScheduleVersion.__table__.insert(), [
+        {"doctor_id": doctor_id, "version": 0} for doctor_id in doctor_ids
+    ])
+
+    # Each doctor gets consecutive hourly slots (09:00-17:00), centred on today
+    per_doctor = max(1, appointments // len(doctor_ids))
+    days = per_doctor // 8 + 1
+    first_day = datetime.combine(datetime.utcnow().date(), datetime.min.time()) - timedelta(days=days // 2)
+
+    batch = []
+    for doctor_id in doctor_ids:
+        for n in range(per_doctor):
+            start_time = first_day + timedelta(days=n // 8, hours=9 + n % 8)
+            batch.append({
+                "patient_id": rng.choice(patient_ids),
+                "doctor_id": doctor_id,
+                "start_time": start_time,
+                "end_time": start_time + timedelta(minutes=30),
+                "status": rng.choices(["scheduled", "cancelled", "completed"], weights=[70, 15, 15])[0],
+                "reason": "seeded",
+                "created_at": start_time - timedelta(days=7),
+            })
+            if len(batch) >= CHUNK_SIZE:
+                db.session.execute(Appointment.__table__.insert(), batch)
+                batch = []
+    if batch:
+        db.session.execute(Appointment.__table__.insert(), batch)
+    db.session.commit()
+    # Bulk inserts bypass the booking routes, so backfill the analytics rollups
+    rebuild_rollups()
+
+    return doctor_ids, patient_ids, first_day, days
+
+
+def capture_statements(engine, fn, table=None):
+    """Run fn once and return the (statement, parameters) pairs it executed.
+
+    When table is given, only statements mentioning that table are kept.
+    """
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if table is None or table in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def unused_port():
+    """A local TCP port nothing listens on"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def mail_config(host, port):
+    """Flask-Mail settings for a plain, unauthenticated local SMTP server"""
+    return {
+        "MAIL_SERVER": host,
+        "MAIL_PORT": port,
+        "MAIL_USE_TLS": False,
+        "MAIL_USE_SSL": False,
+        "MAIL_USERNAME": "",
+        "MAIL_PASSWORD": "",
+        "MAIL_DEFAULT_SENDER": "noreply@example.com",
+    }
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.reply("220 localhost smtp-sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip().upper()
+
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                if self.server.delay:
+                    time.sleep(self.server.delay)
+                with self.server.lock:
+                    self.server.received += 1
+                self.reply("250 OK queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server that accepts and counts every message; delay simulates a slow server"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        super().__init__((host, port), _SMTPHandler)
+        self.delay = delay
+        self.received = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def mail_config(self):
+        """Flask-Mail settings pointing at this sink"""
+        return mail_config(self.server_address[0], self.port)
+
+
+class FakeChatAPI:
+    """Minimal /v1/chat/completions server.
+
+    The answer is one of the listed specialties, picked by the length of the
+    symptom text, so different texts get different (but repeatable) answers.
+
+    mode "ok" answers after latency seconds, "stall" holds the request until
+    the mode changes.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.mode = "ok"
+        self.calls = 0
+        self.connections = 0
+        self.changed = threading.Event()
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+            def setup(self):
+                super().setup()
+                with api._lock:
+                    api.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with api._lock:
+                    api.calls += 1
+                while api.mode == "stall":
+                    api.changed.wait(0.05)
+                time.sleep(api.latency)
+
+                prompt = body["messages"][0]["content"]
+                symptoms = prompt.split("Symptoms: ", 1)[1].split("\n", 1)[0]
+                choices = prompt.split("Choose from: ", 1)[1].split("\n", 1)[0].split(", ")
+                self.reply(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": choices[len(symptoms) % len(choices)]}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                })
+
+            def reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client already gave up (timed out)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.changed.set()
+        self.changed.clear()
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls = 0
+            self.connections = 0
+
+    def close(self):
+        self.set_mode("ok")
+        self.server.shutdown()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Train the local specialty classifier used by `"method": "local"` in
+/api/ai/recommend-doctor. Reads labelled symptom texts (JSON lines or CSV
+with `symptoms` and `specialty` columns) plus, unless --no-rule-keywords,
+every keyword of the rule-based matcher as a one-phrase example. Reports
+accuracy on a held-out share of the texts, then trains on everything and
+writes the model.
+
+Usage:
+    python train_classifier.py
+    or
+    python train_classifier.py --data triage_export.csv --output data/specialty_model.npz --epochs 500
+"""
+
+import sys
+import os
+import csv
+import json
+import time
+import random
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from backend.config import Config, BASE_DIR
+from backend.specialty_classifier import SpecialtyModel
+
+
+def read_examples(path):
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["symptoms"], row["specialty"]) for row in rows]
+
+
+def train(args):
+    examples = read_examples(args.data)
+    with open(Config.SYMPTOM_RULES_PATH) as f:
+        rules = json.load(f)["specialties"]
+    specialties = list(rules)
+    keywords = [] if args.no_rule_keywords else [
+        (keyword.rstrip("*"), specialty) for specialty, words in rules.items() for keyword in words
+    ]
+
+    unknown = sorted({label for _, label in examples} - set(specialties))
+    if unknown:
+        print(f"❌ Labels not in {Config.SYMPTOM_RULES_PATH}: {', '.join(unknown)}")
+        return 1
+    missing = [specialty for specialty in specialties if specialty not in {label for _, label in examples}]
+    if missing:
+        print(f"⚠️  No examples for: {', '.join(missing)} (the model will never suggest them)")
+
+    options = {"n_features": args.features, "epochs": args.epochs, "learning_rate": args.learning_rate, "l2": args.l2}
+    if args.holdout:
+        shuffled = examples[:]
+        random.Random(args.seed).shuffle(shuffled)
+        cut = int(len(shuffled) * args.holdout)
+        held_out, training = shuffled[:cut], shuffled[cut:] + keywords
+        model = SpecialtyModel.train([text for text, _ in training], [label for _, label in training], **options)
+        predicted = model.predict([text for text, _ in held_out])
+        correct = sum(specialty == label for (specialty, _), (_, label) in zip(predicted, held_out))
+        print(f"📊 Held-out accuracy: {correct}/{len(held_out)} ({correct / max(1, len(held_out)):.0%})")
+
+    started = time.perf_counter()
+    training = examples + keywords
+    model = SpecialtyModel.train([text for text, _ in training], [label for _, label in training], **options)
+    model.save(args.output)
+    print(f"✅ Trained on {len(examples)} examples and {len(keywords)} rule keywords in {time.perf_counter() - started:.1f}s")
+    print(f"   Model: {args.output} ({os.path.getsize(args.output) // 1024} KB, {len(model.classes)} specialties)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local specialty classifier")
+    parser.add_argument("--data", type=str, default=os.path.join(BASE_DIR, "data", "symptom_training.jsonl"), help="Labelled examples, .jsonl or .csv (default: data/symptom_training.jsonl)")
+    parser.add_argument("--output", type=str, default=Config.SPECIALTY_MODEL_PATH, help="Model file to write (default: SPECIALTY_MODEL_PATH)")
+    parser.add_argument("--features", type=int, default=2 ** 14, help="Hashed feature buckets (default: 16384)")
+    parser.add_argument("--epochs", type=int, default=300, help="Gradient descent steps (default: 300)")
+    parser.add_argument("--learning-rate", type=float, default=2.0, help="Learning rate (default: 2.0)")
+    parser.add_argument("--l2", type=float, default=1e-4, help="L2 regularization (default: 0.0001)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples held out for the accuracy report, 0 to skip (default: 0.2)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the held-out split (default: 42)")
+    parser.add_argument("--no-rule-keywords", action="store_true", help="Train on the examples only, without the rule keywords")
+
+    args = parser.parse_args()
+    sys.exit(train(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+// Helpers for the paginated /api/appointments/my listing and its ?since= delta sync.
+
+const byStartTimeDesc = (a, b) =>
+  a.start_time < b.start_time ? 1 : a.start_time > b.start_time ? -1 : b.id - a.id;
+
+// Merge appointments into a loaded list: rows with a known id replace the old copy,
+// new rows are added, and the result keeps the listing order (start_time desc, id desc).
+export function mergeAppointments(current, changed) {
+  if (!changed.length) return current;
+  const updates = new Map(changed.map((apt) => [apt.id, apt]));
+  const merged = current.map((apt) => updates.get(apt.id) || apt);
+  const known = new Set(current.map((apt) => apt.id));
+  changed.forEach((apt) => {
+    if (!known.has(apt.id)) merged.push(apt);
+  });
+  return merged.sort(byStartTimeDesc);
+}
+
+// Fetch every change after `since`; resolves to { appointments, nextSince, counts }.
+export async function fetchAppointmentChanges(api, params, since) {
+  const appointments = [];
+  let res;
+  do {
+    res = await api.get("/api/appointments/my", { params: { ...params, since } });
+    appointments.push(...res.data.appointments);
+    since = res.data.next_since;
+  } while (res.data.has_more);
+  return { appointments, nextSince: since, counts: res.data.counts };
+}
+
+// Open the server-sent event stream for the signed-in user's appointments. onChange runs
+// whenever one of them is booked, cancelled or changes status, and on every (re)connect,
+// so changes made while the stream was down are picked up too. Returns a close function.
+export function subscribeToAppointmentEvents(api, onChange) {
+  if (!localStorage.getItem("access_token") || typeof EventSource === "undefined") return () => {};
+  let source = null;
+  let closed = false;
+
+  const open = async () => {
+    // EventSource can't send an Authorization header, so the stream is opened with
+    // a short-lived stream token that is good for nothing else
+    let token;
+    try {
+      token = (await api.post("/api/appointments/events/token")).data.token;
+    } catch {
+      return;
+    }
+    if (closed) return;
+    source = new EventSource(
+      `${api.defaults.baseURL}/api/appointments/events?token=${encodeURIComponent(token)}`
+    );
+    source.onopen = onChange;
+    // The browser reconnects on its own, but gives up once the token has expired
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && !closed) setTimeout(open, 1000);
+    };
+    ["booked", "cancelled", "status", "resync"].forEach((type) =>
+      source.addEventListener(type, onChange)
+    );
+  };
+
+  open();
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+}
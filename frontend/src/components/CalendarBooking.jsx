@@ -2,42 +2,59 @@ import { useState, useEffect } from "react";
 import Calendar from "react-calendar";
 import "react-calendar/dist/Calendar.css";
 import api from "../api/client.js";
-import { format } from "date-fns";
+import { format, parseISO, endOfMonth, differenceInCalendarDays } from "date-fns";
 
 export default function CalendarBooking({ doctorId, onBookingSuccess }) {
   const [selectedDate, setSelectedDate] = useState(new Date());
   const [selectedTime, setSelectedTime] = useState(null);
-  const [availableSlots, setAvailableSlots] = useState([]);
+  // One availability request per visible month instead of one per clicked day
+  const [activeMonth, setActiveMonth] = useState(format(new Date(), "yyyy-MM"));
+  const [availability, setAvailability] = useState({ start: null, slotHours: [], masks: [] });
   const [reason, setReason] = useState("");
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState("");
   const [error, setError] = useState("");
 
   useEffect(() => {
-    if (doctorId && selectedDate) {
-      loadAvailableSlots();
+    if (doctorId) {
+      loadAvailability();
     }
-  }, [doctorId, selectedDate]);
+  }, [doctorId, activeMonth]);
 
-  const loadAvailableSlots = async () => {
+  const loadAvailability = async () => {
     try {
-      const dateStr = format(selectedDate, "yyyy-MM-dd");
-      const res = await api.get("/api/appointments/available-slots", {
-        params: { doctor_id: doctorId, date: dateStr },
+      const monthStart = parseISO(`${activeMonth}-01`);
+      const res = await api.get("/api/appointments/availability", {
+        params: {
+          doctor_ids: doctorId,
+          start: format(monthStart, "yyyy-MM-dd"),
+          end: format(endOfMonth(monthStart), "yyyy-MM-dd"),
+        },
       });
 
-      setAvailableSlots(res.data.available_slots || []);
+      setAvailability({
+        start: res.data.start,
+        slotHours: res.data.slot_hours,
+        masks: res.data.doctors[String(doctorId)] || [],
+      });
     } catch (err) {
       console.error("Failed to load slots:", err);
-      setAvailableSlots([]);
+      setAvailability({ start: null, slotHours: [], masks: [] });
     }
   };
 
+  // Bitmask of free slots for a day, or null when the day is outside the loaded month
+  const dayMask = (date) => {
+    if (!availability.start) return null;
+    const index = differenceInCalendarDays(date, parseISO(availability.start));
+    return index >= 0 && index < availability.masks.length ? availability.masks[index] : null;
+  };
+
   const generateTimeSlots = () => {
     const slots = [];
     const date = new Date(selectedDate);
 
-    for (let hour = 9; hour < 17; hour++) {
+    for (const hour of availability.slotHours) {
       const slot = new Date(date);
       slot.setHours(hour, 0, 0, 0);
       slots.push(slot);
@@ -46,19 +63,16 @@ export default function CalendarBooking({ doctorId, onBookingSuccess }) {
     return slots;
   };
 
-  // FIXED SLOT MATCHING (FULL DATE + TIME)
   const isSlotAvailable = (slotTime) => {
-    return availableSlots.some((available) => {
-      const a = new Date(available);
-
-      return (
-        a.getFullYear() === slotTime.getFullYear() &&
-        a.getMonth() === slotTime.getMonth() &&
-        a.getDate() === slotTime.getDate() &&
-        a.getHours() === slotTime.getHours() &&
-        a.getMinutes() === slotTime.getMinutes()
-      );
-    });
+    const mask = dayMask(slotTime);
+    const bit = availability.slotHours.indexOf(slotTime.getHours());
+    return mask !== null && bit >= 0 && slotTime.getMinutes() === 0 && ((mask >> bit) & 1) === 1;
+  };
+
+  const handleDateChange = (date) => {
+    setSelectedDate(date);
+    setSelectedTime(null);
+    setActiveMonth(format(date, "yyyy-MM"));
   };
 
   const handleBook = async () => {
@@ -93,7 +107,7 @@ export default function CalendarBooking({ doctorId, onBookingSuccess }) {
 
       if (onBookingSuccess) onBookingSuccess();
 
-      setTimeout(() => loadAvailableSlots(), 500);
+      setTimeout(() => loadAvailability(), 500);
     } catch (err) {
       setError(err.response?.data?.message || "Failed to book appointment");
     } finally {
@@ -111,7 +125,11 @@ export default function CalendarBooking({ doctorId, onBookingSuccess }) {
         {/* Calendar */}
         <div>
           <Calendar
-            onChange={setSelectedDate}
+            onChange={handleDateChange}
+            onActiveStartDateChange={({ activeStartDate, view }) =>
+              view === "month" && setActiveMonth(format(activeStartDate, "yyyy-MM"))
+            }
+            tileDisabled={({ date, view }) => view === "month" && dayMask(date) === 0}
             value={selectedDate}
             minDate={new Date()}
             className="w-full border-0 rounded-lg"
@@ -6,6 +6,7 @@ export default function AdminDashboard() {
   const [analytics, setAnalytics] = useState(null);
   const [doctors, setDoctors] = useState([]);
   const [appointments, setAppointments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [showCreateForm, setShowCreateForm] = useState(false);
   const [editingDoctor, setEditingDoctor] = useState(null);
   const [formData, setFormData] = useState({
@@ -37,10 +38,15 @@ export default function AdminDashboard() {
     }
   };
 
-  const loadAppointments = async () => {
+  const loadAppointments = async (cursor = null) => {
     try {
-      const res = await api.get("/api/admin/appointments");
-      setAppointments(res.data);
+      const res = await api.get("/api/admin/appointments", {
+        params: { fields: "patient,doctor,start_time,status,reason", cursor: cursor || undefined },
+      });
+      setAppointments((prev) =>
+        cursor ? [...prev, ...res.data.appointments] : res.data.appointments
+      );
+      setNextCursor(res.data.next_cursor);
     } catch (err) {
       console.error("Failed to load appointments:", err);
     }
@@ -355,6 +361,14 @@ export default function AdminDashboard() {
                   </div>
                 ))
               )}
+              {nextCursor && (
+                <button
+                  onClick={() => loadAppointments(nextCursor)}
+                  className="w-full bg-gray-100 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-200 transition-colors font-semibold text-sm"
+                >
+                  Load more
+                </button>
+              )}
             </div>
           </div>
         </div>
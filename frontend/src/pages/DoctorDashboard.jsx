@@ -1,28 +1,63 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import api from "../api/client.js";
+import {
+  fetchAppointmentChanges,
+  mergeAppointments,
+  subscribeToAppointmentEvents,
+} from "../api/appointments.js";
 import { format } from "date-fns";
 
 export default function DoctorDashboard() {
   const [appointments, setAppointments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [counts, setCounts] = useState(null); // server totals; `appointments` holds the loaded pages only
+  const syncCursor = useRef(null); // a ref, so the event stream handler sees the latest
   const [selectedStatus, setSelectedStatus] = useState("all"); // all, scheduled, completed, cancelled
 
-  const loadAppointments = async () => {
+  const appointmentParams = { fields: "patient,start_time,end_time,status,reason" };
+
+  const loadAppointments = async (cursor = null) => {
     try {
-      const res = await api.get("/api/appointments/my");
-      setAppointments(res.data);
+      const res = await api.get("/api/appointments/my", {
+        params: { ...appointmentParams, cursor: cursor || undefined },
+      });
+      // Later pages may repeat rows that a sync already added
+      setAppointments((prev) =>
+        cursor ? mergeAppointments(prev, res.data.appointments) : res.data.appointments
+      );
+      setNextCursor(res.data.next_cursor);
+      if (!cursor) syncCursor.current = res.data.next_since;
+      if (res.data.counts) setCounts(res.data.counts);
     } catch (err) {
       console.error("Failed to load appointments:", err);
     }
   };
 
+  // Fetch only the appointments changed since the last load or sync
+  const syncAppointments = async () => {
+    if (!syncCursor.current) return loadAppointments();
+    try {
+      const { appointments: changed, nextSince, counts: newCounts } = await fetchAppointmentChanges(
+        api, appointmentParams, syncCursor.current
+      );
+      setAppointments((prev) => mergeAppointments(prev, changed));
+      syncCursor.current = nextSince;
+      if (newCounts) setCounts(newCounts);
+    } catch (err) {
+      console.error("Failed to sync appointments:", err);
+    }
+  };
+
   useEffect(() => {
     loadAppointments();
+    // Changes made elsewhere (the other party, another tab) arrive as events
+    return subscribeToAppointmentEvents(api, syncAppointments);
   }, []);
 
   const handleStatusUpdate = async (appointmentId, newStatus) => {
     try {
       await api.put(`/api/appointments/${appointmentId}/status`, { status: newStatus });
-      loadAppointments();
+      syncAppointments();
     } catch (err) {
       alert(err.response?.data?.message || "Failed to update status");
     }
@@ -33,13 +68,6 @@ export default function DoctorDashboard() {
     return apt.status === selectedStatus;
   });
 
-  const upcomingAppointments = appointments.filter(
-    (apt) => new Date(apt.start_time) > new Date() && apt.status === "scheduled"
-  );
-  const pastAppointments = appointments.filter(
-    (apt) => new Date(apt.start_time) <= new Date() || apt.status !== "scheduled"
-  );
-
   return (
     <div className="min-h-screen bg-gradient-to-br from-green-50 to-emerald-100">
       <div className="max-w-7xl mx-auto p-6 space-y-6">
@@ -50,17 +78,15 @@ export default function DoctorDashboard() {
           <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
             <div className="bg-gradient-to-br from-blue-500 to-blue-600 text-white rounded-lg p-6 shadow-md">
               <h3 className="text-sm font-semibold opacity-90 mb-2">Upcoming</h3>
-              <p className="text-4xl font-bold">{upcomingAppointments.length}</p>
+              <p className="text-4xl font-bold">{counts ? counts.upcoming : "–"}</p>
             </div>
             <div className="bg-gradient-to-br from-green-500 to-green-600 text-white rounded-lg p-6 shadow-md">
               <h3 className="text-sm font-semibold opacity-90 mb-2">Completed</h3>
-              <p className="text-4xl font-bold">
-                {appointments.filter((a) => a.status === "completed").length}
-              </p>
+              <p className="text-4xl font-bold">{counts ? counts.completed : "–"}</p>
             </div>
             <div className="bg-gradient-to-br from-purple-500 to-purple-600 text-white rounded-lg p-6 shadow-md">
               <h3 className="text-sm font-semibold opacity-90 mb-2">Total</h3>
-              <p className="text-4xl font-bold">{appointments.length}</p>
+              <p className="text-4xl font-bold">{counts ? counts.total : "–"}</p>
             </div>
           </div>
 
@@ -179,6 +205,19 @@ export default function DoctorDashboard() {
                 );
               })
             )}
+            {nextCursor && counts && (
+              <p className="text-sm text-gray-500 text-center">
+                Showing the latest {appointments.length} of {counts.total} appointments
+              </p>
+            )}
+            {nextCursor && (
+              <button
+                onClick={() => loadAppointments(nextCursor)}
+                className="w-full bg-gray-100 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-200 transition-colors font-semibold text-sm"
+              >
+                Load more
+              </button>
+            )}
           </div>
         </div>
       </div>
@@ -1,11 +1,19 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import api from "../api/client.js";
+import {
+  fetchAppointmentChanges,
+  mergeAppointments,
+  subscribeToAppointmentEvents,
+} from "../api/appointments.js";
 import CalendarBooking from "../components/CalendarBooking.jsx";
 import { format } from "date-fns";
 
 export default function PatientDashboard() {
   const [doctors, setDoctors] = useState([]);
   const [appointments, setAppointments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [counts, setCounts] = useState(null); // server totals; `appointments` holds the loaded pages only
+  const syncCursor = useRef(null); // a ref, so the event stream handler sees the latest
   const [selectedDoctor, setSelectedDoctor] = useState(null);
   const [activeTab, setActiveTab] = useState("book"); // "book", "appointments", "ai"
   const [symptoms, setSymptoms] = useState("");
@@ -21,22 +29,49 @@ export default function PatientDashboard() {
     }
   };
 
-  const loadAppointments = async () => {
+  const appointmentParams = { fields: "doctor,start_time,status,reason" };
+
+  const loadAppointments = async (cursor = null) => {
     try {
-      const res = await api.get("/api/appointments/my");
-      setAppointments(res.data);
+      const res = await api.get("/api/appointments/my", {
+        params: { ...appointmentParams, cursor: cursor || undefined },
+      });
+      // Later pages may repeat rows that a sync already added
+      setAppointments((prev) =>
+        cursor ? mergeAppointments(prev, res.data.appointments) : res.data.appointments
+      );
+      setNextCursor(res.data.next_cursor);
+      if (!cursor) syncCursor.current = res.data.next_since;
+      if (res.data.counts) setCounts(res.data.counts);
     } catch (err) {
       console.error("Failed to load appointments:", err);
     }
   };
 
+  // Fetch only the appointments changed since the last load or sync
+  const syncAppointments = async () => {
+    if (!syncCursor.current) return loadAppointments();
+    try {
+      const { appointments: changed, nextSince, counts: newCounts } = await fetchAppointmentChanges(
+        api, appointmentParams, syncCursor.current
+      );
+      setAppointments((prev) => mergeAppointments(prev, changed));
+      syncCursor.current = nextSince;
+      if (newCounts) setCounts(newCounts);
+    } catch (err) {
+      console.error("Failed to sync appointments:", err);
+    }
+  };
+
   useEffect(() => {
     loadDoctors();
     loadAppointments();
+    // Changes made elsewhere (the other party, another tab) arrive as events
+    return subscribeToAppointmentEvents(api, syncAppointments);
   }, []);
 
   const handleBookingSuccess = () => {
-    loadAppointments();
+    syncAppointments();
     setActiveTab("appointments");
   };
 
@@ -61,7 +96,7 @@ export default function PatientDashboard() {
     if (!window.confirm("Are you sure you want to cancel this appointment?")) return;
     try {
       await api.post(`/api/appointments/${appointmentId}/cancel`);
-      loadAppointments();
+      syncAppointments();
     } catch (err) {
       alert(err.response?.data?.message || "Failed to cancel appointment");
     }
@@ -159,7 +194,9 @@ export default function PatientDashboard() {
           <div className="space-y-6">
             {/* Upcoming Appointments */}
             <div className="bg-white rounded-xl shadow-lg p-6">
-              <h2 className="text-xl font-semibold mb-4 text-gray-800">Upcoming Appointments</h2>
+              <h2 className="text-xl font-semibold mb-4 text-gray-800">
+                Upcoming Appointments{counts ? ` (${counts.upcoming})` : ""}
+              </h2>
               {upcomingAppointments.length === 0 ? (
                 <p className="text-gray-600">No upcoming appointments.</p>
               ) : (
@@ -206,6 +243,12 @@ export default function PatientDashboard() {
                   ))}
                 </div>
               )}
+              {counts && upcomingAppointments.length < counts.upcoming && (
+                <p className="text-sm text-gray-500 mt-4">
+                  {counts.upcoming - upcomingAppointments.length} more upcoming appointment(s) not loaded yet, use
+                  "Load more" below.
+                </p>
+              )}
             </div>
 
             {/* Past Appointments */}
@@ -251,6 +294,19 @@ export default function PatientDashboard() {
                   ))}
                 </div>
               )}
+              {nextCursor && counts && (
+                <p className="text-sm text-gray-500 text-center mt-4">
+                  Showing the latest {appointments.length} of {counts.total} appointments
+                </p>
+              )}
+              {nextCursor && (
+                <button
+                  onClick={() => loadAppointments(nextCursor)}
+                  className="w-full mt-4 bg-gray-100 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-200 transition-colors font-semibold text-sm"
+                >
+                  Load more
+                </button>
+              )}
             </div>
           </div>
         )}
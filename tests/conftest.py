@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.testing import auth_headers, seed
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build apps on fresh SQLite files, without background workers"""
+    count = 0
+
+    def make(**config):
+        nonlocal count
+        count += 1
+        app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / f'test{count}.db'}",
+            "OUTBOX_WORKERS": 0,
+            "PASSWORD_HASH_WORKERS": 0,
+            **config,
+        })
+        with app.app_context():
+            db.create_all(bind_key=None)  # a read replica, if configured, is the test's to fill
+        return app
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seeded(app):
+    """Seed the app's database: (doctor ids, patient ids)"""
+
+    def run(doctors=3, patients=10, appointments=0):
+        with app.app_context():
+            doctor_ids, patient_ids, _, _ = seed(doctors, patients, appointments, random.Random(42))
+        return doctor_ids, patient_ids
+
+    return run
+
+
+@pytest.fixture
+def headers(app):
+    """Authorization headers for a user id and role"""
+
+    def make(user_id, role):
+        with app.app_context():
+            return auth_headers(user_id, role)
+
+    return make
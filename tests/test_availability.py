@@ -0,0 +1,36 @@
+import random
+from datetime import datetime, timedelta
+
+from backend.testing import auth_headers, seed
+
+
+def test_specialty_grid_pages_past_the_doctor_limit(make_app):
+    app = make_app(AVAILABILITY_MAX_DOCTORS=2)
+    with app.app_context():
+        doctor_ids, patient_ids, _, _ = seed(5, 1, 0, random.Random(42))
+        headers = auth_headers(patient_ids[0], "patient")
+    client = app.test_client()
+    day = f"{datetime.utcnow().date() + timedelta(days=1):%Y-%m-%d}"
+
+    pages, after = [], None
+    while True:
+        url = f"/api/appointments/availability?specialty=General Physician&start={day}&end={day}"
+        response = client.get(url + (f"&after={after}" if after else ""), headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([int(doctor_id) for doctor_id in body["doctors"]])
+        after = body["next_after"]
+        if after is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sorted(doctor_id for page in pages for doctor_id in page) == sorted(doctor_ids)
+
+
+def test_bad_after_is_rejected(client, seeded, headers):
+    _, patient_ids = seeded(doctors=1, patients=1)
+    response = client.get(
+        "/api/appointments/availability?specialty=General Physician&start=2030-01-01&end=2030-01-01&after=x",
+        headers=headers(patient_ids[0], "patient"),
+    )
+    assert response.status_code == 400
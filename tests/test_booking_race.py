@@ -0,0 +1,72 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.models import Appointment
+from backend.testing import capture_statements
+
+CLIENTS = 20
+
+
+def booking(doctor_id, start_time):
+    return {
+        "doctor_id": doctor_id,
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(hours=1)).isoformat(),
+        "reason": "test",
+    }
+
+
+def test_one_booking_wins_a_contested_slot(app, seeded, headers):
+    doctor_ids, patient_ids = seeded(doctors=1, patients=CLIENTS)
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=10)
+    patient_headers = [headers(patient_id, "patient") for patient_id in patient_ids]
+    barrier = threading.Barrier(CLIENTS)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def attempt(request_headers):
+        client = app.test_client()
+        barrier.wait()
+        status = client.post("/api/appointments/book", headers=request_headers, json=booking(doctor_ids[0], start_time)).status_code
+        with lock:
+            statuses[status] += 1
+
+    threads = [threading.Thread(target=attempt, args=(h,)) for h in patient_headers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == {201: 1, 409: CLIENTS - 1}
+    with app.app_context():
+        assert Appointment.query.filter_by(doctor_id=doctor_ids[0], start_time=start_time, status="scheduled").count() == 1
+
+
+def test_patient_cannot_double_book(client, seeded, headers):
+    doctor_ids, patient_ids = seeded(doctors=2, patients=1)
+    patient = headers(patient_ids[0], "patient")
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=10)
+
+    assert client.post("/api/appointments/book", headers=patient, json=booking(doctor_ids[0], start_time)).status_code == 201
+    again = client.post("/api/appointments/book", headers=patient, json=booking(doctor_ids[1], start_time))
+    assert again.status_code == 409
+
+
+def test_slot_the_index_shows_taken_is_rejected_without_queries(app, client, seeded, headers):
+    doctor_ids, patient_ids = seeded(doctors=1, patients=2)
+    first, second = (headers(patient_id, "patient") for patient_id in patient_ids)
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=10)
+
+    client.get(f"/api/appointments/available-slots?doctor_id={doctor_ids[0]}&date={start_time:%Y-%m-%d}", headers=first)
+    assert client.post("/api/appointments/book", headers=first, json=booking(doctor_ids[0], start_time)).status_code == 201
+
+    with app.app_context():
+        engine = db.engine
+    responses = []
+    statements = capture_statements(
+        engine, lambda: responses.append(client.post("/api/appointments/book", headers=second, json=booking(doctor_ids[0], start_time)))
+    )
+    assert responses[0].status_code == 409
+    assert statements == []
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from backend.changes import change_sequence, current_change_seq
+from backend.extensions import db
+from backend.models import AppointmentChange
+
+
+def add_changes(*seqs, age=0):
+    created_at = datetime.utcnow() - timedelta(seconds=age)
+    db.session.add_all(AppointmentChange(seq=seq, created_at=created_at) for seq in seqs)
+    db.session.commit()
+
+
+def test_gap_holds_the_mark_until_the_next_change_is_old(make_app):
+    app = make_app(CHANGES_SETTLE_SECONDS=30)
+    with app.app_context():
+        add_changes(1, 2)
+        assert current_change_seq() == 2
+
+        add_changes(4, 5)  # 3 not committed
+        assert current_change_seq() == 2
+
+        db.session.execute(update(AppointmentChange).where(AppointmentChange.seq == 4).values(
+            created_at=datetime.utcnow() - timedelta(seconds=31)
+        ))
+        db.session.commit()
+        assert current_change_seq() == 5
+
+
+def test_late_commit_fills_the_gap(make_app):
+    app = make_app(CHANGES_SETTLE_SECONDS=30)
+    with app.app_context():
+        add_changes(1, 3)
+        assert current_change_seq() == 1
+        add_changes(2)
+        assert current_change_seq() == 3
+
+
+def test_fresh_process_skips_old_gaps_at_once(make_app):
+    app = make_app(CHANGES_SETTLE_SECONDS=30)
+    with app.app_context():
+        add_changes(1, 3, 5, 7, age=60)
+        add_changes(8, 10)
+        change_sequence.init_app(app)  # forget the marks, as a newly started worker
+        assert current_change_seq() == 8
@@ -0,0 +1,53 @@
+from backend.doctor_directory import bump_directory_version, current_directory_version
+from backend.extensions import db
+
+
+def test_unchanged_directory_revalidates_with_304(client, seeded):
+    seeded(doctors=5, patients=1)
+    first = client.get("/api/doctors/")
+    assert first.status_code == 200
+    assert len(first.get_json()) == 5
+
+    not_modified = client.get("/api/doctors/", headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+
+
+def test_admin_edit_changes_the_etag(client, seeded, headers):
+    doctor_ids, _ = seeded(doctors=5, patients=1)
+    etag = client.get("/api/doctors/").headers["ETag"]
+
+    edited = client.put(f"/api/admin/doctors/{doctor_ids[0]}", headers=headers(0, "admin"), json={"name": "Renamed Doctor"})
+    assert edited.status_code == 200
+
+    after_edit = client.get("/api/doctors/", headers={"If-None-Match": etag})
+    assert after_edit.status_code == 200
+    assert after_edit.headers["ETag"] != etag
+    assert any(doctor["name"] == "Renamed Doctor" for doctor in after_edit.get_json())
+
+
+def test_first_bump_creates_the_version_row(app):
+    with app.app_context():
+        assert current_directory_version() == 0
+        bump_directory_version()
+        bump_directory_version()
+        db.session.commit()
+        assert current_directory_version() == 2
+
+
+def test_gzip_response_keeps_a_strong_etag(client, seeded):
+    seeded(doctors=50, patients=1)
+    gzipped = client.get("/api/doctors/", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in gzipped.headers["Vary"]
+    etag, weak = gzipped.get_etag()
+    assert not weak and etag.endswith("-gzip")
+
+    not_modified = client.get("/api/doctors/", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == gzipped.headers["ETag"]
+
+    # The identity copy of the same body is current too
+    identity = client.get("/api/doctors/", headers={"Accept-Encoding": "identity"})
+    assert identity.get_etag() == (etag.removesuffix("-gzip"), False)
+    assert client.get("/api/doctors/", headers={"Accept-Encoding": "gzip", "If-None-Match": identity.headers["ETag"]}).status_code == 304
@@ -0,0 +1,23 @@
+from backend.doctor_import import import_doctors
+from backend.serializers import IN_CLAUSE_CHUNK
+from backend.extensions import db
+from backend.models import User
+
+
+def test_chunks_larger_than_the_email_lookup_import(make_app):
+    app = make_app(BCRYPT_LOG_ROUNDS=4)
+    count = IN_CLAUSE_CHUNK + 100
+    rows = [
+        (line, {"name": f"Doctor {line}", "email": f"doctor{line}@example.com", "password": "secret123", "specialty": "Cardiology"})
+        for line in range(2, count + 2)
+    ]
+    with app.app_context():
+        db.session.add(User(name="Taken", email="taken@example.com", password_hash="x", role="patient"))
+        db.session.commit()
+        rows.append((count + 2, dict(rows[-1][1], email="taken@example.com")))
+
+        report = import_doctors(rows, chunk_size=count + 1).to_dict()
+        created = db.session.query(User).filter_by(role="doctor").count()
+
+    assert report["created"] == count == created
+    assert [error["message"] for error in report["errors"]] == ["Email already registered"]
@@ -0,0 +1,161 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.events import appointment_events
+from backend.extensions import db
+from backend.models import Appointment, AppointmentEvent
+from backend.testing import auth_headers, seed
+
+
+@pytest.fixture
+def events_app(make_app):
+    """Build an app with short heartbeats: (app, doctor id, patient ids, {"patient"|"doctor"|"admin": headers})"""
+
+    def make(**config):
+        app = make_app(EVENTS_HEARTBEAT_SECONDS=0.2, **config)
+        with app.app_context():
+            doctor_ids, patient_ids, _, _ = seed(1, 2, 0, random.Random(42))
+            headers = {
+                "patient": auth_headers(patient_ids[0], "patient"),
+                "doctor": auth_headers(doctor_ids[0], "doctor"),
+                "admin": auth_headers(0, "admin"),
+            }
+        return app, doctor_ids[0], patient_ids, headers
+
+    yield make
+    appointment_events.backend.stop()
+
+
+def book(client, headers, doctor_id):
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=10)
+    response = client.post("/api/appointments/book", headers=headers, json={
+        "doctor_id": doctor_id,
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(minutes=30)).isoformat(),
+    })
+    assert response.status_code == 201
+    return response.get_json()["appointment"]["id"]
+
+
+def received(subscription, count):
+    """(type, appointment id, status) of the next count events, then checks nothing else is queued"""
+    events = []
+    for _ in range(count):
+        payload = subscription.get(2)
+        assert payload is not None
+        events.append((payload["type"], payload["appointment"]["id"], payload["appointment"]["status"]))
+    assert subscription.get(0.1) is None
+    return events
+
+
+def stream_token(client, headers):
+    response = client.post("/api/appointments/events/token", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["token"]
+
+
+@pytest.mark.parametrize("backend", ["local", "database"])
+def test_events_reach_the_patient_and_doctor_once(events_app, backend):
+    app, doctor_id, patient_ids, headers = events_app(EVENTS_BACKEND=backend, EVENTS_POLL_SECONDS=0.05)
+    subscriptions = [
+        appointment_events.subscribe("patient", patient_ids[0]),
+        appointment_events.subscribe("doctor", doctor_id),
+    ]
+    other = appointment_events.subscribe("patient", patient_ids[1])
+    client = app.test_client()
+
+    booked = book(client, headers["patient"], doctor_id)
+    assert client.post(f"/api/appointments/{booked}/cancel", headers=headers["patient"]).status_code == 200
+
+    expected = [("booked", booked, "scheduled"), ("cancelled", booked, "cancelled")]
+    for subscription in subscriptions:
+        assert received(subscription, 2) == expected
+    assert received(other, 0) == []
+
+
+def test_rolled_back_change_sends_nothing(events_app):
+    app, doctor_id, patient_ids, headers = events_app()
+    subscription = appointment_events.subscribe("patient", patient_ids[0])
+    booked = book(app.test_client(), headers["patient"], doctor_id)
+    assert received(subscription, 1) == [("booked", booked, "scheduled")]
+
+    with app.app_context():
+        appointment = db.session.get(Appointment, booked)
+        appointment.status = "completed"
+        appointment_events.publish("status", appointment)
+        db.session.rollback()
+        db.session.get(Appointment, booked).reason = "unrelated commit"
+        db.session.commit()
+    assert received(subscription, 0) == []
+
+
+def test_stream_sends_events_heartbeats_and_unsubscribes(events_app):
+    app, doctor_id, _, headers = events_app()
+    client = app.test_client()
+    response = client.get(f"/api/appointments/events?token={stream_token(client, headers['doctor'])}", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert appointment_events.streams == 1
+    body = iter(response.response)
+    assert next(body).startswith(b"retry: 200")
+    assert next(body) == b": keep-alive\n\n"
+
+    booked = book(client, headers["patient"], doctor_id)
+    event_id, event, data = next(body).decode().rstrip("\n").split("\n")
+    assert event_id.startswith("id: ") and event == "event: booked"
+    assert json.loads(data.removeprefix("data: "))["appointment"]["id"] == booked
+
+    response.close()
+    assert appointment_events.streams == 0
+
+
+def test_overflowed_stream_gets_resync(events_app):
+    app, doctor_id, patient_ids, headers = events_app(EVENTS_QUEUE_SIZE=1)
+    subscription = appointment_events.subscribe("patient", patient_ids[0])
+    for _ in range(2):
+        subscription.put({"type": "status", "seq": 1, "appointment": {}})
+    with app.app_context():
+        body = appointment_events.stream(subscription)
+        assert next(body).startswith("retry:")
+        assert next(body) == "event: resync\ndata: {}\n\n"
+        assert next(body, None) is None
+
+
+def test_streams_over_the_limit_get_503(events_app):
+    app, _, _, headers = events_app(EVENTS_MAX_STREAMS=1)
+    client = app.test_client()
+    token = stream_token(client, headers["patient"])
+    first = client.get(f"/api/appointments/events?token={token}", buffered=False)
+    assert first.status_code == 200
+    second = client.get(f"/api/appointments/events?token={token}")
+    assert second.status_code == 503
+    assert second.headers["Retry-After"]
+    first.close()
+
+
+def test_only_valid_stream_tokens_open_a_stream(events_app, monkeypatch):
+    app, _, _, headers = events_app()
+    client = app.test_client()
+    access_token = headers["patient"]["Authorization"].split()[1]
+    token = stream_token(client, headers["patient"])
+
+    assert client.get("/api/appointments/events").status_code == 401
+    assert client.get(f"/api/appointments/events?token={access_token}").status_code == 401
+    assert client.post("/api/appointments/events/token", headers=headers["admin"]).status_code == 403
+    assert client.get("/api/appointments/my", headers={"Authorization": f"Bearer {token}"}).status_code in (401, 422)
+
+    monkeypatch.setattr(appointment_events, "token_seconds", -1)
+    assert client.get(f"/api/appointments/events?token={token}").status_code == 401
+
+
+def test_database_backend_prunes_old_event_rows(events_app):
+    app, doctor_id, _, headers = events_app(EVENTS_BACKEND="database")
+    book(app.test_client(), headers["patient"], doctor_id)
+    with app.app_context():
+        assert db.session.query(AppointmentEvent).count() == 1
+        appointment_events.backend.retention = timedelta(0)
+        appointment_events.backend.prune()
+        assert db.session.query(AppointmentEvent).count() == 0
@@ -0,0 +1,95 @@
+import logging
+import time
+
+import pytest
+
+from backend.llm_client import CircuitBreaker, _TTLCache, llm_recommender
+from backend.testing import FakeChatAPI
+
+TIMEOUT = 0.3
+RESET_SECONDS = 0.5
+
+
+@pytest.fixture
+def api():
+    api = FakeChatAPI(latency=0)
+    yield api
+    api.close()
+    llm_recommender.close()
+
+
+@pytest.fixture
+def client(make_app, api):
+    app = make_app(
+        OPENAI_API_KEY="test-key",
+        OPENAI_BASE_URL=api.base_url,
+        OPENAI_TIMEOUT=TIMEOUT,
+        OPENAI_BREAKER_FAILURES=2,
+        OPENAI_BREAKER_RESET_SECONDS=RESET_SECONDS,
+    )
+    return app.test_client()
+
+
+def recommend(client, symptoms):
+    started = time.monotonic()
+    body = client.post("/api/ai/recommend-doctor", json={"symptoms": symptoms, "use_openai": True}).get_json()
+    return body["method"], time.monotonic() - started
+
+
+def test_breaker_opens_half_opens_and_closes(caplog):
+    breaker = CircuitBreaker(failures=2, reset_seconds=0.1)
+    with caplog.at_level(logging.INFO, logger="backend.llm_client"):
+        breaker.failure()
+        assert breaker.state == "closed" and breaker.allow()
+        breaker.failure()
+        assert breaker.state == "open" and not breaker.allow()
+
+        time.sleep(0.1)
+        assert breaker.state == "half-open"
+        assert breaker.allow()
+        assert not breaker.allow()  # one trial call at a time
+        breaker.failure()
+        assert breaker.state == "open"  # the trial failed: another full period
+
+        time.sleep(0.1)
+        assert breaker.allow()
+        breaker.success()
+        assert breaker.state == "closed" and breaker.allow()
+    messages = [record.getMessage() for record in caplog.records]
+    assert sum("circuit breaker open" in message for message in messages) == 2
+    assert any("circuit breaker closed" in message for message in messages)
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = _TTLCache(size=2, ttl=0.1)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (True, None)  # "no usable answer" is cached too
+    cache.set("c", 3)
+    assert cache.get("a") == (False, None)  # least recently used
+    time.sleep(0.1)
+    assert cache.get("c") == (False, None)
+
+
+def test_answers_are_cached_per_normalized_text(client, api):
+    assert recommend(client, "fever and a bad cough")[0] == "openai"
+    assert recommend(client, "Fever  and a bad cough!")[0] == "openai"
+    assert api.calls == 1
+
+
+def test_stalled_api_times_out_then_the_breaker_falls_back(client, api):
+    api.set_mode("stall")
+    timed_out = [recommend(client, f"chest pain day {n}") for n in range(2)]
+    assert all(method == "rule-based" and seconds < TIMEOUT + 1 for method, seconds in timed_out)
+    assert llm_recommender.breaker.state == "open"
+
+    calls = api.calls
+    method, seconds = recommend(client, "chest pain day 3")
+    assert method == "rule-based" and seconds < TIMEOUT
+    assert api.calls == calls  # the open breaker never called the API
+
+    api.set_mode("ok")
+    time.sleep(RESET_SECONDS)
+    assert recommend(client, "chest pain day 4")[0] == "openai"
+    assert llm_recommender.breaker.state == "closed"
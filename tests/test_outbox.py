@@ -0,0 +1,79 @@
+import socket
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.extensions import db
+from backend.models import EmailOutbox
+from backend.outbox import deliver_batch, enqueue_email, retry_delay
+from backend.testing import SMTPSink, mail_config, unused_port
+
+RETRY = {"OUTBOX_RETRY_BASE": 30, "OUTBOX_RETRY_MAX": 100, "OUTBOX_MAX_ATTEMPTS": 3, "MAIL_SUPPRESS_SEND": False}
+
+
+@pytest.fixture
+def sink():
+    sink = SMTPSink().start()
+    yield sink
+    sink.stop()
+
+
+def queue_emails(count):
+    for n in range(count):
+        enqueue_email(f"patient{n}@example.com", "Appointment", "Booked")
+    db.session.commit()
+
+
+def make_due():
+    db.session.query(EmailOutbox).update({"next_attempt_at": datetime.utcnow()})
+    db.session.commit()
+
+
+def test_queued_emails_go_out_over_one_connection(make_app, sink):
+    app = make_app(MAIL_SUPPRESS_SEND=False, **sink.mail_config())
+    with app.app_context():
+        queue_emails(3)
+        assert deliver_batch() == 3
+        assert {email.status for email in EmailOutbox.query} == {"sent"}
+        assert deliver_batch() == 0
+    assert sink.received == 3
+    assert sink.connections == 1  # one SMTP connection per batch
+
+
+def test_retry_delay_doubles_up_to_the_cap(make_app):
+    with make_app(**RETRY).app_context():
+        assert [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+def test_unreachable_server_backs_off_then_gives_up(make_app):
+    app = make_app(**RETRY, **mail_config("127.0.0.1", unused_port()))
+    with app.app_context():
+        queue_emails(1)
+        for attempt, delay in ((1, 30), (2, 60)):
+            started = datetime.utcnow()
+            assert deliver_batch() == 1
+            email = db.session.query(EmailOutbox).one()
+            assert (email.status, email.attempts) == ("pending", attempt)
+            assert email.last_error
+            assert started + timedelta(seconds=delay - 1) <= email.next_attempt_at <= datetime.utcnow() + timedelta(seconds=delay)
+            assert deliver_batch() == 0  # not due yet
+            make_due()
+
+        assert deliver_batch() == 1
+        assert db.session.query(EmailOutbox.status).scalar() == "failed"
+
+
+def test_silent_server_times_out(make_app):
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()  # accepts the connection but never greets
+        app = make_app(**RETRY, **mail_config(*server.getsockname()), OUTBOX_SMTP_TIMEOUT=0.5)
+        with app.app_context():
+            queue_emails(1)
+            started = time.monotonic()
+            assert deliver_batch() == 1
+            assert time.monotonic() - started < 5
+            email = db.session.query(EmailOutbox).one()
+            assert (email.status, email.attempts) == ("pending", 1)
+            assert "timed out" in email.last_error
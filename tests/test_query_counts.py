@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from backend.extensions import db
+from backend.testing import auth_headers, seed, capture_statements
+
+# Ask for the largest page the API allows
+ENDPOINTS = {
+    "my_appointments_patient": ("/api/appointments/my?limit=500", "patient"),
+    "my_appointments_doctor": ("/api/appointments/my?limit=500", "doctor"),
+    "list_all_appointments": ("/api/admin/appointments?limit=500", "admin"),
+}
+
+
+def statements_per_request(app, appointments, path, role):
+    """(rows returned, SQL statements run) for one request against a database seeded with this many appointments"""
+    with app.app_context():
+        doctor_ids, patient_ids, _, _ = seed(3, 10, appointments, random.Random(42))
+        user_id = {"patient": patient_ids[0], "doctor": doctor_ids[0], "admin": 0}[role]
+        headers = auth_headers(user_id, role)
+        engine = db.engine
+    client = app.test_client()
+    client.get(path, headers=headers)  # warm up per-process caches
+    responses = []
+    statements = capture_statements(engine, lambda: responses.append(client.get(path, headers=headers)))
+    assert responses[0].status_code == 200
+    return len(responses[0].get_json()["appointments"]), len(statements)
+
+
+@pytest.mark.parametrize("name", ENDPOINTS)
+def test_statements_do_not_grow_with_rows(make_app, name):
+    path, role = ENDPOINTS[name]
+    small_rows, small = statements_per_request(make_app(), 30, path, role)
+    large_rows, large = statements_per_request(make_app(), 1500, path, role)
+    assert large_rows > small_rows
+    assert large == small
@@ -0,0 +1,92 @@
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from backend.extensions import db
+from backend.replica import PIN_COOKIE, REPLICA_BIND, replica_router
+from backend.testing import auth_headers, seed
+
+PIN_SECONDS = 0.3
+
+
+@pytest.fixture
+def replicated(make_app, tmp_path):
+    """(app, client, statements per database, doctor ids, patient headers) on a primary and a replica with the same rows.
+
+    The replica is never updated afterwards, so it plays one that lags behind.
+    """
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    with make_app(SQLALCHEMY_DATABASE_URI=replica_url).app_context():
+        seed(2, 2, 0, random.Random(42))
+    app = make_app(DATABASE_REPLICA_URL=replica_url, DB_REPLICA_PIN_SECONDS=PIN_SECONDS, AVAILABILITY_CACHE_SIZE=0)
+    statements = Counter()
+    with app.app_context():
+        doctor_ids, patient_ids, _, _ = seed(2, 2, 0, random.Random(42))
+        for name, engine in (("primary", db.engines[None]), ("replica", db.engines[REPLICA_BIND])):
+            event.listen(engine, "before_cursor_execute", lambda *_, name=name: statements.update([name]))
+        patients = [auth_headers(patient_id, "patient") for patient_id in patient_ids]
+    return app, app.test_client(), statements, doctor_ids, patients
+
+
+def my_appointments(client, statements, headers):
+    """(database the listing was read from, appointment ids)"""
+    statements.clear()
+    response = client.get("/api/appointments/my", headers=headers)
+    assert response.status_code == 200
+    assert len(statements) == 1
+    return next(iter(statements)), {appointment["id"] for appointment in response.get_json()["appointments"]}
+
+
+def test_reads_use_the_replica_and_writes_pin_the_writer(replicated):
+    app, client, statements, doctor_ids, (patient, other_patient) = replicated
+    database, seeded = my_appointments(client, statements, patient)
+    assert database == "replica"
+
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=10)
+    statements.clear()
+    booked = client.post("/api/appointments/book", headers=patient, json={
+        "doctor_id": doctor_ids[0],
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(hours=1)).isoformat(),
+    })
+    assert booked.status_code == 201
+    assert set(statements) == {"primary"}
+    booked_id = booked.get_json()["appointment"]["id"]
+
+    # Read-your-writes for the writer only
+    assert my_appointments(client, statements, patient) == ("primary", seeded | {booked_id})
+    assert my_appointments(client, statements, other_patient)[0] == "replica"
+
+    # Another worker process only has the signed cookie to go by
+    replica_router._writers.clear()
+    assert my_appointments(client, statements, patient) == ("primary", seeded | {booked_id})
+    cookie = client.get_cookie(PIN_COOKIE)
+    client.set_cookie(PIN_COOKIE, cookie.value + "x")
+    assert my_appointments(client, statements, patient) == ("replica", seeded)
+    client.set_cookie(PIN_COOKIE, cookie.value)
+
+    time.sleep(PIN_SECONDS + 0.1)
+    assert my_appointments(client, statements, patient) == ("replica", seeded)
+
+
+def test_pin_cookie_is_signed_and_http_only(replicated):
+    app, client, statements, doctor_ids, (patient, _) = replicated
+    start_time = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=11)
+    booked = client.post("/api/appointments/book", headers=patient, json={
+        "doctor_id": doctor_ids[1],
+        "start_time": start_time.isoformat(),
+        "end_time": (start_time + timedelta(hours=1)).isoformat(),
+    })
+    header = booked.headers["Set-Cookie"]
+    assert header.startswith(f"{PIN_COOKIE}=") and "HttpOnly" in header and "SameSite=Lax" in header
+
+    # A cookie pinning someone else doesn't pin this user
+    with app.app_context():
+        forged = replica_router._signer.dumps(["someone else", time.time()])
+    replica_router._writers.clear()
+    client.set_cookie(PIN_COOKIE, forged)
+    assert my_appointments(client, statements, patient)[0] == "replica"
@@ -0,0 +1,14 @@
+def post_batch(client, headers):
+    return client.post("/api/ai/recommend-doctor/batch", headers=headers, json={"symptoms": ["cough", "chest pain"]})
+
+
+def test_kiosk_and_staff_accounts_can_send_batches(client, headers):
+    for user_id, role in ((1, "kiosk"), (2, "doctor"), (0, "admin")):
+        response = post_batch(client, headers(user_id, role))
+        assert response.status_code == 200
+        assert len(response.get_json()["results"]) == 2
+
+
+def test_other_callers_are_turned_away(client, headers):
+    assert post_batch(client, {}).status_code == 401
+    assert post_batch(client, headers(3, "patient")).status_code == 403